@@ -0,0 +1,150 @@
+import random
+from typing import Iterable, List
+from nfa_converter.automaton import Automaton
+from nfa_converter.regex import regex_to_nfa
+
+
+def random_enfa(states: int, symbols: str = "ab", density: float = 1.5, epsilon_density: float = 0.2,
+                final_ratio: float = 0.1, seed: int = 0) -> Automaton:
+    """
+    Случайный НКА с ε-переходами.
+    :param states: число состояний.
+    :param symbols: символы алфавита.
+    :param density: среднее число переходов по каждому символу из одного состояния.
+    :param epsilon_density: среднее число ε-переходов из одного состояния.
+    :param final_ratio: доля конечных состояний.
+    :param seed: начальное значение генератора случайных чисел.
+    :return: автомат с состояниями "0".."states-1" и начальным состоянием "0".
+    """
+    generator = random.Random(seed)
+    nfa = Automaton("NFA")
+    names = [str(i) for i in range(states)]
+    for name in names:
+        nfa.add_state(name)
+
+    for src in names:
+        for symbol in symbols:
+            for _ in range(_count(generator, density)):
+                nfa.add_transition(src, generator.choice(names), symbol)
+        for _ in range(_count(generator, epsilon_density)):
+            nfa.add_transition(src, generator.choice(names), "ε")
+
+    nfa.set_start_states({names[0]})
+    nfa.set_final_states({name for name in names if generator.random() < final_ratio} or {names[-1]})
+    nfa.set_alphabet(set(symbols))
+    return nfa
+
+
+def exponential_nfa(n: int) -> Automaton:
+    """
+    НКА для языка (a|b)*a(a|b)^n, эквивалентный ДКА которого содержит 2^(n+1) состояний.
+    :param n: число символов после обязательного a.
+    :return: автомат из n + 2 состояний.
+    """
+    nfa = Automaton("NFA")
+    for i in range(n + 2):
+        nfa.add_state(str(i))
+    nfa.set_start_states({"0"})
+    nfa.set_final_states({str(n + 1)})
+    nfa.set_alphabet({"a", "b"})
+    nfa.add_transition("0", "0", "a")
+    nfa.add_transition("0", "0", "b")
+    nfa.add_transition("0", "1", "a")
+    for i in range(1, n + 1):
+        nfa.add_transition(str(i), str(i + 1), "a")
+        nfa.add_transition(str(i), str(i + 1), "b")
+    return nfa
+
+
+def epsilon_chain(length: int, cycle: bool = False) -> Automaton:
+    """
+    Длинная цепочка ε-переходов с переходом по символу a из каждого состояния в начало цепочки.
+    :param length: число состояний цепочки.
+    :param cycle: замкнуть ли цепочку ε-переходом из последнего состояния в первое.
+    :return: автомат, ε-замыкание первого состояния которого содержит все состояния.
+    """
+    nfa = Automaton("NFA")
+    names = [str(i) for i in range(length)]
+    for name in names:
+        nfa.add_state(name)
+    for src, dst in zip(names, names[1:]):
+        nfa.add_transition(src, dst, "ε")
+    if cycle:
+        nfa.add_transition(names[-1], names[0], "ε")
+    for i, name in enumerate(names):
+        nfa.add_transition(name, names[i // 2], "a")
+    nfa.set_start_states({names[0]})
+    nfa.set_final_states({names[-1]})
+    nfa.set_alphabet({"a"})
+    return nfa
+
+
+def random_patterns(count: int, length: int = 8, symbols: str = "abcd", seed: int = 0) -> List[str]:
+    """
+    Случайные регулярные выражения из символов, альтернатив, итераций и скобок.
+    :param count: число выражений.
+    :param length: число символов в каждом выражении.
+    :param symbols: символы алфавита.
+    :param seed: начальное значение генератора случайных чисел.
+    :return: список выражений.
+    """
+    generator = random.Random(seed)
+    patterns = []
+    for _ in range(count):
+        parts = []
+        for _ in range(length):
+            roll = generator.random()
+            if roll < 0.15:
+                parts.append(f"({generator.choice(symbols)}|{generator.choice(symbols)})")
+            elif roll < 0.25:
+                parts.append(f"{generator.choice(symbols)}*")
+            else:
+                parts.append(generator.choice(symbols))
+        patterns.append("".join(parts))
+    return patterns
+
+
+def thompson_nfa(patterns: Iterable[str]) -> Automaton:
+    """
+    НКА Томпсона для объединения регулярных выражений (см. regex.regex_to_nfa).
+    :param patterns: регулярные выражения.
+    :return: автомат с начальным состоянием "q0", из которого ε-переходы ведут в автоматы выражений.
+    """
+    return regex_to_nfa(_union_pattern(patterns), "thompson", naming=lambda index: f"q{index}")
+
+
+def glushkov_nfa(patterns: Iterable[str]) -> Automaton:
+    """
+    НКА позиций Глушкова без ε-переходов для объединения регулярных выражений.
+    :param patterns: регулярные выражения.
+    :return: автомат с начальным состоянием "q0".
+    """
+    return regex_to_nfa(_union_pattern(patterns), "glushkov", naming=lambda index: f"q{index}")
+
+
+def _union_pattern(patterns: Iterable[str]) -> str:
+    """
+    Объединение регулярных выражений в одну альтернативу.
+    """
+    return "|".join(f"({pattern})" for pattern in patterns)
+
+
+def random_words(count: int, length: int, symbols: str = "ab", seed: int = 0) -> List[str]:
+    """
+    Случайные слова для проверки допуска.
+    :param count: число слов.
+    :param length: длина каждого слова.
+    :param symbols: символы, из которых составляются слова.
+    :param seed: начальное значение генератора случайных чисел.
+    :return: список слов.
+    """
+    generator = random.Random(seed)
+    return ["".join(generator.choice(symbols) for _ in range(length)) for _ in range(count)]
+
+
+def _count(generator: random.Random, mean: float) -> int:
+    """
+    Случайное число переходов со средним значением mean.
+    """
+    whole = int(mean)
+    return whole + (1 if generator.random() < mean - whole else 0)
@@ -0,0 +1,255 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from benchmarks.generators import epsilon_chain, exponential_nfa, glushkov_nfa, random_enfa, random_patterns, \
+    random_words, thompson_nfa
+from nfa_converter.automaton import ENGINES, Automaton, FrozenAutomaton, minimize, nfa_to_dfa
+from nfa_converter.lazy import LazyDFA
+from nfa_converter.matcher import compile
+from nfa_converter.readwrite import read, write
+
+# Версия формата файла результатов
+RESULTS_VERSION = 1
+
+
+class Case(NamedTuple):
+    """
+    Сценарий измерения: автомат и слова для проверки допуска.
+    """
+    name: str
+    build: Callable[[], Automaton]
+    words: List[str]
+
+
+def default_cases(quick: bool = False) -> List[Case]:
+    """
+    Получение стандартного набора сценариев.
+    :param quick: уменьшить размеры автоматов для быстрой проверки.
+    :return: список сценариев.
+    """
+    scale = 4 if quick else 1
+    return [
+        Case(f"random_enfa_{120 // scale}", lambda: random_enfa(120 // scale, density=1.2, seed=1),
+             random_words(2000 // scale, 64, "ab", seed=1)),
+        Case(f"exponential_{14 - scale}", lambda: exponential_nfa(14 - scale),
+             random_words(2000 // scale, 64, "ab", seed=2)),
+        Case(f"thompson_{200 // scale}", lambda: thompson_nfa(random_patterns(200 // scale, seed=3)),
+             random_words(2000 // scale, 12, "abcd", seed=3)),
+        # Большой разреженный НКА (около 42 тысяч состояний): состояния ДКА содержат немного
+        # состояний НКА с далеко отстоящими номерами, сценарий отслеживает стоимость битовых множеств
+        # на больших автоматах
+        Case(f"thompson_sparse_{1500 // scale}",
+             lambda: thompson_nfa(random_patterns(1500 // scale, length=10, seed=3)),
+             random_words(2000 // scale, 14, "abcd", seed=6)),
+        # Поиск подстрок (около 10 тысяч состояний): каждое выражение предваряется итерацией
+        # алфавита, и ε-замыкания состояний ДКА содержат тысячи состояний НКА
+        Case(f"search_{350 // scale}",
+             lambda: thompson_nfa(f"(a|b|c|d)*{pattern}" for pattern in random_patterns(350 // scale, 6, seed=7)),
+             random_words(2000 // scale, 14, "abcd", seed=7)),
+        Case(f"glushkov_{200 // scale}", lambda: glushkov_nfa(random_patterns(200 // scale, seed=3)),
+             random_words(2000 // scale, 12, "abcd", seed=3)),
+        Case(f"epsilon_chain_{2000 // scale}", lambda: epsilon_chain(2000 // scale),
+             random_words(200 // scale, 32, "a", seed=4)),
+        Case(f"epsilon_cycle_{2000 // scale}", lambda: epsilon_chain(2000 // scale, cycle=True),
+             random_words(200 // scale, 32, "a", seed=5)),
+    ]
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """
+    Наименьшее время выполнения функции из нескольких запусков.
+    :param function: измеряемая функция.
+    :param repeat: число запусков.
+    :return: время в секундах.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function: Callable[[], object]) -> int:
+    """
+    Пиковый объём памяти, выделенной во время выполнения функции.
+    :param function: измеряемая функция.
+    :return: объём в байтах.
+    """
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(case: Case, repeat: int = 3) -> Dict[str, object]:
+    """
+    Измерение времени чтения, построения ДКА, записи и проверки слов для одного сценария.
+    Компактное представление автомата кэшируется, поэтому время его построения
+    измеряется отдельно (freeze) и не входит во время nfa_to_dfa.
+    :param case: сценарий.
+    :param repeat: число запусков каждой операции.
+    :return: словарь с размерами автоматов, временем операций в секундах, пиковой памятью в байтах
+    и ускорением построения способом "bitset" относительно "sets".
+    """
+    nfa = case.build()
+    text = write(nfa)
+    frozen = nfa.freeze()
+    dfa = nfa_to_dfa(nfa, engine="bitset")
+    compiled = compile(dfa)
+
+    timings = {
+        "read": best_time(lambda: read(text), repeat),
+        "freeze": best_time(lambda: FrozenAutomaton.from_automaton(nfa), repeat),
+    }
+    for engine in sorted(ENGINES):
+        timings[f"nfa_to_dfa[{engine}]"] = best_time(lambda: nfa_to_dfa(nfa, engine=engine), repeat)
+    timings["minimize"] = best_time(lambda: minimize(dfa), repeat)
+    timings["write"] = best_time(lambda: write(dfa), repeat)
+    timings["compile"] = best_time(lambda: compile(dfa), repeat)
+    timings["match"] = best_time(lambda: list(compiled.match_many(case.words)), repeat)
+    timings["match_batch"] = best_time(lambda: compiled.match_batch(case.words), repeat)
+    timings["lazy_match"] = best_time(lambda: list(map(LazyDFA(nfa).match, case.words)), repeat)
+
+    return {
+        "nfa_states": len(frozen.states),
+        "nfa_transitions": frozen.transition_count(),
+        "dfa_states": len(dfa.get_states()),
+        "timings": timings,
+        "bitset_speedup": timings["nfa_to_dfa[sets]"] / timings["nfa_to_dfa[bitset]"],
+        "peak_memory": {
+            "read": peak_memory(lambda: read(text)),
+            "nfa_to_dfa": peak_memory(lambda: nfa_to_dfa(nfa, engine="bitset")),
+        },
+    }
+
+
+def run(cases: List[Case], repeat: int = 3, log: Optional[Callable[[str], None]] = None) -> Dict[str, object]:
+    """
+    Выполнение набора сценариев.
+    :param cases: сценарии.
+    :param repeat: число запусков каждой операции.
+    :param log: функция для вывода хода измерений.
+    :return: результаты в формате, записываемом в JSON.
+    """
+    results = {}
+    for case in cases:
+        if log is not None:
+            log(f"{case.name}...")
+        results[case.name] = measure(case, repeat)
+    return {
+        "version": RESULTS_VERSION,
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "cases": results,
+    }
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object], threshold: float = 0.1) \
+        -> Tuple[List[str], int]:
+    """
+    Сравнение результатов двух запусков.
+    :param baseline: результаты, с которыми производится сравнение.
+    :param current: новые результаты.
+    :param threshold: относительное ухудшение, начиная с которого измерение считается регрессией.
+    :return: строки отчёта и число регрессий.
+    """
+    lines = []
+    regressions = 0
+    for name, result in current["cases"].items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            lines.append(f"{name}: нет в исходных результатах")
+            continue
+        for group in ("timings", "peak_memory"):
+            for metric, value in result[group].items():
+                old_value = old[group].get(metric)
+                if not old_value:
+                    continue
+                ratio = value / old_value
+                mark = ""
+                if ratio > 1 + threshold:
+                    mark = "  регрессия"
+                    regressions += 1
+                elif ratio < 1 - threshold:
+                    mark = "  улучшение"
+                lines.append(f"{name} {metric}: {_format(group, old_value)} -> {_format(group, value)} "
+                             f"({ratio:.2f}x){mark}")
+    return lines, regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Запуск измерений из командной строки.
+    :param argv: аргументы командной строки без имени программы.
+    :return: код завершения: 1, если при сравнении найдены регрессии.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run",
+                                     description="Измерение производительности nfa_converter.")
+    parser.add_argument("-o", "--output", help="файл для записи результатов в формате JSON")
+    parser.add_argument("--compare", help="файл с результатами предыдущего запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="относительное ухудшение, считающееся регрессией (по умолчанию 0.1)")
+    parser.add_argument("--repeat", type=int, default=3, help="число запусков каждой операции")
+    parser.add_argument("--quick", action="store_true", help="уменьшенные автоматы")
+    parser.add_argument("-k", "--filter", default="", help="выполнять только сценарии, содержащие подстроку")
+    args = parser.parse_args(argv)
+
+    cases = [case for case in default_cases(args.quick) if args.filter in case.name]
+    results = run(cases, args.repeat, log=lambda message: print(message, file=sys.stderr))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            json.dump(results, output, indent=2, ensure_ascii=False)
+    for name, result in results["cases"].items():
+        print(f"{name}: {result['nfa_states']} -> {result['dfa_states']} состояний")
+        for metric, value in result["timings"].items():
+            print(f"  {metric}: {_format('timings', value)}")
+        print(f"  ускорение bitset относительно sets: {result['bitset_speedup']:.2f}x")
+        for metric, value in result["peak_memory"].items():
+            print(f"  {metric} (память): {_format('peak_memory', value)}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        lines, regressions = compare(baseline, results, args.threshold)
+        print("\n".join(lines))
+        return 1 if regressions else 0
+    return 0
+
+
+def _format(group: str, value: float) -> str:
+    """
+    Запись значения измерения в удобном для чтения виде.
+    """
+    if group == "peak_memory":
+        return f"{value / 1024:.1f} КиБ"
+    return f"{value * 1000:.2f} мс"
+
+
+def _git_commit() -> Optional[str]:
+    """
+    Получение текущего коммита, если измерения запущены из репозитория git.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
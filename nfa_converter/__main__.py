@@ -0,0 +1,4 @@
+import sys
+from nfa_converter.cli import main
+
+sys.exit(main())
@@ -1,7 +1,17 @@
+import logging
 import os
+import time
+from array import array
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
-from queue import Queue
-from typing import FrozenSet, Set, Dict
+from typing import Callable, FrozenSet, Set, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from nfa_converter.symbols import ClassIndex, is_class_label, parse_label, partition
+
+# Код типа элементов массивов с номерами состояний в компактном представлении автомата
+INDEX_TYPECODE = "i"
+
+_logger = logging.getLogger(__name__)
 
 
 class AutomatonType(Enum):
@@ -24,6 +34,61 @@ class StateNotFoundError(Exception):
     pass
 
 
+class NotDeterministicError(Exception):
+    """
+    Ошибка возникающая при передаче недетерминированного автомата в операцию,
+    определённую только для детерминированных автоматов.
+    """
+    pass
+
+
+class ConversionStats:
+    """
+    Статистика построения ДКА, заполняемая функцией nfa_to_dfa.
+    Время указывается в секундах.
+    """
+
+    def __init__(self):
+        self.engine = ""
+        self.dfa_states = 0  # число обнаруженных состояний ДКА
+        self.minimized_states = 0  # число состояний минимального ДКА (при minimize=True)
+        self.processed_states = 0  # число состояний ДКА, переходы из которых вычислены
+        self.queue_depth = 0  # число обнаруженных, но ещё не обработанных состояний
+        self.max_queue_depth = 0
+        self.subset_hits = 0  # переходы в уже известные состояния ДКА
+        self.peak_subset_size = 0  # наибольшее число состояний НКА в одном состоянии ДКА
+        self.closure_time = 0.0  # вычисление ε-замыканий
+        self.moves_time = 0.0  # вычисление переходов по символам
+        self.build_time = 0.0  # построение результирующего автомата
+        self.unreachable_states = 0  # удалённые недостижимые состояния НКА (при trim=True)
+        self.dead_states = 0  # удалённые тупиковые состояния НКА (при trim=True)
+        self.elapsed = 0.0
+
+    def as_dict(self) -> Dict[str, object]:
+        """
+        Получение статистики в виде словаря.
+        :return: словарь со значениями всех полей.
+        """
+        return dict(vars(self))
+
+    def __repr__(self) -> str:
+        return f"ConversionStats({', '.join(f'{key}={value!r}' for key, value in vars(self).items())})"
+
+
+class ConversionAborted(Exception):
+    """
+    Построение ДКА прервано из-за превышения ограничения на число состояний или время.
+    """
+
+    def __init__(self, message: str, stats: ConversionStats):
+        """
+        :param message: причина прерывания.
+        :param stats: статистика на момент прерывания.
+        """
+        super().__init__(message)
+        self.stats = stats
+
+
 class Automaton:
     def __init__(self, name: str):
         """
@@ -36,6 +101,29 @@ class Automaton:
         self._final_states = set()
         self._transitions = dict()
         self._alphabet = set()
+        # Метки конечных состояний: например, имена правил, которые допускает состояние
+        self._tags: Dict[str, FrozenSet[str]] = {}
+        self._frozen: Optional[FrozenAutomaton] = None
+        self._subset_map: Optional[SubsetMap] = None
+        # Журнал изменений: состояния, у которых менялись переходы, признак конечности или начальности
+        self._changed_states: Set[str] = set()
+
+    @classmethod
+    def _from_parts(cls, name: str, states: Set[str], start_states: Set[str], final_states: Set[str],
+                    alphabet: Set[str], transitions: Dict[str, Dict[str, Set[str]]]) -> "Automaton":
+        """
+        Создание автомата из готовых множеств и словаря переходов без проверок.
+        Используется построителями, которые сами гарантируют согласованность данных.
+        Переданные объекты становятся частью автомата и не копируются.
+        """
+        automaton = cls(name)
+        automaton._states = states
+        automaton._start_states = start_states
+        automaton._final_states = final_states
+        automaton._alphabet = alphabet
+        automaton._transitions = transitions
+        automaton._changed_states = set(states)
+        return automaton
 
     def get_name(self) -> str:
         """
@@ -47,35 +135,59 @@ class Automaton:
     def get_states(self) -> Set[str]:
         """
         Получение множества состояний.
-        :return: множество строк-идентификаторов состояний.
+        :return: множество строк-идентификаторов состояний (изменять его можно только методами автомата).
         """
         return self._states
 
     def get_start_states(self) -> Set[str]:
         """
         Получение множества стартовых вершин.
-        :return: строки-идентификаторы стартовых вершин.
+        :return: строки-идентификаторы стартовых вершин (изменять их можно только методами автомата).
         """
         return self._start_states
 
     def get_final_states(self) -> Set[str]:
         """
         Получение множества конечных состояний.
-        :return: множество строк-идентификаторов конечных состояний.
+        :return: множество строк-идентификаторов конечных состояний (изменять его можно только методами автомата).
         """
         return self._final_states
 
     def get_alphabet(self) -> Set[str]:
         """
         Получение алфавита используемого в автомате,
-        :return: множество символов алфавита.
+        :return: множество символов алфавита (изменять его можно только методами автомата).
         """
         return self._alphabet
 
+    def get_tags(self) -> Dict[str, FrozenSet[str]]:
+        """
+        Получение меток состояний.
+        :return: словарь пар вида "состояние: множество меток" для состояний с непустыми метками
+        (изменять его можно только методами автомата).
+        """
+        return self._tags
+
+    def set_tags(self, tags: Dict[str, Iterable[str]]):
+        """
+        Указание меток состояний, заменяющих прежние. Метки учитываются только у конечных
+        состояний: nfa_to_dfa помечает состояние ДКА объединением меток входящих в него конечных
+        состояний НКА, а минимизация не объединяет состояния с разными метками.
+        :param tags: словарь пар вида "состояние: метки".
+        """
+        for state in tags:
+            if state not in self._states:
+                raise StateNotFoundError(f"\"{state}\" нет в списке состояний.")
+        new_tags = {state: frozenset(state_tags) for state, state_tags in tags.items() if state_tags}
+        self._changed_states.update(state for state in self._tags.keys() | new_tags.keys()
+                                    if self._tags.get(state) != new_tags.get(state))
+        self._tags = new_tags
+        self._frozen = None
+
     def get_all_transitions(self) -> Dict[str, Dict[str, Set[str]]]:
         """
         Получение всех переходов автомата.
-        :return: словарь переходов из всех состояний.
+        :return: словарь переходов из всех состояний (изменять его можно только методами автомата).
         """
         return self._transitions
 
@@ -83,27 +195,67 @@ class Automaton:
         """
         Получение переходов из указанного состояния.
         :param state: строка-идентификатор состояния.
-        :return: словарь пар вида "символ: множество_состояний"
+        :return: словарь пар вида "символ: множество_состояний" (изменять его можно только методами автомата).
         """
         if state not in self._transitions:
             return {}
         return self._transitions[state]
 
+    def get_subset_map(self) -> Optional["SubsetMap"]:
+        """
+        Получение соответствия состояний автомата множествам состояний исходного НКА.
+        :return: соответствие, если автомат построен nfa_to_dfa с keep_subsets=True, иначе None.
+        """
+        return self._subset_map
+
+    def get_changed_states(self) -> Set[str]:
+        """
+        Получение состояний, изменённых с момента последнего вызова clear_changes.
+        Состояние считается изменённым, если оно добавлено или удалено, если добавлены или
+        удалены переходы из него, или если оно стало либо перестало быть начальным или конечным.
+        :return: множество строк-идентификаторов состояний.
+        """
+        return set(self._changed_states)
+
+    def clear_changes(self):
+        """
+        Очистка журнала изменений.
+        """
+        self._changed_states.clear()
+
     def get_type(self) -> AutomatonType:
         """
         Получение типа автомата.
         :return: если автомат содержит ε-переходы, то возвращается тип eNFA,
         если ε-переходов нет, но по одному символу можноп перейти в несколько состояний, то NFA,
-        иначе DFA.
+        иначе DFA. Переходы по пересекающимся классам символов ([a-z] и a) из одного
+        состояния в разные также делают автомат недетерминированным.
         """
         is_nfa = False
-        for src, transitions in self.get_all_transitions().items():
+        has_classes = False
+        for transitions in self._transitions.values():
             if "ε" in transitions:
                 return AutomatonType.eNFA
             for symbol, dst_states in transitions.items():
                 if len(dst_states) >= 2:
                     is_nfa = True
-        return AutomatonType.NFA if is_nfa else AutomatonType.DFA
+                has_classes = has_classes or is_class_label(symbol)
+        if is_nfa:
+            return AutomatonType.NFA
+        if has_classes:
+            # Пересечения классов проверяются на разбиении меток в кэшированном представлении
+            return self.freeze().get_type()
+        return AutomatonType.DFA
+
+    def freeze(self) -> "FrozenAutomaton":
+        """
+        Получение компактного неизменяемого представления автомата.
+        Представление кэшируется и сбрасывается при изменении автомата через его методы.
+        :return: автомат с целочисленными номерами состояний и символов.
+        """
+        if self._frozen is None:
+            self._frozen = FrozenAutomaton.from_automaton(self)
+        return self._frozen
 
     def add_state(self, state: str):
         """
@@ -113,24 +265,162 @@ class Automaton:
         if state in self._states:
             raise StateAlreadyExists
         self._states.add(state)
+        self._changed_states.add(state)
+        self._frozen = None
+
+    def remove_state(self, state: str, predecessors: Optional[Iterable[str]] = None):
+        """
+        Удаление состояния вместе со всеми переходами из него и в него.
+        Для поиска входящих переходов просматриваются переходы всех состояний или только указанных.
+        :param state: строка-идентификатор состояния.
+        :param predecessors: состояния, из которых есть переходы в удаляемое, если они известны
+        вызывающему; переходы остальных состояний не просматриваются.
+        """
+        if state not in self._states:
+            raise StateNotFoundError(f"{state} отсутствует в списке состояний.")
+
+        self._states.remove(state)
+        self._start_states.discard(state)
+        self._final_states.discard(state)
+        self._tags.pop(state, None)
+        self._transitions.pop(state, None)
+        if predecessors is None:
+            sources = self._transitions.items()
+        else:
+            sources = [(src, self._transitions[src]) for src in set(predecessors) if src in self._transitions]
+        for from_state, transitions in sources:
+            for symbol in [symbol for symbol, dst_states in transitions.items() if state in dst_states]:
+                transitions[symbol].remove(state)
+                if not transitions[symbol]:
+                    del transitions[symbol]
+                self._changed_states.add(from_state)
+        self._changed_states.add(state)
+        self._frozen = None
 
     def add_transition(self, from_state: str, to_state: str, symbol: str):
         """
         Добавление перехода.
         :param from_state: состояние из которого осуществляется переход.
         :param to_state: состояние в которое осуществляется переход.
-        :param symbol: символ по которому осуществляется переход.
+        :param symbol: символ по которому осуществляется переход. Метка из нескольких знаков,
+        записанная как класс символов (см. symbols.parse_label), задаёт множество символов, а не
+        один символ: "[ab]" и "a-b" допускают "a" и "b", "\\n" - перевод строки. Остальные
+        многобуквенные метки, например "ab", по-прежнему считаются отдельными символами.
+        :raise ValueError: если метка в квадратных скобках не является корректным классом символов.
         """
         if from_state not in self._states:
             raise StateNotFoundError(f"{from_state} отсутствует в списке состояний.")
         if to_state not in self._states:
             raise StateNotFoundError(f"{to_state} отсутствует в списке состояний.")
+        _check_labels((symbol,))
 
         if from_state not in self._transitions:
             self._transitions[from_state] = {}
         if symbol not in self._transitions[from_state]:
             self._transitions[from_state][symbol] = set()
         self._transitions[from_state][symbol].add(to_state)
+        self._changed_states.add(from_state)
+        self._frozen = None
+
+    def add_states(self, states: Iterable[str]):
+        """
+        Добавление нескольких состояний. Повторы проверяются один раз для всего набора.
+        :param states: строки-идентификаторы состояний.
+        """
+        new_states = set(states)
+        duplicates = new_states & self._states
+        if duplicates:
+            raise StateAlreadyExists(f"{min(duplicates)} уже есть в списке состояний.")
+        self._states |= new_states
+        self._changed_states |= new_states
+        self._frozen = None
+
+    def add_transitions_bulk(self, edges: Iterable[Tuple[str, str, str]], trusted: bool = False):
+        """
+        Добавление набора переходов.
+        Переходы сначала группируются по состояниям и символам, а затем проверяется, что все
+        их состояния есть в автомате: одной операцией над множествами вместо двух проверок
+        на каждый переход, как в add_transition. Если проверка не пройдена, автомат не изменяется.
+        :param edges: тройки "состояние из которого, состояние в которое, символ".
+        :param trusted: пропустить проверку; вызывающий гарантирует, что все состояния существуют.
+        :raise ValueError: если метка в квадратных скобках не является корректным классом символов.
+        """
+        grouped = _group_edges(edges)
+        if not trusted:
+            unknown = (grouped.keys() | _targets(grouped)) - self._states
+            if unknown:
+                raise StateNotFoundError(f"{min(unknown)} отсутствует в списке состояний.")
+        _check_labels({symbol for moves in grouped.values() for symbol in moves})
+
+        transitions = self._transitions
+        for src, moves in grouped.items():
+            current = transitions.get(src)
+            if current is None:
+                transitions[src] = moves
+                continue
+            for symbol, dst_states in moves.items():
+                current_states = current.get(symbol)
+                if current_states is None:
+                    current[symbol] = dst_states
+                else:
+                    current_states |= dst_states
+        self._changed_states |= grouped.keys()
+        self._frozen = None
+
+    @classmethod
+    def from_edges(cls, name: str, edges: Iterable[Tuple[str, str, str]], start_states: Iterable[str],
+                   final_states: Iterable[str], states: Optional[Iterable[str]] = None,
+                   alphabet: Optional[Iterable[str]] = None, trusted: bool = False) -> "Automaton":
+        """
+        Создание автомата по набору переходов (см. add_transitions_bulk).
+        :param name: название автомата.
+        :param edges: тройки "состояние из которого, состояние в которое, символ".
+        :param start_states: начальные состояния.
+        :param final_states: конечные состояния.
+        :param states: все состояния автомата. По умолчанию - состояния, встречающиеся
+        в переходах, начальные и конечные.
+        :param alphabet: алфавит. По умолчанию - символы переходов, кроме ε.
+        :param trusted: пропустить проверку того, что состояния переходов, начальные и
+        конечные состояния входят в states.
+        :return: новый автомат.
+        :raise ValueError: если метка в квадратных скобках не является корректным классом символов.
+        """
+        grouped = _group_edges(edges)
+        _check_labels({symbol for moves in grouped.values() for symbol in moves})
+        start_states = set(start_states)
+        final_states = set(final_states)
+        if states is None:
+            states = grouped.keys() | _targets(grouped) | start_states | final_states
+        else:
+            states = set(states)
+            if not trusted:
+                unknown = (grouped.keys() | _targets(grouped) | start_states | final_states) - states
+                if unknown:
+                    raise StateNotFoundError(f"{min(unknown)} отсутствует в списке состояний.")
+        if alphabet is None:
+            alphabet = {symbol for moves in grouped.values() for symbol in moves}
+            alphabet.discard("ε")
+        else:
+            alphabet = set(alphabet)
+            _check_labels(alphabet)
+        return cls._from_parts(name, states, start_states, final_states, alphabet, grouped)
+
+    def remove_transition(self, from_state: str, to_state: str, symbol: str):
+        """
+        Удаление перехода.
+        :param from_state: состояние из которого осуществляется переход.
+        :param to_state: состояние в которое осуществляется переход.
+        :param symbol: символ по которому осуществляется переход.
+        """
+        dst_states = self._transitions.get(from_state, {}).get(symbol)
+        if dst_states is None or to_state not in dst_states:
+            raise StateNotFoundError(f"Нет перехода из {from_state} в {to_state} по символу {symbol}.")
+
+        dst_states.remove(to_state)
+        if not dst_states:
+            del self._transitions[from_state][symbol]
+        self._changed_states.add(from_state)
+        self._frozen = None
 
     def set_start_states(self, states: set):
         """
@@ -140,7 +430,45 @@ class Automaton:
         for new_state in states:
             if new_state not in self._states:
                 raise StateNotFoundError(f"\"{new_state}\" нет в списке состояний.")
-            self._start_states.add(new_state)
+            if new_state not in self._start_states:
+                self._start_states.add(new_state)
+                self._changed_states.add(new_state)
+        self._frozen = None
+
+    def remove_start_state(self, state: str):
+        """
+        Исключение состояния из начальных.
+        :param state: строка-идентификатор начального состояния.
+        """
+        if state not in self._start_states:
+            raise StateNotFoundError(f"\"{state}\" нет в списке начальных состояний.")
+        self._start_states.remove(state)
+        self._changed_states.add(state)
+        self._frozen = None
+
+    def add_final_state(self, state: str):
+        """
+        Добавление состояния к конечным без копирования множества конечных состояний.
+        :param state: строка-идентификатор состояния.
+        """
+        if state not in self._states:
+            raise StateNotFoundError(f"\"{state}\" нет в списке состояний.")
+        if state not in self._final_states:
+            self._final_states.add(state)
+            self._changed_states.add(state)
+            self._frozen = None
+
+    def remove_final_state(self, state: str):
+        """
+        Исключение состояния из конечных.
+        :param state: строка-идентификатор состояния.
+        """
+        if state not in self._states:
+            raise StateNotFoundError(f"\"{state}\" нет в списке состояний.")
+        if state in self._final_states:
+            self._final_states.remove(state)
+            self._changed_states.add(state)
+            self._frozen = None
 
     def set_final_states(self, states: set):
         """
@@ -150,14 +478,87 @@ class Automaton:
         for state in states:
             if state not in self._states:
                 raise StateNotFoundError(f"\"{state}\" нет в списке состояний.")
-        self._final_states = states
+        self._changed_states.update(self._final_states ^ set(states))
+        self._final_states = set(states)
+        self._frozen = None
+
+    def trim(self) -> Dict[str, int]:
+        """
+        Удаление состояний, недостижимых из начальных, и состояний, из которых недостижимо
+        ни одно конечное, вместе с переходами в них. Начальные состояния не удаляются.
+        Для обратного обхода строится индекс переходов в каждое состояние, поэтому время
+        работы линейно относительно числа состояний и переходов.
+        :return: словарь с числом удалённых недостижимых (unreachable) и тупиковых (dead) состояний.
+        """
+        reachable = set(self._start_states)
+        stack = list(reachable)
+        while stack:
+            for dst_states in self._transitions.get(stack.pop(), {}).values():
+                for dst in dst_states:
+                    if dst not in reachable:
+                        reachable.add(dst)
+                        stack.append(dst)
+
+        # predecessors[state] - состояния, из которых есть переходы в state
+        predecessors: Dict[str, Set[str]] = {}
+        for src in reachable:
+            for dst_states in self._transitions.get(src, {}).values():
+                for dst in dst_states:
+                    predecessors.setdefault(dst, set()).add(src)
+
+        useful = self._final_states & reachable
+        stack = list(useful)
+        while stack:
+            for src in predecessors.get(stack.pop(), ()):
+                if src not in useful:
+                    useful.add(src)
+                    stack.append(src)
+
+        kept = useful | self._start_states
+        removed = self._states - kept
+        if not removed:
+            return {"unreachable": 0, "dead": 0}
+
+        unreachable = len(self._states) - len(reachable)
+        for state in removed:
+            self._transitions.pop(state, None)
+        affected = {src for state in removed for src in predecessors.get(state, ()) if src in kept}
+        for src in affected:
+            transitions = {symbol: dst_states & kept for symbol, dst_states in self._transitions[src].items()}
+            self._transitions[src] = {symbol: dst_states for symbol, dst_states in transitions.items() if dst_states}
+        self._states = kept
+        self._final_states = self._final_states & kept
+        self._tags = {state: tags for state, tags in self._tags.items() if state in kept}
+        self._changed_states.update(removed | affected)
+        self._frozen = None
+        return {"unreachable": unreachable, "dead": len(removed) - unreachable}
+
+    def copy(self) -> "Automaton":
+        """
+        Получение копии автомата с тем же журналом изменений.
+        :return: новый автомат.
+        """
+        automaton = Automaton(self._name)
+        automaton._states = set(self._states)
+        automaton._start_states = set(self._start_states)
+        automaton._final_states = set(self._final_states)
+        automaton._transitions = {state: {symbol: set(dst_states) for symbol, dst_states in transitions.items()}
+                                  for state, transitions in self._transitions.items()}
+        automaton._alphabet = set(self._alphabet)
+        automaton._tags = dict(self._tags)
+        automaton._changed_states = set(self._changed_states)
+        return automaton
 
     def set_alphabet(self, alphabet: set):
         """
         Указание используемого в автомате алфавита.
         :param alphabet: множество символов алфавита.
+        :raise ValueError: если метка в квадратных скобках не является корректным классом символов.
         """
+        alphabet = set(alphabet)
+        _check_labels(alphabet)
         self._alphabet = alphabet
+        self._frozen = None
 
     def __repr__(self) -> str:
         """
@@ -171,105 +572,1379 @@ class Automaton:
                f"Transitions: {self._transitions}"
 
 
-def nfa_to_dfa(nfa: Automaton) -> Automaton:
+def _group_edges(edges: Iterable[Tuple[str, str, str]]) -> Dict[str, Dict[str, Set[str]]]:
+    """
+    Группировка переходов в словарь "состояние - символ - множество состояний".
+    """
+    # Группировка по парам "состояние, символ" в одном словаре быстрее, чем по вложенным словарям
+    pairs: Dict[Tuple[str, str], Set[str]] = defaultdict(set)
+    for src, dst, symbol in edges:
+        pairs[src, symbol].add(dst)
+
+    grouped: Dict[str, Dict[str, Set[str]]] = {}
+    for (src, symbol), dst_states in pairs.items():
+        moves = grouped.get(src)
+        if moves is None:
+            moves = grouped[src] = {}
+        moves[symbol] = dst_states
+    return grouped
+
+
+def _targets(grouped: Dict[str, Dict[str, Set[str]]]) -> Set[str]:
+    """
+    Множество состояний, в которые ведут сгруппированные переходы.
+    """
+    return set().union(*(dst_states for moves in grouped.values() for dst_states in moves.values()))
+
+
+def _check_labels(labels: Iterable[str]):
+    """
+    Проверка меток переходов: метка в квадратных скобках должна быть корректным классом символов,
+    иначе nfa_to_dfa считал бы её отдельным символом, а readwrite.read - ошибкой.
+    :raise ValueError: если класс символов записан некорректно.
+    """
+    for label in labels:
+        if len(label) > 2:
+            parse_label(label)
+
+
+class FrozenAutomaton:
+    """
+    Компактное неизменяемое представление автомата.
+    Состояния и символы пронумерованы плотными целыми числами в порядке сортировки их
+    идентификаторов, а переходы хранятся в массивах в формате CSR: переходы из состояния
+    state по символу symbol - это targets[offsets[state * len(symbols) + symbol]:
+    offsets[state * len(symbols) + symbol + 1]]. ε-переходы хранятся отдельно в
+    eps_offsets/eps_targets с одной строкой на состояние. Символ ε в symbols не входит.
+    Если среди меток переходов есть классы символов ([a-z], \\x00-\\x7f), то symbols -
+    наименьшее разбиение всех меток на непересекающиеся классы (см. symbols.partition).
+    Метки состояний (см. Automaton.set_tags) хранятся в словаре tags только для конечных состояний.
+    Атрибуты объекта предназначены только для чтения.
+    """
+
+    def __init__(self, name: str, states: List[str], symbols: List[str], alphabet: Sequence[int],
+                 start_states: Sequence[int], final: Sequence[int],
+                 offsets: Sequence[int], targets: Sequence[int],
+                 eps_offsets: Sequence[int], eps_targets: Sequence[int],
+                 tags: Optional[Dict[int, FrozenSet[str]]] = None):
+        """
+        Инициализация компактного автомата из готовых массивов.
+        :param name: название автомата.
+        :param states: строки-идентификаторы состояний в порядке их номеров.
+        :param symbols: символы переходов в порядке их номеров.
+        :param alphabet: номера символов, входящих в алфавит автомата.
+        :param start_states: номера начальных состояний.
+        :param final: признаки конечности состояний (1 - конечное, 0 - нет).
+        :param offsets: смещения переходов для каждой пары "состояние, символ".
+        :param targets: номера состояний, в которые ведут переходы.
+        :param eps_offsets: смещения ε-переходов для каждого состояния.
+        :param eps_targets: номера состояний, в которые ведут ε-переходы.
+        :param tags: непустые множества меток конечных состояний по их номерам.
+        """
+        self.name = name
+        self.states = states
+        self.symbols = symbols
+        self.alphabet = alphabet
+        self.start_states = start_states
+        self.final = final
+        self.offsets = offsets
+        self.targets = targets
+        self.eps_offsets = eps_offsets
+        self.eps_targets = eps_targets
+        self.tags: Dict[int, FrozenSet[str]] = tags or {}
+        self._state_index: Optional[Dict[str, int]] = None
+        self._symbol_index: Optional[Dict[str, int]] = None
+        self._class_index: Optional[ClassIndex] = None
+
+    @property
+    def state_index(self) -> Dict[str, int]:
+        """
+        Номера состояний по их идентификаторам. Словарь строится при первом обращении,
+        чтобы загрузка большого автомата (см. binary.load) не тратила время на его построение.
+        """
+        if self._state_index is None:
+            self._state_index = {state: i for i, state in enumerate(self.states)}
+        return self._state_index
+
+    @property
+    def symbol_index(self) -> Dict[str, int]:
+        """
+        Номера символов переходов. Словарь строится при первом обращении.
+        """
+        if self._symbol_index is None:
+            self._symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self._symbol_index
+
+    @classmethod
+    def from_automaton(cls, automaton: Automaton) -> "FrozenAutomaton":
+        """
+        Построение компактного представления по автомату.
+        :param automaton: исходный автомат.
+        :return: компактный автомат.
+        """
+        states = sorted(automaton.get_states())
+        state_index = {state: i for i, state in enumerate(states)}
+        used_symbols = set(automaton.get_alphabet())
+        for transitions in automaton.get_all_transitions().values():
+            used_symbols.update(transitions)
+        used_symbols.discard("ε")
+
+        if any(is_class_label(symbol) for symbol in used_symbols):
+            # Метки-классы разбиваются на непересекающиеся классы символов,
+            # и переход по метке заменяется переходами по каждому из её классов
+            symbols, members = partition(used_symbols)
+        else:
+            symbols = sorted(used_symbols)
+            members = {symbol: [i] for i, symbol in enumerate(symbols)}
+        alphabet = array(INDEX_TYPECODE, sorted({i for symbol in automaton.get_alphabet() if symbol != "ε"
+                                                 for i in members[symbol]}))
+
+        offsets = array(INDEX_TYPECODE, [0])
+        targets = array(INDEX_TYPECODE)
+        eps_offsets = array(INDEX_TYPECODE, [0])
+        eps_targets = array(INDEX_TYPECODE)
+        for state in states:
+            transitions = automaton.get_transitions_from(state)
+            cells: Dict[int, Set[int]] = {}
+            for symbol, dst_states in transitions.items():
+                if symbol != "ε" and dst_states:
+                    for symbol_id in members[symbol]:
+                        cells.setdefault(symbol_id, set()).update(state_index[dst] for dst in dst_states)
+            for symbol_id in range(len(symbols)):
+                dst_ids = cells.get(symbol_id)
+                if dst_ids:
+                    targets.extend(sorted(dst_ids))
+                offsets.append(len(targets))
+            eps_targets.extend(sorted(state_index[dst] for dst in transitions.get("ε", ())))
+            eps_offsets.append(len(eps_targets))
+
+        start_states = array(INDEX_TYPECODE, sorted(state_index[state] for state in automaton.get_start_states()))
+        final_states = automaton.get_final_states()
+        final = bytes(1 if state in final_states else 0 for state in states)
+        tags = {state_index[state]: state_tags for state, state_tags in automaton.get_tags().items()
+                if state in final_states}
+
+        return cls(automaton.get_name(), states, symbols, alphabet, start_states, final,
+                   offsets, targets, eps_offsets, eps_targets, tags)
+
+    def find_symbol(self, char: str) -> int:
+        """
+        Поиск символа перехода, которому соответствует символ входного слова.
+        Символ переходов может быть классом символов (например, [a-z]), если
+        автомат построен по переходам с метками-классами.
+        :param char: символ входного слова.
+        :return: номер символа перехода или -1, если переходов по символу нет.
+        """
+        symbol = self.symbol_index.get(char)
+        if symbol is not None:
+            return symbol
+        if self._class_index is None:
+            self._class_index = ClassIndex(self.symbols)
+        return self._class_index.find(char)
+
+    def successors(self, state: int, symbol: int) -> Sequence[int]:
+        """
+        Получение состояний, в которые ведут переходы из указанного состояния по символу.
+        :param state: номер состояния.
+        :param symbol: номер символа.
+        :return: номера состояний.
+        """
+        position = state * len(self.symbols) + symbol
+        return self.targets[self.offsets[position]:self.offsets[position + 1]]
+
+    def epsilon_successors(self, state: int) -> Sequence[int]:
+        """
+        Получение состояний, в которые ведут ε-переходы из указанного состояния.
+        :param state: номер состояния.
+        :return: номера состояний.
+        """
+        return self.eps_targets[self.eps_offsets[state]:self.eps_offsets[state + 1]]
+
+    def transition_count(self) -> int:
+        """
+        Получение количества переходов автомата, включая ε-переходы.
+        :return: количество переходов.
+        """
+        return len(self.targets) + len(self.eps_targets)
+
+    def get_type(self) -> AutomatonType:
+        """
+        Получение типа автомата.
+        :return: тип автомата, определяемый так же, как в Automaton.get_type.
+        """
+        if len(self.eps_targets) > 0:
+            return AutomatonType.eNFA
+        offsets = self.offsets
+        for position in range(len(offsets) - 1):
+            if offsets[position + 1] - offsets[position] >= 2:
+                return AutomatonType.NFA
+        return AutomatonType.DFA
+
+    def freeze(self) -> "FrozenAutomaton":
+        """
+        Получение компактного представления, для совместимости с Automaton.freeze.
+        :return: сам объект.
+        """
+        return self
+
+    def to_automaton(self) -> Automaton:
+        """
+        Восстановление обычного автомата по компактному представлению.
+        :return: новый автомат.
+        """
+        states = self.states
+        symbols = self.symbols
+        edges = []
+        for state_id, state in enumerate(states):
+            for symbol_id, symbol in enumerate(symbols):
+                edges.extend((state, states[dst], symbol) for dst in self.successors(state_id, symbol_id))
+            edges.extend((state, states[dst], "ε") for dst in self.epsilon_successors(state_id))
+        automaton = Automaton.from_edges(self.name, edges,
+                                         start_states={states[state] for state in self.start_states},
+                                         final_states={state for state, final in zip(states, self.final) if final},
+                                         states=states, alphabet={symbols[symbol] for symbol in self.alphabet},
+                                         trusted=True)
+        automaton._tags = {states[state]: state_tags for state, state_tags in self.tags.items()}
+        return automaton
+
+
+def alphabetic_names(index: int) -> str:
+    """
+    Именование состояний как столбцов электронной таблицы: A, B, ..., Z, AA, AB, ...
+    :param index: номер состояния, начиная с нуля.
+    :return: идентификатор состояния.
+    """
+    name = ""
+    index += 1
+    while index > 0:
+        index, remainder = divmod(index - 1, 26)
+        name = chr(ord("A") + remainder) + name
+    return name
+
+
+def numeric_names(index: int) -> str:
+    """
+    Именование состояний их номерами: 0, 1, 2, ...
+    :param index: номер состояния, начиная с нуля.
+    :return: идентификатор состояния.
+    """
+    return str(index)
+
+
+class SubsetMap:
+    """
+    Соответствие состояний ДКА множествам состояний НКА, из которых они построены.
+    Сами множества не хранятся: для каждого состояния ДКА запоминается только
+    состояние-родитель и символ, по которому оно было впервые достигнуто, а множество
+    восстанавливается по запросу повторением этого пути на исходном НКА.
+    """
+
+    def __init__(self, nfa: FrozenAutomaton, names: List[str], parents: Sequence[int], symbols: Sequence[int]):
+        """
+        Инициализация соответствия.
+        :param nfa: исходный НКА в компактном представлении.
+        :param names: идентификаторы состояний ДКА в порядке их номеров.
+        :param parents: номера состояний-родителей (-1 для начального состояния).
+        :param symbols: номера символов переходов из родителей.
+        """
+        self._nfa = nfa
+        self._index = {name: i for i, name in enumerate(names)}
+        self._parents = parents
+        self._symbols = symbols
+        self._closures: Optional[_EpsilonClosures] = None
+
+    def get_subset(self, state: str) -> FrozenSet[str]:
+        """
+        Получение множества состояний НКА, соответствующего состоянию ДКА.
+        :param state: строка-идентификатор состояния ДКА.
+        :return: неизменяемое множество строк-идентификаторов состояний НКА.
+        """
+        if state not in self._index:
+            raise StateNotFoundError(f"\"{state}\" нет в списке состояний.")
+        if self._closures is None:
+            self._closures = _EpsilonClosures(self._nfa)
+
+        path = []
+        current = self._index[state]
+        while self._parents[current] != -1:
+            path.append(self._symbols[current])
+            current = self._parents[current]
+
+        subset = _epsilon_set_closure(self._closures, self._nfa.start_states)
+        for symbol in reversed(path):
+            subset = _epsilon_set_closure(self._closures, _nfa_moves(self._nfa, subset, symbol))
+        return frozenset(self._nfa.states[nfa_state] for nfa_state in subset)
+
+
+def nfa_to_dfa(nfa: Automaton, engine: str = "sets", minimize: bool = False,
+               naming: Callable[[int], str] = alphabetic_names, keep_subsets: bool = False,
+               workers: Optional[int] = 1, stats: Optional[ConversionStats] = None,
+               progress: Optional[Callable[[ConversionStats], None]] = None, progress_interval: int = 1000,
+               max_states: Optional[int] = None, time_limit: Optional[float] = None,
+               trim: bool = False) -> Automaton:
     """
     Получение по заданному недетерминированному автомату эквивалентного
     детерминированного. Использован алгоритм описанный в следующем документе:
     http://web.cecs.pdx.edu/~harry/compilers/slides/LexicalPart3.pdf
+    Построение ведётся на компактном представлении автомата, символы алфавита
+    перебираются в порядке сортировки, поэтому результат детерминирован.
+    Метки переходов, записанные как классы символов ("[a-z]", "a-z", "\\x41", "\\n"), задают
+    множества символов и перед построением разбиваются на непересекающиеся классы (см.
+    symbols.partition). Такие метки, добавленные через API, больше не считаются отдельными
+    непрозрачными символами: алфавит ДКА состоит из меток получившихся классов.
     :param nfa: недетерминированный автомат.
+    :param engine: способ построения: "sets" - множества состояний хранятся как frozenset,
+    "bitset" - как битовые множества с заранее вычисленными переходами по каждому символу.
+    Оба способа строят одинаковые автоматы. "bitset" быстрее на автоматах с большими
+    ε-замыканиями и плотными множествами состояний (в benchmarks.run: в 3-4 раза на
+    random_enfa_120, в 7-8 раз на search_350 из 10 тысяч состояний, в десятки раз на
+    цепочках ε-переходов), на больших автоматах с небольшими разреженными множествами
+    (thompson_sparse_1500, 42 тысячи состояний) способы сравнимы по скорости.
+    :param minimize: минимизировать ли полученный автомат.
+    :param naming: функция, сопоставляющая номеру состояния ДКА (в порядке обнаружения)
+    его уникальный идентификатор, например alphabetic_names или numeric_names.
+    :param keep_subsets: сохранить ли в результате соответствие состояний ДКА
+    множествам состояний НКА (см. Automaton.get_subset_map). Несовместимо с minimize:
+    состояние минимального ДКА соответствует объединению нескольких множеств.
+    :param workers: число процессов, между которыми распределяется обработка очередного
+    уровня обхода в ширину (None - число процессоров для способа "bitset" и один процесс
+    для остальных). Несколько процессов поддерживаются только способом "bitset",
+    результат не зависит от числа процессов.
+    :param stats: объект, в который записывается статистика построения.
+    :param progress: функция, вызываемая со статистикой после обработки каждых
+    progress_interval состояний ДКА.
+    :param progress_interval: число состояний ДКА между вызовами progress.
+    :param max_states: наибольшее допустимое число состояний ДКА.
+    :param time_limit: наибольшее допустимое время построения в секундах.
+    Ограничения проверяются после обработки каждого состояния ДКА (при нескольких
+    процессах - каждого уровня обхода), при их превышении построение прерывается
+    исключением ConversionAborted, содержащим статистику на момент прерывания.
+    :param trim: удалить ли перед построением недостижимые и тупиковые состояния НКА
+    (см. Automaton.trim). Исходный автомат не изменяется, а множества состояний ДКА
+    и их число становятся меньше.
+    Если у конечных состояний НКА есть метки (см. Automaton.set_tags), то конечное состояние ДКА
+    помечается объединением меток входящих в него конечных состояний НКА.
     :return: эквивалентный детерминированный автомат.
     """
-    dfa_transitions: Dict[FrozenSet[str], Dict[str, FrozenSet[str]]] = {}
-    dfa_states: Dict[FrozenSet[str], str] = {}
-    unmarked_states = Queue()
-
-    state_mark = "A"
-    eps_closure_start = frozenset(_epsilon_set_closure(nfa, frozenset(nfa.get_start_states())))
-    dfa_states[eps_closure_start] = state_mark
-    unmarked_states.put(eps_closure_start)
-
-    new_alphabet: Set[str] = set()
-    while not unmarked_states.empty():
-        current_dfa_state = unmarked_states.get()
-        dfa_transitions[current_dfa_state] = {}
-        for symbol in nfa.get_alphabet():
-            next_dfa_state = _epsilon_set_closure(nfa, _nfa_moves(nfa, current_dfa_state, symbol))
+    if engine not in ENGINES:
+        raise ValueError(f"Неизвестный способ построения ДКА: \"{engine}\".")
+    if workers is None:
+        workers = (os.cpu_count() or 1) if engine == "bitset" else 1
+    if workers < 1:
+        raise ValueError("Число процессов должно быть положительным.")
+    if workers > 1 and engine != "bitset":
+        raise ValueError(f"Способ построения \"{engine}\" не поддерживает несколько процессов.")
+    if progress_interval < 1:
+        raise ValueError("Интервал вызова progress должен быть положительным.")
+    if keep_subsets and minimize:
+        raise ValueError("Соответствие множествам состояний НКА не сохраняется при минимизации.")
+
+    monitor = None
+    if stats is not None or progress is not None or max_states is not None or time_limit is not None:
+        monitor = _ConversionMonitor(stats or ConversionStats(), progress, progress_interval, max_states, time_limit)
+        monitor.stats.engine = engine
+
+    if trim:
+        nfa = nfa.copy()
+        removed = nfa.trim()
+        if monitor is not None:
+            monitor.stats.unreachable_states = removed["unreachable"]
+            monitor.stats.dead_states = removed["dead"]
+
+    closure_started = time.perf_counter()
+    frozen = nfa.freeze()
+    # ε-замыкания всех состояний вычисляются один раз до начала построения
+    closures = _EpsilonClosures(frozen)
+    if monitor is not None:
+        monitor.stats.closure_time += time.perf_counter() - closure_started
+    if workers > 1:
+        final, transitions = _subset_construction_frontier(frozen, closures, workers, monitor)
+    else:
+        final, transitions = ENGINES[engine](frozen, closures, monitor)
+    build_started = time.perf_counter()
+
+    # Группе состояний из НКА присваивается новый идентификатор и добавляется в ДКА
+    state_marks = [naming(i) for i in range(len(final))]
+    symbols = frozen.symbols
+    dfa = Automaton.from_edges("DFA", ((state_marks[src], state_marks[dst], symbols[symbol])
+                                       for src, moves in enumerate(transitions) for symbol, dst in moves),
+                               start_states={state_marks[0]},
+                               final_states={state_mark for state_mark, final_states in zip(state_marks, final)
+                                             if final_states},
+                               states=state_marks, trusted=True)
+    if frozen.tags:
+        dfa._tags = _dfa_tags(frozen, state_marks, final)
+
+    subset_map = _build_subset_map(frozen, state_marks, transitions) if keep_subsets else None
+    if minimize:
+        dfa = _hopcroft_minimize(dfa)
+        if monitor is not None:
+            monitor.stats.minimized_states = len(dfa.get_states())
+    dfa._subset_map = subset_map
+    if monitor is not None:
+        monitor.stats.build_time = time.perf_counter() - build_started
+        monitor.finish()
+    return dfa
+
+
+def _dfa_tags(nfa: FrozenAutomaton, names: List[str], final: List[Tuple[int, ...]]) -> Dict[str, FrozenSet[str]]:
+    """
+    Вычисление меток состояний ДКА. Метки вычисляются один раз для каждого
+    различного множества конечных состояний НКА.
+    :param nfa: исходный НКА в компактном представлении.
+    :param names: идентификаторы состояний ДКА.
+    :param final: номера конечных состояний НКА в каждом состоянии ДКА в порядке возрастания.
+    :return: непустые множества меток по идентификаторам состояний ДКА.
+    """
+    known: Dict[Tuple[int, ...], FrozenSet[str]] = {(): frozenset()}
+    tags = {}
+    for name, final_states in zip(names, final):
+        state_tags = known.get(final_states)
+        if state_tags is None:
+            state_tags = frozenset().union(*(nfa.tags.get(state, ()) for state in final_states))
+            known[final_states] = state_tags
+        if state_tags:
+            tags[name] = state_tags
+    return tags
+
+
+def _build_subset_map(nfa: FrozenAutomaton, names: List[str], transitions: List[List[Tuple[int, int]]]) -> SubsetMap:
+    """
+    Построение соответствия состояний ДКА множествам состояний НКА.
+    Состояния ДКА пронумерованы в порядке обнаружения при обходе в ширину, поэтому
+    первый в порядке обхода переход в состояние - это переход по дереву обхода.
+    :param nfa: исходный НКА в компактном представлении.
+    :param names: идентификаторы состояний ДКА.
+    :param transitions: списки переходов из каждого состояния ДКА.
+    :return: соответствие состояний.
+    """
+    parents = array(INDEX_TYPECODE, [-1] * len(names))
+    symbols = array(INDEX_TYPECODE, [-1] * len(names))
+    for src, moves in enumerate(transitions):
+        for symbol, dst in moves:
+            if dst != 0 and parents[dst] == -1:
+                parents[dst] = src
+                symbols[dst] = symbol
+    return SubsetMap(nfa, names, parents, symbols)
+
+
+def minimize(dfa: Automaton) -> Automaton:
+    """
+    Получение минимального детерминированного автомата, эквивалентного заданному.
+    Недостижимые и тупиковые состояния в результат не попадают, каждое состояние
+    результата сохраняет идентификатор одного из состояний своего класса эквивалентности.
+    Конечные состояния с разными метками (см. Automaton.set_tags) не объединяются.
+    :param dfa: детерминированный автомат с не более чем одним начальным состоянием.
+    :return: минимальный детерминированный автомат.
+    """
+    return _hopcroft_minimize(dfa)
+
+
+def epsilon_closures(nfa: FrozenAutomaton) -> List[Tuple[int, int]]:
+    """
+    Получение ε-замыканий всех состояний автомата в виде битовых множеств со сдвигом
+    (см. shifted_union). Замыкание множества состояний - объединение замыканий его элементов.
+    :param nfa: автомат в компактном представлении.
+    :return: ε-замыкания состояний в порядке их номеров.
+    """
+    return _EpsilonClosures(nfa).shifted
+
+
+def shifted_union(masks: Sequence[Tuple[int, int]]) -> Tuple[int, int]:
+    """
+    Объединение битовых множеств со сдвигом. Множество номеров состояний хранится как пара
+    "сдвиг, битовое множество", где i-й бит числа соответствует состоянию с номером
+    сдвиг + i. Размер числа определяется разбросом номеров, а не числом состояний автомата.
+    Если наименьший бит каждого множества установлен, то и у объединения сдвиг равен
+    наименьшему номеру, поэтому одинаковые множества имеют одинаковое представление.
+    :param masks: пары "сдвиг, битовое множество".
+    :return: объединение; для пустой последовательности - пустое множество (0, 0).
+    """
+    if not masks:
+        return 0, 0
+    base = min(move_base for move_base, _ in masks)
+    bits = 0
+    for move_base, mask in masks:
+        bits |= mask << (move_base - base)
+    return base, bits
+
+
+def shifted_members(mask: Tuple[int, int]) -> List[int]:
+    """
+    Получение номеров состояний, входящих в битовое множество со сдвигом (см. shifted_union).
+    :param mask: пара "сдвиг, битовое множество".
+    :return: номера состояний в порядке возрастания.
+    """
+    base, bits = mask
+    return [base + state for state in _mask_to_list(bits)]
+
+
+def _hopcroft_minimize(dfa: Automaton) -> Automaton:
+    """
+    Минимизация ДКА алгоритмом Хопкрофта за O(n log n) на каждый символ алфавита.
+    Автомат дополняется неявным поглощающим состоянием, после чего разбиение
+    "конечные / не конечные" уточняется по обратным переходам. Конечные состояния
+    с разными метками изначально попадают в разные блоки.
+    :param dfa: детерминированный автомат.
+    :return: минимальный детерминированный автомат.
+    """
+    frozen = dfa.freeze()
+    if frozen.get_type() != AutomatonType.DFA or len(frozen.start_states) > 1:
+        raise NotDeterministicError("Минимизировать можно только детерминированный автомат.")
+
+    states = frozen.states
+    width = len(frozen.symbols)
+    offsets = frozen.offsets
+    targets = frozen.targets
+
+    minimal = Automaton(frozen.name)
+    minimal.set_alphabet(dfa.get_alphabet())
+    if len(frozen.start_states) == 0:
+        return minimal
+
+    # Нумерация достижимых состояний в порядке обхода в ширину, последний номер - поглощающее состояние
+    start = frozen.start_states[0]
+    reachable = [start]
+    local_index = {start: 0}
+    for state in reachable:
+        for cell in range(state * width, state * width + width):
+            if offsets[cell] != offsets[cell + 1]:
+                dst = targets[offsets[cell]]
+                if dst not in local_index:
+                    local_index[dst] = len(reachable)
+                    reachable.append(dst)
+    sink = len(reachable)
+
+    # inverse[symbol][state] - состояния, из которых по символу symbol есть переход в state
+    inverse: List[Dict[int, List[int]]] = [{} for _ in range(width)]
+    for src, state in enumerate(reachable):
+        for symbol in range(width):
+            cell = state * width + symbol
+            dst = local_index[targets[offsets[cell]]] if offsets[cell] != offsets[cell + 1] else sink
+            inverse[symbol].setdefault(dst, []).append(src)
+    for symbol in range(width):
+        inverse[symbol].setdefault(sink, []).append(sink)
+
+    # Конечные состояния разбиваются по меткам, без меток - один блок
+    final_blocks: Dict[FrozenSet[str], List[int]] = {}
+    for src, state in enumerate(reachable):
+        if frozen.final[state]:
+            final_blocks.setdefault(frozen.tags.get(state, frozenset()), []).append(src)
+    other_block = [src for src, state in enumerate(reachable) if not frozen.final[state]] + [sink]
+    blocks: List[Set[int]] = [set(block) for block in (*final_blocks.values(), other_block) if block]
+    block_of = [0] * (sink + 1)
+    for block_id, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = block_id
+
+    # Разбиение уточняется по всем начальным блокам, кроме наибольшего
+    largest = max(reversed(range(len(blocks))), key=lambda block_id: len(blocks[block_id]))
+    pending = [(block_id, symbol) for block_id in range(len(blocks)) if block_id != largest
+               for symbol in range(width)]
+    in_pending = set(pending)
+    while pending:
+        splitter = pending.pop()
+        in_pending.discard(splitter)
+        block_id, symbol = splitter
+
+        predecessors: Dict[int, List[int]] = {}
+        symbol_inverse = inverse[symbol]
+        for state in list(blocks[block_id]):
+            for src in symbol_inverse.get(state, ()):
+                predecessors.setdefault(block_of[src], []).append(src)
+
+        for split_id, moved in predecessors.items():
+            block = blocks[split_id]
+            if len(moved) == len(block):
+                continue
+            new_block = set(moved)
+            block -= new_block
+            new_id = len(blocks)
+            blocks.append(new_block)
+            for state in new_block:
+                block_of[state] = new_id
+            for pending_symbol in range(width):
+                if (split_id, pending_symbol) in in_pending:
+                    added = (new_id, pending_symbol)
+                elif len(new_block) < len(block):
+                    added = (new_id, pending_symbol)
+                else:
+                    added = (split_id, pending_symbol)
+                if added not in in_pending:
+                    in_pending.add(added)
+                    pending.append(added)
+
+    # Класс поглощающего состояния содержит все тупиковые состояния и в результат не входит
+    sink_block = block_of[sink]
+    names: Dict[int, str] = {}
+    for src, state in enumerate(reachable):
+        block_id = block_of[src]
+        if block_id != sink_block and block_id not in names:
+            names[block_id] = states[state]
+
+    if block_of[0] == sink_block:
+        minimal.add_state(states[start])
+        minimal.set_start_states({states[start]})
+        return minimal
+
+    final_states = set()
+    tags = {}
+    for src, state in enumerate(reachable):
+        block_id = block_of[src]
+        if names.get(block_id) != states[state]:
+            continue
+        minimal.add_state(states[state])
+        if frozen.final[state]:
+            final_states.add(states[state])
+            if state in frozen.tags:
+                tags[states[state]] = frozen.tags[state]
+    for src, state in enumerate(reachable):
+        block_id = block_of[src]
+        if names.get(block_id) != states[state]:
+            continue
+        for symbol in range(width):
+            cell = state * width + symbol
+            if offsets[cell] == offsets[cell + 1]:
+                continue
+            dst_block = block_of[local_index[targets[offsets[cell]]]]
+            if dst_block != sink_block:
+                minimal.add_transition(states[state], names[dst_block], frozen.symbols[symbol])
+
+    minimal.set_start_states({names[block_of[0]]})
+    minimal.set_final_states(final_states)
+    minimal.set_tags(tags)
+    _logger.debug("Минимизация автомата %s: %d -> %d состояний.", frozen.name, len(states), len(names))
+    return minimal
+
+
+class _ConversionMonitor:
+    """
+    Сбор статистики построения ДКА и проверка ограничений.
+    """
+
+    def __init__(self, stats: ConversionStats, progress: Optional[Callable[[ConversionStats], None]],
+                 progress_interval: int, max_states: Optional[int], time_limit: Optional[float]):
+        self.stats = stats
+        self.started = time.perf_counter()
+        self._progress = progress
+        self._progress_interval = progress_interval
+        self._next_progress = progress_interval
+        self._max_states = max_states
+        self._deadline = None if time_limit is None else self.started + time_limit
+
+    def expanded(self, processed: int, dfa_states: int, queue_depth: int, subset_size: int, hits: int):
+        """
+        Учёт обработки одного или нескольких состояний ДКА.
+        :param processed: число обработанных состояний.
+        :param dfa_states: общее число обнаруженных состояний ДКА.
+        :param queue_depth: число ещё не обработанных состояний.
+        :param subset_size: наибольшее число состояний НКА в обработанных состояниях.
+        :param hits: число переходов в уже известные состояния.
+        """
+        stats = self.stats
+        stats.processed_states += processed
+        stats.dfa_states = dfa_states
+        stats.queue_depth = queue_depth
+        stats.max_queue_depth = max(stats.max_queue_depth, queue_depth)
+        stats.peak_subset_size = max(stats.peak_subset_size, subset_size)
+        stats.subset_hits += hits
+
+        now = time.perf_counter()
+        stats.elapsed = now - self.started
+        if self._max_states is not None and dfa_states > self._max_states:
+            raise ConversionAborted(f"Превышено наибольшее число состояний ДКА: {self._max_states}.", stats)
+        if self._deadline is not None and now > self._deadline:
+            raise ConversionAborted(f"Превышено время построения ДКА: {stats.elapsed:.3f} с.", stats)
+        if self._progress is not None and stats.processed_states >= self._next_progress:
+            self._next_progress = stats.processed_states + self._progress_interval
+            self._progress(stats)
+
+    def finish(self):
+        """
+        Завершение сбора статистики.
+        """
+        self.stats.elapsed = time.perf_counter() - self.started
+
+
+def _subset_construction_sets(nfa: FrozenAutomaton, closures: "_EpsilonClosures",
+                              monitor: Optional[_ConversionMonitor] = None) \
+        -> Tuple[List[Tuple[int, ...]], List[List[Tuple[int, int]]]]:
+    """
+    Построение подмножеств, в котором состояния ДКА - неизменяемые множества номеров состояний НКА.
+    :param nfa: недетерминированный автомат в компактном представлении.
+    :param closures: таблица ε-замыканий состояний автомата.
+    :param monitor: сбор статистики и проверка ограничений.
+    :return: номера конечных состояний НКА, входящих в состояния ДКА, в порядке возрастания
+    (для каждого состояния ДКА в порядке обнаружения; непустой набор - состояние конечное) и
+    списки переходов "номер символа, номер состояния ДКА" из каждого состояния.
+    """
+    dfa_transitions: Dict[FrozenSet[int], List[Tuple[int, int]]] = {}
+    dfa_states: Dict[FrozenSet[int], int] = {}
+    unmarked_states = deque()
+
+    eps_closure_start = _epsilon_set_closure(closures, nfa.start_states)
+    dfa_states[eps_closure_start] = 0
+    unmarked_states.append(eps_closure_start)
+
+    while unmarked_states:
+        current_dfa_state = unmarked_states.popleft()
+        dfa_transitions[current_dfa_state] = []
+        known_states = len(dfa_states)
+        for symbol in nfa.alphabet:
+            if monitor is None:
+                next_dfa_state = _epsilon_set_closure(closures, _nfa_moves(nfa, current_dfa_state, symbol))
+            else:
+                started = time.perf_counter()
+                moves = _nfa_moves(nfa, current_dfa_state, symbol)
+                moved = time.perf_counter()
+                next_dfa_state = _epsilon_set_closure(closures, moves)
+                monitor.stats.moves_time += moved - started
+                monitor.stats.closure_time += time.perf_counter() - moved
             if len(next_dfa_state) > 0:
                 if next_dfa_state not in dfa_states:
-                    state_mark = chr(ord(state_mark) + 1)
-                    dfa_states[next_dfa_state] = state_mark
-                    unmarked_states.put(next_dfa_state)
-                dfa_transitions[current_dfa_state][symbol] = next_dfa_state
-                new_alphabet.add(symbol)
+                    dfa_states[next_dfa_state] = len(dfa_states)
+                    unmarked_states.append(next_dfa_state)
+                dfa_transitions[current_dfa_state].append((symbol, dfa_states[next_dfa_state]))
+        if monitor is not None:
+            hits = len(dfa_transitions[current_dfa_state]) - (len(dfa_states) - known_states)
+            monitor.expanded(1, len(dfa_states), len(unmarked_states), len(current_dfa_state), hits)
 
-    dfa = Automaton("DFA")
-    final_states = set()
-    for dfa_state in dfa_states:
-        # Группе состояний из НКА присваивается новый идентификатор и добавляется в ДКА
-        dfa.add_state(dfa_states[dfa_state])
-
-        # Если хотя бы одно состояние из НКА было конечным,
-        # то новое соответствующее состояние ДКА также будет конечным.
-        for nfa_state in dfa_state:
-            if nfa_state in nfa.get_final_states():
-                final_states.add(dfa_states[dfa_state])
-                break
-
-    for dfa_state in dfa_states:
-        for symbol, dst in dfa_transitions[dfa_state].items():
-            from_state_mark = dfa_states[dfa_state]
-            to_state_mark = dfa_states[dst]
-            dfa.add_transition(from_state_mark, to_state_mark, symbol)
-
-    dfa.set_start_states({"A"})
-    dfa.set_final_states(final_states)
-    dfa.set_alphabet(new_alphabet)
+    # Если хотя бы одно состояние из НКА было конечным,
+    # то новое соответствующее состояние ДКА также будет конечным.
+    final = [tuple(sorted(nfa_state for nfa_state in dfa_state if nfa.final[nfa_state])) for dfa_state in dfa_states]
+    return final, [dfa_transitions[dfa_state] for dfa_state in dfa_states]
+
+
+def _subset_construction_bitset(nfa: FrozenAutomaton, closures: "_EpsilonClosures",
+                                monitor: Optional[_ConversionMonitor] = None) \
+        -> Tuple[List[Tuple[int, ...]], List[List[Tuple[int, int]]]]:
+    """
+    Построение подмножеств на битовых множествах.
+    Для каждой пары "состояние, символ" заранее вычисляется битовое множество
+    ε-замыкания всех состояний, в которые ведут переходы по этому символу, поэтому переход
+    из состояния ДКА - это объединение таких множеств для входящих в него состояний НКА.
+    Состояния ДКА ищутся в словаре по самому битовому множеству. Объединения вычисляются
+    сразу для групп из восьми состояний и запоминаются. У автоматов из более чем
+    _DENSE_STATES состояний множества хранятся со сдвигом (см. shifted_union), и стоимость операций над ними определяется разбросом
+    номеров состояний в множестве, а не числом состояний НКА (см. _expand_subset).
+    Время вычисления переходов по символам из состояний НКА с учётом замыканий
+    учитывается в статистике как время вычисления замыканий.
+    :param nfa: недетерминированный автомат в компактном представлении.
+    :param closures: таблица ε-замыканий состояний автомата.
+    :param monitor: сбор статистики и проверка ограничений.
+    :return: результат в том же виде, что и у _subset_construction_sets.
+    """
+    alphabet = list(nfa.alphabet)
+    started = time.perf_counter()
+    successor_masks = _successor_masks(nfa, closures, alphabet)
+    if monitor is not None:
+        monitor.stats.closure_time += time.perf_counter() - started
+
+    start = _start_subset(nfa, closures, successor_masks)
+    dfa_states: Dict[Tuple[int, int], int] = {start: 0}
+    subsets = [start]
+    final: List[Tuple[int, ...]] = []
+    transitions: List[List[Tuple[int, int]]] = []
+
+    # Состояния ДКА обрабатываются в порядке обнаружения, поэтому список subsets служит очередью
+    current = 0
+    while current < len(subsets):
+        if monitor is not None:
+            started = time.perf_counter()
+        final_states, moves = _expand_subset(subsets[current], successor_masks, len(alphabet))
+        final.append(final_states)
+        if monitor is not None:
+            monitor.stats.moves_time += time.perf_counter() - started
+            known_states = len(subsets)
+
+        dfa_moves = []
+        for position, next_subset in moves:
+            next_state = dfa_states.get(next_subset)
+            if next_state is None:
+                next_state = len(subsets)
+                dfa_states[next_subset] = next_state
+                subsets.append(next_subset)
+            dfa_moves.append((alphabet[position], next_state))
+        transitions.append(dfa_moves)
+        current += 1
+        if monitor is not None:
+            hits = len(dfa_moves) - (len(subsets) - known_states)
+            monitor.expanded(1, len(subsets), len(subsets) - current, bin(subsets[current - 1][1]).count("1"), hits)
+
+    return final, transitions
+
+
+# Уровни обхода меньшего размера раскрываются в основном процессе:
+# передача их другим процессам обходится дороже самого вычисления
+_MIN_PARALLEL_FRONTIER = 256
+# Число порций, на которые делится уровень в расчёте на один процесс
+_CHUNKS_PER_WORKER = 4
+
+
+def _subset_construction_frontier(nfa: FrozenAutomaton, closures: "_EpsilonClosures", workers: int,
+                                  monitor: Optional[_ConversionMonitor] = None) \
+        -> Tuple[List[Tuple[int, ...]], List[List[Tuple[int, int]]]]:
+    """
+    Построение подмножеств на битовых множествах с обходом в ширину по уровням.
+    Переходы из всех состояний очередного уровня вычисляются в пуле процессов,
+    каждый из которых один раз получает таблицу переходов НКА. Новые состояния
+    отбираются в основном процессе в порядке состояний уровня и символов алфавита,
+    то есть в том же порядке, что и при последовательном построении, поэтому
+    нумерация состояний совпадает с _subset_construction_bitset.
+    :param nfa: недетерминированный автомат в компактном представлении.
+    :param closures: таблица ε-замыканий состояний автомата.
+    :param workers: число процессов.
+    :param monitor: сбор статистики и проверка ограничений.
+    :return: результат в том же виде, что и у _subset_construction_sets.
+    """
+    alphabet = list(nfa.alphabet)
+    started = time.perf_counter()
+    successor_masks = _successor_masks(nfa, closures, alphabet)
+    if monitor is not None:
+        monitor.stats.closure_time += time.perf_counter() - started
+
+    start = _start_subset(nfa, closures, successor_masks)
+    dfa_states: Dict[Tuple[int, int], int] = {start: 0}
+    subsets = [start]
+    final: List[Tuple[int, ...]] = []
+    transitions: List[List[Tuple[int, int]]] = []
+
+    # Пул создаётся при появлении первого достаточно большого уровня
+    executor: Optional[ProcessPoolExecutor] = None
+    try:
+        level_start = 0
+        while level_start < len(subsets):
+            frontier = subsets[level_start:]
+            level_start = len(subsets)
+            started = time.perf_counter()
+            if len(frontier) < _MIN_PARALLEL_FRONTIER:
+                expanded = _expand_subsets(frontier, successor_masks, len(alphabet))
+            else:
+                if executor is None:
+                    executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_frontier_worker,
+                                                   initargs=(successor_masks, len(alphabet)))
+                size = -(-len(frontier) // (workers * _CHUNKS_PER_WORKER))
+                chunks = [frontier[i:i + size] for i in range(0, len(frontier), size)]
+                # map возвращает результаты в порядке порций, а не в порядке готовности
+                expanded = [moves for chunk in executor.map(_expand_chunk, chunks) for moves in chunk]
+            if monitor is not None:
+                monitor.stats.moves_time += time.perf_counter() - started
+                known_states = len(subsets)
+                edges = sum(len(moves) for _, moves in expanded)
+
+            for final_states, moves in expanded:
+                final.append(final_states)
+                dfa_moves = []
+                for position, next_subset in moves:
+                    next_state = dfa_states.get(next_subset)
+                    if next_state is None:
+                        next_state = len(subsets)
+                        dfa_states[next_subset] = next_state
+                        subsets.append(next_subset)
+                    dfa_moves.append((alphabet[position], next_state))
+                transitions.append(dfa_moves)
+            if monitor is not None:
+                subset_size = max(bin(bits).count("1") for _, bits in frontier)
+                monitor.expanded(len(frontier), len(subsets), len(subsets) - level_start, subset_size,
+                                 edges - (len(subsets) - known_states))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return final, transitions
+
+
+def _successor_masks(nfa: FrozenAutomaton, closures: "_EpsilonClosures", alphabet: List[int]) \
+        -> "_SuccessorMasks":
+    """
+    Вычисление для каждого состояния НКА ε-замыканий переходов по символам алфавита.
+    :param nfa: недетерминированный автомат в компактном представлении.
+    :param closures: таблица ε-замыканий состояний автомата.
+    :param alphabet: номера символов алфавита.
+    :return: таблица замыканий переходов (см. _SuccessorMasks).
+    """
+    shifted = closures.shifted
+    offsets = nfa.offsets
+    targets = nfa.targets
+    width = len(nfa.symbols)
+    count = len(nfa.states)
+    # Полноразмерные битовые множества небольшого автомата занимают немного машинных слов,
+    # и объединение без сдвигов чисел обходится дешевле
+    dense = count <= _DENSE_STATES
+
+    rows: List[List[Tuple[int, int]]] = [[]] * count
+    lows: List[int] = [count] * count
+    symbols = list(enumerate(alphabet))
+    for state in range(count):
+        cell = state * width
+        if offsets[cell] == offsets[cell + width]:
+            # Переходов по символам нет, например у состояний автомата Томпсона с ε-переходами
+            continue
+        row = []
+        for position, symbol in symbols:
+            begin, end = offsets[cell + symbol], offsets[cell + symbol + 1]
+            if begin == end:
+                continue
+            if end - begin == 1:
+                # Обычно переход единственный: используется готовое замыкание его цели
+                row.append((position, *shifted[targets[begin]]))
+            else:
+                row.append((position, *shifted_union([shifted[target] for target in targets[begin:end]])))
+        # Сдвиг кратен 8, чтобы множества переходов состояний ДКА были выровнены по байтам
+        low = 0 if dense else min(move_base for _, move_base, _ in row) & ~7
+        rows[state] = [(position, mask << (move_base - low)) for position, move_base, mask in row]
+        lows[state] = low
+    return _SuccessorMasks(rows, lows, bytes(nfa.final), dense, {})
+
+
+# Число состояний НКА, до которого состояния ДКА - полноразмерные битовые множества
+# (не больше 256 машинных слов)
+_DENSE_STATES = 16384
 
-    return dfa
+
+class _SuccessorMasks(NamedTuple):
+    """
+    Замыкания переходов по символам из состояний НКА (см. _successor_masks).
+    """
+    # Для каждого состояния - пары "позиция символа в alphabet, битовое множество"
+    # для символов, по которым есть переходы
+    rows: List[List[Tuple[int, int]]]
+    # Для каждого состояния - общий сдвиг его множеств (см. shifted_union),
+    # кратный 8; у небольших автоматов сдвиг всех множеств нулевой
+    lows: List[int]
+    # Признаки конечности состояний
+    final: bytes
+    # Являются ли состояния ДКА полноразмерными битовыми множествами со сдвигом 0
+    dense: bool
+    # Переходы и конечные состояния групп из восьми состояний (см. _block_moves),
+    # заполняются по мере построения и очищаются при достижении _MAX_BLOCK_ENTRIES записей
+    blocks: Dict[int, Tuple[int, List[Tuple[int, int]], Tuple[int, ...]]]
+
+
+def _start_subset(nfa: FrozenAutomaton, closures: "_EpsilonClosures",
+                  successor_masks: _SuccessorMasks) -> Tuple[int, int]:
+    """
+    Получение начального состояния ДКА в представлении, которое использует _expand_subset.
+    """
+    base, bits = closures.closure_shifted(nfa.start_states)
+    aligned = 0 if successor_masks.dense else base & ~7
+    return aligned, bits << (base - aligned)
+
+
+def _expand_subset(subset: Tuple[int, int], successor_masks: _SuccessorMasks, alphabet_size: int) \
+        -> Tuple[Tuple[int, ...], List[Tuple[int, Tuple[int, int]]]]:
+    """
+    Вычисление переходов из состояния ДКА.
+    Состояния НКА перебираются не по одному, а группами из восьми, соответствующими
+    ненулевым байтам битового множества: объединения переходов для каждой встретившейся
+    группы запоминаются (см. _block_moves, _MAX_BLOCK_ENTRIES). У больших автоматов множества
+    переходов объединяются со сдвигом к наименьшему номеру среди всех состояний, в которые
+    ведут эти переходы, поэтому стоимость объединения определяется разбросом номеров
+    этих состояний, а не числом состояний НКА.
+    :param subset: пара "сдвиг, битовое множество" с состояниями НКА, входящими в состояние ДКА.
+    Сдвиг нулевой у небольших автоматов, иначе - наибольшее кратное 8 число,
+    не превосходящее наименьшего номера состояния в множестве.
+    :param successor_masks: результат _successor_masks.
+    :param alphabet_size: число символов алфавита.
+    :return: номера входящих в состояние ДКА конечных состояний НКА в порядке возрастания
+    и пары "позиция символа, непустое множество в том же представлении, что и subset,
+    в которое ведёт переход".
+    """
+    blocks = successor_masks.blocks
+    base, bits = subset
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    nonzero = data.translate(_NONZERO_BYTES)
+    if not successor_masks.dense and nonzero.count(1) <= _SPARSE_BLOCKS:
+        return _expand_sparse_subset(base, data, nonzero, successor_masks)
+    first_block = base >> 3
+    entries = []
+    final_states: Tuple[int, ...] = ()
+    position = nonzero.find(1)
+    while position != -1:
+        key = (first_block + position) << 8 | data[position]
+        entry = blocks.get(key)
+        if entry is None:
+            if len(blocks) >= _MAX_BLOCK_ENTRIES:
+                blocks.clear()
+            entry = blocks[key] = _block_moves(successor_masks, first_block + position, data[position])
+        if entry[1]:
+            entries.append(entry)
+        if entry[2]:
+            final_states += entry[2]
+        position = nonzero.find(1, position + 1)
+    if not entries:
+        return final_states, []
+
+    moves = [0] * alphabet_size
+    if successor_masks.dense:
+        for _, row, _ in entries:
+            for symbol_position, mask in row:
+                moves[symbol_position] |= mask
+        return final_states, [(symbol_position, (0, mask)) for symbol_position, mask in enumerate(moves) if mask]
+
+    low = min(entry_low for entry_low, _, _ in entries)
+    for entry_low, row, _ in entries:
+        shift = entry_low - low
+        for symbol_position, mask in row:
+            moves[symbol_position] |= mask << shift
+
+    result = []
+    for symbol_position, mask in enumerate(moves):
+        if mask:
+            # Сдвиг приводится к виду, описанному для subset, чтобы одинаковые
+            # множества имели одинаковое представление
+            shift = ((mask & -mask).bit_length() - 1) & ~7
+            result.append((symbol_position, (low + shift, mask >> shift)))
+    return final_states, result
+
+
+# Наибольшее число запомненных объединений групп: без ограничения их число доходит до 256 на группу,
+# каждое хранит множества для всех символов, и у больших автоматов они занимают больше памяти, чем ДКА.
+# При достижении ограничения запомненные объединения удаляются все сразу: проверка
+# дешевле учёта порядка использования, а часто встречающиеся группы быстро вычисляются заново
+_MAX_BLOCK_ENTRIES = 1 << 16
+
+# Наибольшее число ненулевых байтов множества, при котором у больших автоматов переходы
+# объединяются по отдельным состояниям без запоминания групп: состояния ДКА разреженного
+# автомата редко содержат одни и те же группы, и запоминание обходится дороже объединения
+_SPARSE_BLOCKS = 16
+
+
+def _expand_sparse_subset(base: int, data: bytes, nonzero: bytes, successor_masks: _SuccessorMasks) \
+        -> Tuple[Tuple[int, ...], List[Tuple[int, Tuple[int, int]]]]:
+    """
+    Вычисление переходов из состояния ДКА с небольшим числом состояний НКА (см. _expand_subset):
+    множества переходов состояний НКА объединяются по одному со сдвигом.
+    :param base: сдвиг множества состояния ДКА.
+    :param data: байты битового множества.
+    :param nonzero: те же байты, в которых ненулевые заменены единицей.
+    :param successor_masks: результат _successor_masks.
+    :return: результат в том же виде, что и у _expand_subset.
+    """
+    rows = successor_masks.rows
+    lows = successor_masks.lows
+    final = successor_masks.final
+    moves: Dict[int, Tuple[int, int]] = {}
+    final_states: Tuple[int, ...] = ()
+    position = nonzero.find(1)
+    while position != -1:
+        block = base + position * 8
+        for bit in _BYTE_BITS[data[position]]:
+            state = block + bit
+            if final[state]:
+                final_states += (state,)
+            row = rows[state]
+            if not row:
+                continue
+            low = lows[state]
+            for symbol_position, mask in row:
+                move = moves.get(symbol_position)
+                if move is None:
+                    moves[symbol_position] = (low, mask)
+                elif move[0] <= low:
+                    moves[symbol_position] = (move[0], move[1] | mask << (low - move[0]))
+                else:
+                    moves[symbol_position] = (low, mask | move[1] << (move[0] - low))
+        position = nonzero.find(1, position + 1)
+
+    result = []
+    for symbol_position in sorted(moves):
+        low, mask = moves[symbol_position]
+        shift = ((mask & -mask).bit_length() - 1) & ~7
+        result.append((symbol_position, (low + shift, mask >> shift)))
+    return final_states, result
 
 
-def _nfa_moves(nfa: Automaton, from_states: FrozenSet[str], symbol: str) -> FrozenSet[str]:
+def _block_moves(successor_masks: _SuccessorMasks, block: int, byte: int) \
+        -> Tuple[int, List[Tuple[int, int]], Tuple[int, ...]]:
+    """
+    Объединение переходов по символам из группы состояний с номерами от 8 * block до 8 * block + 7.
+    :param successor_masks: результат _successor_masks.
+    :param block: номер группы.
+    :param byte: биты входящих в объединение состояний группы.
+    :return: общий сдвиг множеств, пары "позиция символа, битовое множество"
+    и номера конечных состояний среди входящих в объединение.
+    """
+    rows = successor_masks.rows
+    lows = successor_masks.lows
+    states = [block * 8 + bit for bit in _BYTE_BITS[byte]]
+    low = min(lows[state] for state in states)
+    moves: Dict[int, int] = {}
+    for state in states:
+        shift = lows[state] - low
+        for position, mask in rows[state]:
+            moves[position] = moves.get(position, 0) | mask << shift
+    return low, list(moves.items()), tuple(state for state in states if successor_masks.final[state])
+
+
+def _expand_subsets(subsets: List[Tuple[int, int]], successor_masks: _SuccessorMasks, alphabet_size: int) \
+        -> List[Tuple[Tuple[int, ...], List[Tuple[int, Tuple[int, int]]]]]:
+    """
+    Вычисление переходов из нескольких состояний ДКА (см. _expand_subset).
+    """
+    return [_expand_subset(subset, successor_masks, alphabet_size) for subset in subsets]
+
+
+# Таблица переходов НКА в процессе пула, задаётся один раз при его запуске
+_worker_successor_masks = _SuccessorMasks([], [], b"", True, {})
+_worker_alphabet_size = 0
+
+
+def _init_frontier_worker(successor_masks: _SuccessorMasks, alphabet_size: int):
+    """
+    Инициализация процесса пула построения по уровням.
+    """
+    global _worker_successor_masks, _worker_alphabet_size
+    _worker_successor_masks = successor_masks
+    _worker_alphabet_size = alphabet_size
+
+
+def _expand_chunk(subsets: List[Tuple[int, int]]) -> List[Tuple[Tuple[int, ...], List[Tuple[int, Tuple[int, int]]]]]:
+    """
+    Вычисление переходов из порции состояний уровня в процессе пула.
+    """
+    return _expand_subsets(subsets, _worker_successor_masks, _worker_alphabet_size)
+
+
+def _nfa_moves(nfa: FrozenAutomaton, from_states: FrozenSet[int], symbol: int) -> List[int]:
     """
     Получение набора состояний достижимых из указанного множества по заданному переходу.
-    :param nfa: недетерминированный автомат.
-    :param from_states: множество состояний из которых будет призведён поиск достижимых.
-    :param symbol: символ перехода.
-    :return: неизменяемое множество состояний достижимых из указанных по заданному символу.
+    :param nfa: недетерминированный автомат в компактном представлении.
+    :param from_states: множество номеров состояний из которых будет призведён поиск достижимых.
+    :param symbol: номер символа перехода.
+    :return: номера состояний достижимых из указанных по заданному символу (возможны повторы).
     """
-    moves: Set[str] = set()
+    offsets = nfa.offsets
+    targets = nfa.targets
+    width = len(nfa.symbols)
+    moves: List[int] = []
 
     for state in from_states:
-        if symbol in nfa.get_transitions_from(state):
-            moves.update(nfa.get_transitions_from(state)[symbol])
+        position = state * width + symbol
+        moves.extend(targets[offsets[position]:offsets[position + 1]])
 
-    return frozenset(moves)
+    return moves
 
 
-def _epsilon_set_closure(nfa: Automaton, from_states: FrozenSet[str]) -> FrozenSet[str]:
+class _EpsilonClosures:
     """
-    Получение состояний, которые достижимы по ε-переходам из множества указанных состояний.
-    :param nfa: недетерминированный автомат.
-    :param from_states: множество состояний из которых будет произведён поиск достижимых.
-    :return: неизменяемое множество состояний достижимых из указанных по ε-переходам.
+    Таблица ε-замыканий всех состояний автомата.
+    Замыкания вычисляются по запросу в одном из двух видов. Неизменяемые множества (sets):
+    объединение стоит O(размер замыканий). Битовые множества со сдвигом (shifted): пара
+    "наименьший номер состояния, битовое множество номеров за вычетом наименьшего";
+    размер числа определяется разбросом номеров в замыкании, а не числом состояний
+    автомата, поэтому таблица замыканий не занимает O(n^2) битов памяти.
     """
-    eps_closure = set()
-    for state in from_states:
-        eps_closure.update(_epsilon_closure(nfa, state))
-    return frozenset(eps_closure)
 
+    def __init__(self, nfa: FrozenAutomaton):
+        """
+        Подготовка к вычислению ε-замыканий состояний автомата.
+        :param nfa: недетерминированный автомат в компактном представлении.
+        """
+        eps_offsets = nfa.eps_offsets
+        eps_targets = nfa.eps_targets
+        self._eps_successors = [eps_targets[eps_offsets[state]:eps_offsets[state + 1]]
+                                for state in range(len(nfa.states))]
+        self._components: Optional[List[List[int]]] = None
+        self._sets: Optional[List[FrozenSet[int]]] = None
+        self._shifted: Optional[List[Tuple[int, int]]] = None
+
+    @property
+    def sets(self) -> List[FrozenSet[int]]:
+        """
+        Замыкания состояний в виде неизменяемых множеств номеров.
+        """
+        if self._sets is None:
+            self._sets = _epsilon_closure_sets(self._eps_successors, self._get_components())
+        return self._sets
+
+    @property
+    def shifted(self) -> List[Tuple[int, int]]:
+        """
+        Замыкания состояний в виде битовых множеств со сдвигом.
+        """
+        if self._shifted is None:
+            self._shifted = _epsilon_closure_shifted(self._eps_successors, self._get_components())
+        return self._shifted
+
+    def closure_set(self, states: Iterable[int]) -> FrozenSet[int]:
+        """
+        Получение ε-замыкания множества состояний в виде неизменяемого множества.
+        :param states: номера состояний.
+        :return: объединение замыканий указанных состояний.
+        """
+        sets = self.sets
+        closure = set()
+        for state in states:
+            closure.update(sets[state])
+        return frozenset(closure)
+
+    def closure_shifted(self, states: Iterable[int]) -> Tuple[int, int]:
+        """
+        Получение ε-замыкания множества состояний в виде битового множества со сдвигом.
+        :param states: номера состояний.
+        :return: объединение замыканий указанных состояний.
+        """
+        shifted = self.shifted
+        return shifted_union([shifted[state] for state in states])
 
-def _epsilon_closure(nfa: Automaton, state: str) -> Set[str]:
+    def _get_components(self) -> List[List[int]]:
+        """
+        Компоненты сильной связности графа ε-переходов, общие для обоих видов замыканий.
+        """
+        if self._components is None:
+            self._components = _epsilon_components(self._eps_successors)
+        return self._components
+
+
+# Номера единичных битов каждого значения байта
+_BYTE_BITS = [tuple(bit for bit in range(8) if value >> bit & 1) for value in range(256)]
+# Таблица для bytes.translate: ненулевые байты заменяются единицей
+_NONZERO_BYTES = bytes([0] + [1] * 255)
+
+
+def _mask_to_list(mask: int) -> List[int]:
     """
-    Получение состояний, которые достижимы по ε-переходам из указанного состояния.
-    :param nfa: недетерминированный автомат.
-    :param state: состояние из которого будет поиск достижимых состояний.
-    :return: множество состояний достижимых по ε-переходам.
+    Преобразование битового множества в список номеров состояний.
+    Число переводится в байты, и ненулевые байты ищутся методом bytes.find: операции над
+    большим числом для каждого бита (mask & -mask) стоят O(n / 64) и на разреженных
+    множествах большого автомата обходятся дороже самого построения.
+    :param mask: битовое множество состояний.
+    :return: номера состояний в порядке возрастания.
+    """
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    nonzero = data.translate(_NONZERO_BYTES)
+    states = []
+    position = nonzero.find(1)
+    while position != -1:
+        base = position * 8
+        for bit in _BYTE_BITS[data[position]]:
+            states.append(base + bit)
+        position = nonzero.find(1, position + 1)
+    return states
+
+
+def _epsilon_components(eps_successors: List[Sequence[int]]) -> List[List[int]]:
+    """
+    Поиск компонент сильной связности графа ε-переходов итеративным алгоритмом Тарьяна.
+    Состояния одной компоненты имеют общее замыкание, поэтому каждый ε-цикл обрабатывается
+    один раз. Компоненты завершаются в обратном топологическом порядке, так что при обходе
+    списка замыкания всех достижимых из компоненты состояний к её обработке уже известны.
+    :param eps_successors: списки номеров состояний, достижимых по одному ε-переходу.
+    :return: компоненты в порядке завершения.
+    """
+    count = len(eps_successors)
+    order = [-1] * count
+    low = [0] * count
+    on_stack = [False] * count
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+
+    for root in range(count):
+        if order[root] != -1:
+            continue
+        if not eps_successors[root]:
+            # Состояние без ε-переходов - отдельная компонента
+            order[root] = counter
+            counter += 1
+            components.append([root])
+            continue
+
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        # Вместо рекурсии используется явный стек пар "состояние, номер следующего ε-перехода"
+        work = [(root, 0)]
+        while work:
+            state, position = work[-1]
+            successors = eps_successors[state]
+            if position < len(successors):
+                work[-1] = (state, position + 1)
+                dst = successors[position]
+                if order[dst] == -1:
+                    order[dst] = low[dst] = counter
+                    counter += 1
+                    stack.append(dst)
+                    on_stack[dst] = True
+                    work.append((dst, 0))
+                elif on_stack[dst]:
+                    low[state] = min(low[state], order[dst])
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[state])
+
+            if low[state] == order[state]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component.append(member)
+                    if member == state:
+                        break
+                components.append(component)
+
+    return components
+
+
+def _epsilon_closure_shifted(eps_successors: List[Sequence[int]], components: List[List[int]]) \
+        -> List[Tuple[int, int]]:
+    """
+    Вычисление ε-замыканий в виде битовых множеств со сдвигом. Замыкание компоненты
+    объединяется из замыканий её ε-преемников сдвигом чисел, без обхода их элементов.
+    :param eps_successors: списки номеров состояний, достижимых по одному ε-переходу.
+    :param components: компоненты сильной связности в порядке завершения (см. _epsilon_components).
+    :return: список ε-замыканий для каждого состояния.
+    """
+    shifted: List[Tuple[int, int]] = [(0, 0)] * len(eps_successors)
+    for component in components:
+        if len(component) == 1 and not eps_successors[component[0]]:
+            shifted[component[0]] = (component[0], 1)
+            continue
+        closure = shifted_union([(member, 1) for member in component] +
+                                 [shifted[dst] for member in component for dst in eps_successors[member]])
+        for member in component:
+            shifted[member] = closure
+    return shifted
+
+
+def _epsilon_closure_sets(eps_successors: List[Sequence[int]], components: List[List[int]]) \
+        -> List[FrozenSet[int]]:
+    """
+    Вычисление ε-замыканий в виде неизменяемых множеств. Состояния одной компоненты
+    ссылаются на один объект множества.
+    :param eps_successors: списки номеров состояний, достижимых по одному ε-переходу.
+    :param components: компоненты сильной связности в порядке завершения (см. _epsilon_components).
+    :return: список ε-замыканий для каждого состояния.
+    """
+    sets: List[FrozenSet[int]] = [frozenset()] * len(eps_successors)
+    for component in components:
+        closure = set(component)
+        for member in component:
+            for dst in eps_successors[member]:
+                closure.update(sets[dst])
+        closure = frozenset(closure)
+        for member in component:
+            sets[member] = closure
+    return sets
+
+
+def _epsilon_set_closure(closures: _EpsilonClosures, from_states: Iterable[int]) -> FrozenSet[int]:
+    """
+    Получение состояний, которые достижимы по ε-переходам из множества указанных состояний.
+    :param closures: таблица ε-замыканий состояний автомата.
+    :param from_states: номера состояний из которых будет произведён поиск достижимых.
+    :return: неизменяемое множество номеров состояний достижимых из указанных по ε-переходам.
     """
-    reachable_states: Set[str] = set()
-    reachable_states.add(state)
+    return closures.closure_set(from_states)
 
-    if "ε" in nfa.get_transitions_from(state):
-        for dst in nfa.get_transitions_from(state)["ε"]:
-            reachable_states |= _epsilon_closure(nfa, dst)
 
-    return reachable_states
+# Способы построения ДКА, доступные через параметр engine функции nfa_to_dfa
+ENGINES = {
+    "sets": _subset_construction_sets,
+    "bitset": _subset_construction_bitset,
+}
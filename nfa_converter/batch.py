@@ -0,0 +1,129 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+from nfa_converter.automaton import nfa_to_dfa
+from nfa_converter.cache import DEFAULT_MAX_SIZE, ConversionCache, default_cache_dir
+from nfa_converter.readwrite import read, write_to
+
+# Суффикс, которым заменяется расширение входного файла при записи результата
+OUTPUT_SUFFIX = ".dfa.dot"
+
+
+class ConversionResult(NamedTuple):
+    """
+    Результат преобразования одного файла.
+    """
+    source: str
+    destination: Optional[str]  # путь к записанному ДКА, None в случае ошибки
+    states: int  # число состояний ДКА
+    error: Optional[str]  # описание ошибки, None в случае успеха
+    cached: bool = False  # взят ли ДКА из кэша
+
+
+class ConversionOptions(NamedTuple):
+    """
+    Параметры преобразования, общие для всех файлов.
+    """
+    output_dir: Optional[str] = None
+    engine: str = "sets"
+    minimize: bool = False
+    trim: bool = False
+    cache_dir: Optional[str] = None  # каталог кэша результатов (см. cache), None - cache.default_cache_dir()
+    cache_size: int = DEFAULT_MAX_SIZE  # наибольший размер кэша в байтах
+    use_cache: bool = True  # использовать ли кэш результатов
+
+
+def output_path(source: str, output_dir: Optional[str] = None) -> str:
+    """
+    Получение пути, по которому записывается ДКА для указанного файла.
+    :param source: путь к файлу с НКА.
+    :param output_dir: каталог для результатов, по умолчанию - каталог исходного файла.
+    :return: путь к файлу с ДКА.
+    """
+    directory, file_name = os.path.split(source)
+    stem = os.path.splitext(file_name)[0]
+    return os.path.join(directory if output_dir is None else output_dir, stem + OUTPUT_SUFFIX)
+
+
+def convert_file(source: str, options: ConversionOptions = ConversionOptions()) -> ConversionResult:
+    """
+    Чтение НКА из файла, построение ДКА и его запись в файл.
+    Любая ошибка при обработке файла попадает в результат и не прерывает обработку остальных файлов.
+    :param source: путь к файлу с НКА в dot формате.
+    :param options: параметры преобразования.
+    :return: результат преобразования.
+    """
+    destination = output_path(source, options.output_dir)
+    try:
+        with open(source, "r", encoding="utf-8") as dot_file:
+            text = dot_file.read()
+        cached = False
+        if not options.use_cache:
+            dfa = nfa_to_dfa(read(text), engine=options.engine, minimize=options.minimize, trim=options.trim)
+        else:
+            cache = ConversionCache(options.cache_dir or default_cache_dir(), options.cache_size)
+            dfa, cached = cache.convert_text(text, engine=options.engine, minimize=options.minimize,
+                                             trim=options.trim)
+        with open(destination, "w", encoding="utf-8") as dot_file:
+            write_to(dfa, dot_file)
+    except Exception as e:
+        return ConversionResult(source, None, 0, _describe(e))
+    return ConversionResult(source, destination, len(dfa.get_states()), None, cached)
+
+
+def convert_many(paths: Iterable[str], workers: Optional[int] = None, chunksize: int = 1,
+                 options: ConversionOptions = ConversionOptions()) -> Iterator[ConversionResult]:
+    """
+    Параллельное преобразование файлов в пуле процессов.
+    Результаты выдаются по мере готовности, поэтому их порядок может не совпадать с порядком путей.
+    :param paths: пути к файлам с НКА в dot формате.
+    :param workers: число процессов, по умолчанию - число процессоров. При значении 1
+    файлы обрабатываются в текущем процессе.
+    :param chunksize: число файлов, передаваемых процессу за раз. Большие значения
+    уменьшают накладные расходы на обмен данными для множества маленьких файлов.
+    :param options: параметры преобразования.
+    :return: итератор результатов преобразования.
+    :raise ValueError: если размер порции не положителен; проверка выполняется при вызове, а не
+    при получении первого результата.
+    """
+    if chunksize < 1:
+        raise ValueError("Размер порции должен быть положительным.")
+    if options.output_dir is not None:
+        os.makedirs(options.output_dir, exist_ok=True)
+    return _convert_many(list(paths), workers, chunksize, options)
+
+
+def _convert_many(paths: List[str], workers: Optional[int], chunksize: int,
+                  options: ConversionOptions) -> Iterator[ConversionResult]:
+    """
+    Генератор результатов convert_many.
+    """
+    if workers == 1:
+        for source in paths:
+            yield convert_file(source, options)
+        return
+
+    chunks = [paths[i:i + chunksize] for i in range(0, len(paths), chunksize)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(_convert_chunk, chunk, options): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                # Процесс пула аварийно завершился: ошибка относится ко всем файлам его порции
+                results = [ConversionResult(source, None, 0, _describe(e)) for source in futures[future]]
+            yield from results
+
+
+def _convert_chunk(sources: List[str], options: ConversionOptions) -> List[ConversionResult]:
+    """
+    Преобразование порции файлов в процессе пула.
+    """
+    return [convert_file(source, options) for source in sources]
+
+
+def _describe(error: Exception) -> str:
+    """
+    Описание ошибки для результата преобразования.
+    """
+    return f"{type(error).__name__}: {error}"
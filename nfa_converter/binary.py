@@ -0,0 +1,272 @@
+import itertools
+import mmap
+import operator
+import os
+import struct
+import sys
+from array import array
+from typing import IO, Dict, FrozenSet, List, Optional, Sequence, Union
+from nfa_converter.automaton import Automaton, FrozenAutomaton, INDEX_TYPECODE
+
+# Формат файла: заголовок, затем секции, каждая из которых выровнена на 8 байт:
+# название, идентификаторы состояний и символы (UTF-8, разделитель - нулевой символ),
+# номера символов алфавита, номера начальных состояний, признаки конечности состояний,
+# смещения и цели переходов, смещения и цели ε-переходов, метки конечных состояний (UTF-8:
+# номер состояния, число меток и сами метки, разделитель - нулевой символ). Числа записываются
+# как 32-битные целые со знаком в порядке байтов little-endian. Файлы версии 1 не содержат меток.
+MAGIC = b"NFAB"
+VERSION = 2
+
+# Сигнатура, версия, длины трёх текстовых секций, число состояний и символов, размеры семи массивов,
+# длина секции меток
+_HEADER = struct.Struct("<4sHxx3Q2Q7QQ")
+_HEADER_V1 = struct.Struct("<4sHxx3Q2Q7Q")
+_ALIGNMENT = 8
+_ITEM_SIZE = 4
+
+
+class BinaryFormatError(Exception):
+    """
+    Ошибка говорящая о том, что файл не является автоматом в двоичном формате или повреждён.
+    """
+    pass
+
+
+def save(automaton: Union[Automaton, FrozenAutomaton], fileobj: Union[str, IO[bytes]]):
+    """
+    Запись автомата в двоичном формате.
+    :param automaton: автомат или его компактное представление.
+    :param fileobj: путь к файлу или двоичный поток.
+    """
+    if isinstance(fileobj, str):
+        with open(fileobj, "wb") as output:
+            save(automaton, output)
+        return
+
+    frozen = automaton.freeze()
+    name = frozen.name.encode("utf-8")
+    states = _join(frozen.states)
+    symbols = _join(frozen.symbols)
+    tags = _join([item for state in sorted(frozen.tags)
+                  for item in (str(state), str(len(frozen.tags[state])), *sorted(frozen.tags[state]))])
+    arrays = [frozen.alphabet, frozen.start_states, frozen.final, frozen.offsets, frozen.targets,
+              frozen.eps_offsets, frozen.eps_targets]
+
+    fileobj.write(_HEADER.pack(MAGIC, VERSION, len(name), len(states), len(symbols),
+                               len(frozen.states), len(frozen.symbols), *map(len, arrays), len(tags)))
+    for section in (name, states, symbols):
+        _write_section(fileobj, section)
+    _write_section(fileobj, _int_section(frozen.alphabet))
+    _write_section(fileobj, _int_section(frozen.start_states))
+    _write_section(fileobj, bytes(frozen.final))
+    for values in arrays[3:]:
+        _write_section(fileobj, _int_section(values))
+    _write_section(fileobj, tags)
+
+
+def load(fileobj: Union[str, IO[bytes]], use_mmap: bool = False,
+         validate: Optional[bool] = None) -> FrozenAutomaton:
+    """
+    Чтение автомата в двоичном формате.
+    :param fileobj: путь к файлу или двоичный поток.
+    :param use_mmap: отобразить ли файл в память вместо чтения. Массивы переходов
+    в этом случае не копируются, и несколько процессов, загрузивших один файл,
+    используют одни и те же страницы памяти. Поток должен быть связан с файлом.
+    :param validate: проверить ли все номера состояний и символов и порядок смещений
+    (по умолчанию - только при чтении без mmap). Без проверки сверяются лишь заголовок,
+    размеры секций и крайние смещения переходов, и страницы отображения не читаются
+    при загрузке, но ошибка в повреждённом файле может проявиться позже, при обращении к переходам.
+    :return: компактное представление автомата.
+    :raise BinaryFormatError: если файл не является автоматом в двоичном формате или повреждён.
+    """
+    if isinstance(fileobj, str):
+        with open(fileobj, "rb") as source:
+            return load(source, use_mmap, validate)
+    if validate is None:
+        validate = not use_mmap
+
+    if use_mmap:
+        # Пустой файл нельзя отобразить в память
+        if os.fstat(fileobj.fileno()).st_size < _HEADER_V1.size:
+            raise BinaryFormatError("Файл слишком короткий.")
+        # Отображение остаётся доступным через ссылающиеся на него массивы и после закрытия файла
+        data = memoryview(mmap.mmap(fileobj.fileno(), 0, access=mmap.ACCESS_READ))
+    else:
+        data = memoryview(fileobj.read())
+
+    if len(data) < _HEADER_V1.size:
+        raise BinaryFormatError("Файл слишком короткий.")
+    magic, version = struct.unpack_from("<4sH", data)
+    if magic != MAGIC:
+        raise BinaryFormatError("Файл не является автоматом в двоичном формате.")
+    if version not in (1, VERSION):
+        raise BinaryFormatError(f"Неподдерживаемая версия формата: {version}.")
+    header = _HEADER if version == VERSION else _HEADER_V1
+    if len(data) < header.size:
+        raise BinaryFormatError("Файл слишком короткий.")
+    sizes = header.unpack_from(data)[2:]
+    if version == 1:
+        sizes += (0,)
+
+    name_size, states_size, symbols_size, state_count, symbol_count, alphabet_count, start_count, \
+        final_count, offsets_count, targets_count, eps_offsets_count, eps_targets_count, tags_size = sizes
+    reader = _SectionReader(data, header.size)
+    name = reader.text(name_size)
+    states = _split(reader.text(states_size), state_count)
+    symbols = _split(reader.text(symbols_size), symbol_count)
+    alphabet = reader.ints(alphabet_count)
+    start_states = reader.ints(start_count)
+    final = reader.raw(final_count)
+    offsets = reader.ints(offsets_count)
+    targets = reader.ints(targets_count)
+    eps_offsets = reader.ints(eps_offsets_count)
+    eps_targets = reader.ints(eps_targets_count)
+    tags = _parse_tags(reader.text(tags_size), state_count)
+
+    if len(states) != state_count or len(symbols) != symbol_count or len(final) != len(states) \
+            or len(offsets) != len(states) * len(symbols) + 1 \
+            or len(eps_offsets) != len(states) + 1:
+        raise BinaryFormatError("Размеры секций файла не согласованы.")
+    if offsets[0] != 0 or offsets[-1] != len(targets) or eps_offsets[0] != 0 or eps_offsets[-1] != len(eps_targets):
+        raise BinaryFormatError("Смещения переходов не согласованы.")
+    if validate:
+        if len(set(states)) != len(states) or len(set(symbols)) != len(symbols):
+            raise BinaryFormatError("Идентификаторы состояний или символы повторяются.")
+        # Номера проверяются до построения автомата: иначе повреждённый файл загрузится,
+        # а ошибка возникнет позже, при обращении к переходам
+        _check_indices(alphabet, symbol_count, "Номера символов алфавита")
+        _check_indices(start_states, state_count, "Номера начальных состояний")
+        _check_transitions(offsets, targets, state_count)
+        _check_transitions(eps_offsets, eps_targets, state_count)
+    return FrozenAutomaton(name, states, symbols, alphabet, start_states, final,
+                           offsets, targets, eps_offsets, eps_targets, tags)
+
+
+class _SectionReader:
+    """
+    Последовательное чтение выровненных секций из буфера.
+    """
+
+    def __init__(self, data: memoryview, position: int):
+        """
+        :param data: содержимое файла.
+        :param position: смещение первой секции.
+        """
+        self._data = data
+        self._position = position
+
+    def raw(self, size: int) -> memoryview:
+        """
+        Чтение секции как последовательности байтов без копирования.
+        """
+        start = self._position
+        end = start + size
+        if end > len(self._data):
+            raise BinaryFormatError("Файл обрезан.")
+        self._position = end + _padding(end)
+        return self._data[start:end]
+
+    def text(self, size: int) -> str:
+        """
+        Чтение текстовой секции.
+        """
+        try:
+            return str(self.raw(size), "utf-8")
+        except UnicodeDecodeError:
+            raise BinaryFormatError("Текстовая секция не является строкой UTF-8.") from None
+
+    def ints(self, count: int) -> Sequence[int]:
+        """
+        Чтение секции 32-битных целых. На платформах с порядком байтов little-endian
+        массив не копируется, а ссылается на содержимое буфера.
+        """
+        section = self.raw(count * _ITEM_SIZE)
+        if _NATIVE_LAYOUT:
+            return section.cast(INDEX_TYPECODE)
+        return array(INDEX_TYPECODE, struct.unpack(f"<{count}i", section))
+
+
+# Совпадает ли представление массивов номеров в памяти с форматом файла
+_NATIVE_LAYOUT = sys.byteorder == "little" and array(INDEX_TYPECODE).itemsize == _ITEM_SIZE
+
+
+def _int_section(values: Sequence[int]) -> Union[bytes, memoryview]:
+    """
+    Преобразование последовательности номеров в 32-битные целые little-endian.
+    Массивы в подходящем представлении записываются без копирования.
+    """
+    if _NATIVE_LAYOUT and isinstance(values, (array, memoryview)) and values.itemsize == _ITEM_SIZE:
+        return memoryview(values).cast("B")
+    return struct.pack(f"<{len(values)}i", *values)
+
+
+def _write_section(fileobj: IO[bytes], data: Union[bytes, memoryview]):
+    """
+    Запись секции с выравниванием.
+    """
+    fileobj.write(data)
+    fileobj.write(b"\0" * _padding(len(data)))
+
+
+def _padding(size: int) -> int:
+    """
+    Число байтов выравнивания после секции указанного размера.
+    """
+    return -size % _ALIGNMENT
+
+
+def _join(strings: List[str]) -> bytes:
+    """
+    Объединение строк в одну секцию с нулевым символом в качестве разделителя.
+    """
+    for string in strings:
+        if "\0" in string:
+            raise ValueError("Идентификаторы состояний и символы не могут содержать нулевой символ.")
+    return "\0".join(strings).encode("utf-8")
+
+
+def _split(text: str, count: int) -> List[str]:
+    """
+    Разделение текстовой секции на заданное число строк.
+    """
+    return text.split("\0") if count > 0 else []
+
+
+def _check_indices(values: Sequence[int], count: int, description: str):
+    """
+    Проверка, что все номера лежат в диапазоне [0, count).
+    :raise BinaryFormatError: если есть номер вне диапазона.
+    """
+    if len(values) > 0 and (min(values) < 0 or max(values) >= count):
+        raise BinaryFormatError(f"{description} выходят за допустимый диапазон.")
+
+
+def _check_transitions(offsets: Sequence[int], targets: Sequence[int], state_count: int):
+    """
+    Проверка массивов переходов: смещения не убывают, а цели - номера существующих состояний.
+    Крайние смещения проверяются в load при любой загрузке.
+    :raise BinaryFormatError: если массивы не согласованы.
+    """
+    if not all(map(operator.le, offsets, itertools.islice(offsets, 1, None))):
+        raise BinaryFormatError("Смещения переходов не согласованы.")
+    _check_indices(targets, state_count, "Цели переходов")
+
+
+def _parse_tags(text: str, state_count: int) -> Dict[int, FrozenSet[str]]:
+    """
+    Разбор секции меток состояний.
+    """
+    items = text.split("\0") if text else []
+    tags = {}
+    position = 0
+    try:
+        while position < len(items):
+            state, count = int(items[position]), int(items[position + 1])
+            position += 2
+            if not 0 <= state < state_count or count <= 0 or position + count > len(items):
+                raise ValueError
+            tags[state] = frozenset(items[position:position + count])
+            position += count
+    except (ValueError, IndexError):
+        raise BinaryFormatError("Секция меток повреждена.") from None
+    return tags
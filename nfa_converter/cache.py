@@ -0,0 +1,462 @@
+import hashlib
+import os
+import tempfile
+from collections import deque
+from contextlib import contextmanager, suppress
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from nfa_converter.automaton import Automaton, nfa_to_dfa
+from nfa_converter.binary import BinaryFormatError, load, save
+from nfa_converter.readwrite import read
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+# Версия ключа: изменяется при изменении канонической записи автомата или результата nfa_to_dfa
+KEY_VERSION = 4
+
+# Наибольший размер каталога кэша по умолчанию в байтах
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Переменная окружения с каталогом кэша командной строки
+CACHE_DIR_VARIABLE = "NFA_CONVERTER_CACHE_DIR"
+
+_SUFFIX = ".nfab"
+_ALIAS_SUFFIX = ".key"
+_LOCK_NAME = ".lock"
+
+
+def default_cache_dir() -> str:
+    """
+    Каталог кэша по умолчанию: значение переменной NFA_CONVERTER_CACHE_DIR или
+    nfa-converter в каталоге пользовательского кэша ($XDG_CACHE_HOME или ~/.cache).
+    """
+    directory = os.environ.get(CACHE_DIR_VARIABLE)
+    if directory:
+        return directory
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "nfa-converter")
+
+
+def canonical_hash(nfa: Automaton, **options) -> str:
+    """
+    Хэш автомата, не зависящий от идентификаторов состояний и порядка добавления переходов.
+    Состояния окрашиваются по признакам начальности, конечности и меткам, и цвета уточняются
+    по цветам соседей, пока разбиение состояний не перестанет меняться. Если после этого
+    остаются состояния одного цвета, то одно из них получает отдельный цвет и уточнение
+    повторяется (см. _canonical_labeling). Переименованные копии автомата получают одинаковый
+    хэш, кроме редких случаев сильно симметричных автоматов, для которых возможен лишний промах кэша.
+    :param nfa: автомат.
+    :param options: параметры построения, влияющие на результат (входят в хэш).
+    :return: шестнадцатеричная строка SHA-256.
+    """
+    states = sorted(nfa.get_states())
+    index = {state: i for i, state in enumerate(states)}
+    start_states = [index[state] for state in nfa.get_start_states()]
+    final_states = [index[state] for state in nfa.get_final_states()]
+    tags = {index[state]: tuple(sorted(state_tags)) for state, state_tags in nfa.get_tags().items()
+            if state in nfa.get_final_states()}
+
+    edges: List[List[Tuple[str, int]]] = [[] for _ in states]
+    reverse: List[List[Tuple[str, int]]] = [[] for _ in states]
+    for src, transitions in nfa.get_all_transitions().items():
+        for symbol, dst_states in transitions.items():
+            for dst in dst_states:
+                edges[index[src]].append((symbol, index[dst]))
+                reverse[index[dst]].append((symbol, index[src]))
+
+    start_set = set(start_states)
+    final_set = set(final_states)
+    initial = [(state in start_set, state in final_set, tags.get(state, ())) for state in range(len(states))]
+
+    # Состояния-близнецы (без петель, с одинаковыми признаками, входящими и исходящими переходами)
+    # взаимозаменяемы: остаётся одно из них, а их число становится частью его цвета
+    twins: Dict[Tuple, List[int]] = {}
+    for state in range(len(states)):
+        if all(dst != state for _, dst in edges[state]):
+            twins.setdefault((initial[state], frozenset(edges[state]), frozenset(reverse[state])), []).append(state)
+    multiplicity = [1] * len(states)
+    for group in twins.values():
+        for twin in group[1:]:
+            multiplicity[twin] = 0
+        multiplicity[group[0]] = len(group)
+    kept = [state for state in range(len(states)) if multiplicity[state]]
+    position = {state: i for i, state in enumerate(kept)}
+    kept_edges = [[(symbol, position[dst]) for symbol, dst in edges[state] if dst in position] for state in kept]
+    kept_reverse = [[(symbol, position[src]) for symbol, src in reverse[state] if src in position] for state in kept]
+
+    def encode(labeling: List[int]) -> Tuple:
+        return (sorted((labeling[i], multiplicity[state]) for i, state in enumerate(kept)),
+                sorted(labeling[position[state]] for state in start_states if state in position),
+                sorted(labeling[position[state]] for state in final_states if state in position),
+                sorted((labeling[position[state]], state_tags) for state, state_tags in tags.items()
+                       if state in position),
+                sorted((labeling[src], symbol, labeling[dst])
+                       for src in range(len(kept)) for symbol, dst in kept_edges[src]))
+
+    colors = _rank([initial[state] + (multiplicity[state],) for state in kept])
+    certificate = encode(_canonical_labeling(colors, kept_edges, kept_reverse,
+                                             [states[state] for state in kept]))
+
+    digest = hashlib.sha256()
+    header = (KEY_VERSION, sorted(options.items()), sorted(nfa.get_alphabet()), len(states))
+    digest.update(repr(header).encode("utf-8"))
+    digest.update(repr(certificate).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def source_hash(text: str, **options) -> str:
+    """
+    Быстрый ключ исходного текста автомата: хэш текста и параметров построения без его разбора.
+    В отличие от canonical_hash зависит от идентификаторов состояний и порядка переходов,
+    поэтому используется только для поиска канонического ключа неизменившегося файла.
+    :param text: текст автомата в dot формате.
+    :param options: параметры построения, влияющие на результат (входят в хэш).
+    :return: шестнадцатеричная строка SHA-256.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr((KEY_VERSION, sorted(options.items()))).encode("utf-8"))
+    digest.update(text.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _canonical_labeling(colors: List[int], edges: List[List[Tuple[str, int]]],
+                        reverse: List[List[Tuple[str, int]]], names: List[str]) -> List[int]:
+    """
+    Нумерация состояний уточнением упорядоченного разбиения. Разбиение уточняется до устойчивого,
+    затем из первого неодноцветного класса выделяется состояние с наименьшим идентификатором,
+    и уточнение повторяется, пока все классы не станут одноэлементными. Выбор без перебора
+    ограничивает время построения, но для состояний, неразличимых уточнением и не переводимых
+    друг в друга автоморфизмом, нумерация зависит от идентификаторов.
+    :param colors: начальные цвета состояний.
+    :param edges: исходящие переходы состояний в виде пар (символ, состояние).
+    :param reverse: входящие переходы состояний в виде пар (символ, состояние).
+    :param names: идентификаторы состояний.
+    :return: номера состояний.
+    """
+    partition = _OrderedPartition(colors)
+    partition.refine(partition.cells(), edges, reverse)
+    start = 0
+    while start < len(colors):
+        end = partition.end[start]
+        if end - start == 1:
+            start = end
+            continue
+        chosen = min(partition.order[start:end], key=names.__getitem__)
+        partition.refine([partition.individualize(chosen)], edges, reverse)
+    return partition.position
+
+
+class _OrderedPartition:
+    """
+    Упорядоченное разбиение состояний на классы. Класс - отрезок списка order и обозначается
+    номером своего начала, поэтому порядок классов не зависит от идентификаторов состояний.
+    """
+
+    def __init__(self, colors: List[int]):
+        """
+        :param colors: начальные цвета состояний: номера от 0 подряд.
+        """
+        self.order = sorted(range(len(colors)), key=colors.__getitem__)
+        self.position = [0] * len(colors)
+        self.cell = [0] * len(colors)
+        self.end: Dict[int, int] = {}
+        start = 0
+        for i, state in enumerate(self.order):
+            self.position[state] = i
+            if i > 0 and colors[state] != colors[self.order[i - 1]]:
+                self.end[start] = i
+                start = i
+            self.cell[state] = start
+        if self.order:
+            self.end[start] = len(self.order)
+
+    def cells(self) -> List[int]:
+        """
+        Начала всех классов в порядке возрастания.
+        """
+        return sorted(self.end)
+
+    def individualize(self, state: int) -> int:
+        """
+        Выделение состояния в отдельный класс перед остальными состояниями его класса.
+        :return: начало нового одноэлементного класса.
+        """
+        start = self.cell[state]
+        self._move(state, start)
+        self.end[start + 1] = self.end[start]
+        self.end[start] = start + 1
+        for other in self.order[start + 1:self.end[start + 1]]:
+            self.cell[other] = start + 1
+        return start
+
+    def refine(self, splitters: List[int], edges: List[List[Tuple[str, int]]],
+               reverse: List[List[Tuple[str, int]]]):
+        """
+        Уточнение разбиения до устойчивого: состояния одного класса должны иметь одинаковое число
+        переходов по каждому символу в каждый класс и из каждого класса. Классы делятся по числу
+        переходов в класс-делитель и из него, части упорядочиваются по этим числам. Если
+        поделённый класс уже ожидает обработки, в очередь добавляются все части, иначе - все,
+        кроме наибольшей: число переходов в неё определяется числами для остальных частей.
+        :param splitters: начала классов, с которых начинается уточнение.
+        """
+        queue = deque(splitters)
+        pending = set(splitters)
+        while queue:
+            splitter = queue.popleft()
+            pending.discard(splitter)
+            counts: Dict[int, Dict[Tuple[bool, str], int]] = {}
+            for state in self.order[splitter:self.end[splitter]]:
+                for symbol, src in reverse[state]:
+                    key = (True, symbol)
+                    state_counts = counts.setdefault(src, {})
+                    state_counts[key] = state_counts.get(key, 0) + 1
+                for symbol, dst in edges[state]:
+                    key = (False, symbol)
+                    state_counts = counts.setdefault(dst, {})
+                    state_counts[key] = state_counts.get(key, 0) + 1
+
+            touched: Dict[int, List[int]] = {}
+            for state in counts:
+                touched.setdefault(self.cell[state], []).append(state)
+            for start in sorted(touched):
+                end = self.end[start]
+                signatures = {state: tuple(sorted(counts[state].items())) for state in touched[start]}
+                groups: Dict[Tuple, List[int]] = {}
+                for state, signature in signatures.items():
+                    groups.setdefault(signature, []).append(state)
+                untouched = end - start - len(signatures)
+                if len(groups) == 1 and untouched == 0:
+                    continue
+
+                # Состояния без переходов в делитель остаются в начале класса, остальные следуют за ними
+                bounds = [start] if untouched else []
+                position = start + untouched
+                for signature in sorted(groups):
+                    bounds.append(position)
+                    for state in groups[signature]:
+                        self._move(state, position)
+                        position += 1
+                bounds.append(end)
+                for part_start, part_end in zip(bounds, bounds[1:]):
+                    self.end[part_start] = part_end
+                    for state in self.order[part_start:part_end]:
+                        self.cell[state] = part_start
+
+                parts = bounds[:-1]
+                if start not in pending:
+                    largest = max(parts, key=lambda part: (self.end[part] - part, -part))
+                    parts = [part for part in parts if part != largest]
+                for part in parts:
+                    if part not in pending:
+                        pending.add(part)
+                        queue.append(part)
+
+    def _move(self, state: int, position: int):
+        """
+        Перестановка состояния на указанное место внутри его класса.
+        """
+        other = self.order[position]
+        current = self.position[state]
+        self.order[position], self.order[current] = state, other
+        self.position[state], self.position[other] = position, current
+
+
+def _is_key(key: str) -> bool:
+    """
+    Проверка того, что строка - ключ кэша: шестнадцатеричная строка SHA-256.
+    """
+    return len(key) == 64 and all(char in "0123456789abcdef" for char in key)
+
+
+def _rank(signatures: List[Tuple]) -> List[int]:
+    """
+    Замена значений их номерами в порядке сортировки различных значений.
+    """
+    ranks = {signature: rank for rank, signature in enumerate(sorted(set(signatures)))}
+    return [ranks[signature] for signature in signatures]
+
+
+class ConversionCache:
+    """
+    Кэш результатов nfa_to_dfa в каталоге на диске.
+    Ключ - канонический хэш НКА и параметров построения (см. canonical_hash), значение -
+    ДКА в двоичном формате (см. binary). Канонический хэш строится примерно так же долго, как ДКА,
+    поэтому для текста автомата сохраняется ещё и ссылка с быстрого ключа source_hash на
+    канонический: неизменившийся файл находится в кэше без разбора и построения хэша. Файлы записываются через временный файл и
+    переименование, поэтому читатели не видят частично записанных файлов. Использование
+    файла обновляет время его изменения; если размер каталога превышает max_size, то
+    удаляются давно не использовавшиеся файлы. Вытеснение выполняется под блокировкой
+    файла .lock, поэтому кэш можно использовать из нескольких процессов одновременно.
+    """
+
+    def __init__(self, directory: str, max_size: int = DEFAULT_MAX_SIZE):
+        """
+        :param directory: каталог кэша, создаётся при необходимости.
+        :param max_size: наибольший суммарный размер файлов кэша в байтах.
+        """
+        if max_size < 0:
+            raise ValueError("Размер кэша не может быть отрицательным.")
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._max_size = max_size
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def convert(self, nfa: Automaton, engine: str = "sets", minimize: bool = False,
+                trim: bool = False) -> Tuple[Automaton, bool]:
+        """
+        Получение ДКА из кэша или его построение с помощью nfa_to_dfa и сохранение в кэш.
+        Способ построения не влияет на результат и в ключ не входит.
+        :param nfa: недетерминированный автомат.
+        :param engine: способ построения ДКА.
+        :param minimize: минимизировать ли ДКА.
+        :param trim: удалить ли перед построением недостижимые и тупиковые состояния.
+        :return: ДКА и признак того, что он взят из кэша.
+        """
+        key = canonical_hash(nfa, minimize=minimize, trim=trim)
+        dfa = self.get(key)
+        if dfa is not None:
+            return dfa, True
+        dfa = nfa_to_dfa(nfa, engine=engine, minimize=minimize, trim=trim)
+        self.put(key, dfa)
+        return dfa, False
+
+    def convert_text(self, text: str, engine: str = "sets", minimize: bool = False,
+                     trim: bool = False) -> Tuple[Automaton, bool]:
+        """
+        Получение ДКА для автомата в dot формате. Сначала ДКА ищется по хэшу текста (см. source_hash),
+        затем текст разбирается и ДКА ищется по каноническому хэшу или строится (см. convert).
+        :param text: текст автомата в dot формате.
+        :param engine: способ построения ДКА.
+        :param minimize: минимизировать ли ДКА.
+        :param trim: удалить ли перед построением недостижимые и тупиковые состояния.
+        :return: ДКА и признак того, что он взят из кэша.
+        """
+        alias = self._alias_path(source_hash(text, minimize=minimize, trim=trim))
+        try:
+            with open(alias, "r", encoding="ascii") as alias_file:
+                key = alias_file.read()
+        except (OSError, UnicodeDecodeError):
+            key = None
+        if key is not None and _is_key(key):
+            dfa = self.get(key)
+            if dfa is not None:
+                with suppress(FileNotFoundError):
+                    os.utime(alias)
+                return dfa, True
+
+        nfa = read(text)
+        key = canonical_hash(nfa, minimize=minimize, trim=trim)
+        dfa = self.get(key)
+        cached = dfa is not None
+        if not cached:
+            dfa = nfa_to_dfa(nfa, engine=engine, minimize=minimize, trim=trim)
+            self._write(self._path(key), lambda cache_file: save(dfa, cache_file))
+        self._write(alias, lambda cache_file: cache_file.write(key.encode("ascii")))
+        self._evict()
+        return dfa, cached
+
+    def get(self, key: str) -> Optional[Automaton]:
+        """
+        Получение ДКА по ключу.
+        :param key: ключ (см. canonical_hash).
+        :return: ДКА или None, если ключа нет в кэше или файл повреждён. Повреждённый файл удаляется.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as cache_file:
+                dfa = load(cache_file).to_automaton()
+        except OSError:
+            self._misses += 1
+            return None
+        except BinaryFormatError:
+            self._misses += 1
+            with suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+        # Файл мог быть вытеснен другим процессом после чтения
+        with suppress(FileNotFoundError):
+            os.utime(path)
+        self._hits += 1
+        return dfa
+
+    def put(self, key: str, dfa: Automaton):
+        """
+        Сохранение ДКА и вытеснение старых файлов при превышении размера кэша.
+        :param key: ключ (см. canonical_hash).
+        :param dfa: детерминированный автомат.
+        """
+        self._write(self._path(key), lambda cache_file: save(dfa, cache_file))
+        self._evict()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Получение статистики работы кэша в текущем процессе.
+        :return: словарь со значениями hits, misses и evictions.
+        """
+        return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions}
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._directory, key + _SUFFIX)
+
+    def _alias_path(self, key: str) -> str:
+        return os.path.join(self._directory, key + _ALIAS_SUFFIX)
+
+    def _write(self, path: str, writer: Callable[[BinaryIO], object]):
+        """
+        Запись файла кэша через временный файл и переименование.
+        """
+        handle, temporary = tempfile.mkstemp(dir=self._directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as cache_file:
+                writer(cache_file)
+            os.replace(temporary, path)
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(temporary)
+            raise
+
+    def _evict(self):
+        """
+        Удаление давно не использовавшихся файлов, пока размер кэша превышает наибольший.
+        """
+        with self._lock():
+            entries = []
+            total = 0
+            with os.scandir(self._directory) as scan:
+                for entry in scan:
+                    if not entry.name.endswith((_SUFFIX, _ALIAS_SUFFIX)):
+                        continue
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((info.st_mtime, entry.path, info.st_size))
+                    total += info.st_size
+
+            entries.sort()
+            for _, path, size in entries:
+                if total <= self._max_size:
+                    break
+                with suppress(FileNotFoundError):
+                    os.remove(path)
+                    self._evictions += 1
+                total -= size
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        """
+        Исключительная блокировка каталога кэша между процессами.
+        Без модуля fcntl блокировка не выполняется.
+        """
+        with open(os.path.join(self._directory, _LOCK_NAME), "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,63 @@
+import argparse
+import sys
+from typing import List, Optional
+from nfa_converter.automaton import ENGINES, nfa_to_dfa
+from nfa_converter.batch import ConversionOptions, convert_many
+from nfa_converter.cache import CACHE_DIR_VARIABLE, DEFAULT_MAX_SIZE, ConversionCache, default_cache_dir
+from nfa_converter.readwrite import read, write_to
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа командной строки (python -m nfa_converter).
+    :param argv: аргументы командной строки без имени программы.
+    :return: код завершения: 0 - все файлы преобразованы, 1 - были ошибки.
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m nfa_converter",
+        description="Преобразование недетерминированных автоматов в dot формате в детерминированные. "
+                    "Если указан единственный файл \"-\", автомат читается из стандартного ввода, "
+                    "а результат выводится в стандартный вывод.")
+    parser.add_argument("files", nargs="+", help="файлы с НКА в dot формате")
+    parser.add_argument("-o", "--output-dir", help="каталог для результатов (по умолчанию - рядом с исходными)")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="число процессов (по умолчанию - число процессоров)")
+    parser.add_argument("--chunksize", type=int, default=1, help="число файлов, передаваемых процессу за раз")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="sets", help="способ построения ДКА")
+    parser.add_argument("--minimize", action="store_true", help="минимизировать полученные ДКА")
+    parser.add_argument("--trim", action="store_true",
+                        help="удалить недостижимые и тупиковые состояния НКА перед построением")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"каталог кэша результатов (по умолчанию - ${CACHE_DIR_VARIABLE} "
+                             f"или ~/.cache/nfa-converter)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_MAX_SIZE // (1024 * 1024),
+                        help="наибольший размер кэша в мегабайтах")
+    parser.add_argument("--no-cache", dest="cache", action="store_false", help="не использовать кэш результатов")
+    args = parser.parse_args(argv)
+    cache_size = args.cache_size * 1024 * 1024
+
+    if args.files == ["-"]:
+        try:
+            text = sys.stdin.read()
+            if args.cache:
+                cache = ConversionCache(args.cache_dir or default_cache_dir(), cache_size)
+                dfa, _ = cache.convert_text(text, engine=args.engine, minimize=args.minimize, trim=args.trim)
+            else:
+                dfa = nfa_to_dfa(read(text), engine=args.engine, minimize=args.minimize, trim=args.trim)
+        except Exception as e:
+            print(f"-: {type(e).__name__}: {e}", file=sys.stderr)
+            return 1
+        write_to(dfa, sys.stdout)
+        return 0
+
+    options = ConversionOptions(args.output_dir, args.engine, args.minimize, args.trim, args.cache_dir, cache_size,
+                                args.cache)
+    failed = False
+    for result in convert_many(args.files, workers=args.workers, chunksize=args.chunksize, options=options):
+        if result.error is None:
+            note = ", из кэша" if result.cached else ""
+            print(f"{result.source} -> {result.destination} ({result.states} состояний{note})")
+        else:
+            failed = True
+            print(f"{result.source}: {result.error}", file=sys.stderr)
+    return 1 if failed else 0
@@ -0,0 +1,369 @@
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+from nfa_converter.automaton import Automaton, StateNotFoundError, alphabetic_names
+from nfa_converter.symbols import is_class_label
+
+# Наибольшее число состояний, просматриваемых при поиске недостижимых состояний после
+# одного обновления. При его превышении достижимость проверяется обходом всего ДКА.
+_GARBAGE_SEARCH_LIMIT = 4096
+
+
+class IncrementalConverter:
+    """
+    Детерминизация автомата, который продолжает изменяться после построения ДКА.
+    Конвертер хранит соответствие состояний ДКА множествам состояний НКА и после изменения
+    НКА пересчитывает только переходы состояний ДКА, множества которых содержат изменённые
+    состояния НКА (см. Automaton.get_changed_states), переходы в такие состояния и переходы
+    из вновь достижимых состояний. Состояния ДКА, ставшие недостижимыми, удаляются.
+    Полученный автомат (см. get_dfa) изменяется на месте вместе с внутренними таблицами.
+    Идентификаторы состояний назначаются в порядке появления и не используются повторно,
+    поэтому после изменений они могут отличаться от результата nfa_to_dfa, хотя множества
+    состояний НКА, соответствующие состояниям ДКА, совпадают.
+    Изменение алфавита НКА приводит к полному перестроению.
+    """
+
+    def __init__(self, nfa: Automaton, naming: Callable[[int], str] = alphabetic_names):
+        """
+        Построение ДКА по исходному автомату.
+        :param nfa: недетерминированный автомат, журнал изменений которого использует конвертер.
+        Метки-классы символов (см. symbols) не поддерживаются.
+        :param naming: функция, сопоставляющая номеру состояния ДКА его идентификатор.
+        """
+        self._nfa = nfa
+        self._naming = naming
+        self._rebuilds = 0
+        self._rebuild()
+
+    def update(self) -> Dict[str, int]:
+        """
+        Учёт изменений НКА, сделанных после построения или предыдущего обновления.
+        :return: статистика обновления (см. get_stats).
+        """
+        nfa = self._nfa
+        changed = nfa.get_changed_states()
+        nfa.clear_changes()
+        # Конечные состояния НКА, используемые при создании состояний ДКА
+        self._nfa_final = nfa.get_final_states()
+        self._recomputed = 0
+        self._added = 0
+        self._removed = 0
+
+        if self._symbols(nfa) != self._alphabet:
+            self._rebuild()
+            return self.get_stats()
+
+        # Замыкания, содержащие изменённые состояния, могли измениться
+        for state in changed:
+            for user in self._closure_users.pop(state, ()):
+                self._closures.pop(user, None)
+
+        candidates: Set[int] = set()
+        start = self._intern(self._closure(nfa.get_start_states()))
+        if start != self._start:
+            candidates.add(self._start)
+            if self._dfa is not None:
+                self._dfa.remove_start_state(self._names[self._start])
+                self._dfa.set_start_states({self._names[start]})
+            self._start = start
+
+        dirty: Set[int] = set()
+        for state in changed:
+            dirty.update(self._containing.get(state, ()))
+        if not dirty and not self._queue:
+            return self.get_stats()
+
+        # Пересчитываются все переходы изменённых состояний ДКА и все переходы в них
+        edges: List[Tuple[int, str]] = []
+        for dfa_state in dirty:
+            self._set_final(dfa_state, not self._nfa_final.isdisjoint(self._subsets[dfa_state]))
+            edges.extend((dfa_state, symbol) for symbol in self._alphabet)
+            edges.extend(self._incoming[dfa_state])
+
+        candidates.update(dirty)
+        for src, symbol in edges:
+            if src in self._subsets:
+                self._set_transition(src, symbol, candidates)
+        self._expand_new(candidates)
+        self._collect_garbage(candidates)
+        return self.get_stats()
+
+    def get_dfa(self) -> Automaton:
+        """
+        Получение детерминированного автомата, соответствующего текущему НКА.
+        Автомат строится при первом вызове после построения или полного перестроения, а при
+        обновлениях изменяются только его состояния и переходы, затронутые изменением НКА,
+        поэтому возвращается тот же объект. Алфавит автомата - алфавит НКА без ε.
+        :return: детерминированный автомат.
+        """
+        if self._dfa is None:
+            names = self._names
+            edges = [(names[src], names[dst], symbol) for src, transitions in self._transitions.items()
+                     for symbol, dst in transitions.items()]
+            self._dfa = Automaton.from_edges("DFA", edges, {names[self._start]},
+                                             {names[dfa_state] for dfa_state, final in self._final.items() if final},
+                                             states=[names[dfa_state] for dfa_state in self._subsets],
+                                             alphabet=self._alphabet, trusted=True)
+        return self._dfa
+
+    def get_subset(self, state: str) -> FrozenSet[str]:
+        """
+        Получение множества состояний НКА, соответствующего состоянию ДКА.
+        :param state: идентификатор состояния ДКА.
+        :return: неизменяемое множество идентификаторов состояний НКА.
+        """
+        dfa_state = self._name_index.get(state)
+        if dfa_state is None:
+            raise StateNotFoundError(f"{state} отсутствует в списке состояний.")
+        return self._subsets[dfa_state]
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Получение статистики последнего обновления.
+        :return: словарь со значениями states (число состояний ДКА), recomputed (число
+        пересчитанных переходов), added и removed (число добавленных и удалённых состояний ДКА)
+        и rebuilds (число полных перестроений, включая первоначальное).
+        """
+        return {
+            "states": len(self._subsets),
+            "recomputed": self._recomputed,
+            "added": self._added,
+            "removed": self._removed,
+            "rebuilds": self._rebuilds,
+        }
+
+    def _rebuild(self):
+        """
+        Построение ДКА с нуля.
+        """
+        nfa = self._nfa
+        nfa.clear_changes()
+        self._nfa_final = nfa.get_final_states()
+        self._alphabet = self._symbols(nfa)
+        self._closures: Dict[str, FrozenSet[str]] = {}
+        # _closure_users[state] - состояния, в ε-замыкание которых входит state
+        self._closure_users: Dict[str, Set[str]] = {}
+        self._ids: Dict[FrozenSet[str], int] = {}
+        self._subsets: Dict[int, FrozenSet[str]] = {}
+        self._names: Dict[int, str] = {}
+        self._name_index: Dict[str, int] = {}
+        self._final: Dict[int, bool] = {}
+        self._transitions: Dict[int, Dict[str, int]] = {}
+        # _incoming[dfa_state] - пары "состояние, символ" переходов в dfa_state
+        self._incoming: Dict[int, Set[Tuple[int, str]]] = {}
+        # _containing[state] - состояния ДКА, множества которых содержат состояние НКА
+        self._containing: Dict[str, Set[int]] = {}
+        self._counter = 0
+        self._queue: List[int] = []
+        self._dfa: Optional[Automaton] = None
+        self._rebuilds += 1
+        self._recomputed = 0
+        self._added = 0
+        self._removed = 0
+
+        self._start = self._intern(self._closure(nfa.get_start_states()))
+        self._expand_new(set())
+
+    def _symbols(self, nfa: Automaton) -> List[str]:
+        """
+        Получение символов алфавита НКА в порядке сортировки.
+        """
+        alphabet = sorted(nfa.get_alphabet() - {"ε"})
+        if any(is_class_label(symbol) for symbol in alphabet):
+            raise ValueError("Инкрементальное построение не поддерживает метки-классы символов.")
+        return alphabet
+
+    def _closure(self, states: Iterable[str]) -> FrozenSet[str]:
+        """
+        Получение ε-замыкания множества состояний НКА с кэшированием замыканий отдельных состояний.
+        """
+        closure: Set[str] = set()
+        for state in states:
+            state_closure = self._closures.get(state)
+            if state_closure is None:
+                state_closure = self._state_closure(state)
+            closure |= state_closure
+        return frozenset(closure)
+
+    def _state_closure(self, state: str) -> FrozenSet[str]:
+        """
+        Вычисление ε-замыкания одного состояния НКА.
+        """
+        nfa = self._nfa
+        closure = {state}
+        stack = [state]
+        while stack:
+            current = stack.pop()
+            for dst in nfa.get_transitions_from(current).get("ε", ()):
+                if dst not in closure:
+                    closure.add(dst)
+                    stack.append(dst)
+
+        closure = frozenset(closure)
+        self._closures[state] = closure
+        for member in closure:
+            self._closure_users.setdefault(member, set()).add(state)
+        return closure
+
+    def _intern(self, subset: FrozenSet[str]) -> int:
+        """
+        Получение номера состояния ДКА по множеству состояний НКА с созданием нового состояния.
+        Новые состояния ставятся в очередь на вычисление переходов.
+        """
+        dfa_state = self._ids.get(subset)
+        if dfa_state is not None:
+            return dfa_state
+
+        dfa_state = self._counter
+        self._counter += 1
+        name = self._naming(dfa_state)
+        self._ids[subset] = dfa_state
+        self._subsets[dfa_state] = subset
+        self._names[dfa_state] = name
+        self._name_index[name] = dfa_state
+        self._final[dfa_state] = False
+        if self._dfa is not None:
+            self._dfa.add_state(name)
+        self._set_final(dfa_state, not self._nfa_final.isdisjoint(subset))
+        self._transitions[dfa_state] = {}
+        self._incoming[dfa_state] = set()
+        for state in subset:
+            self._containing.setdefault(state, set()).add(dfa_state)
+        self._queue.append(dfa_state)
+        self._added += 1
+        return dfa_state
+
+    def _set_transition(self, src: int, symbol: str, orphans: Set[int]):
+        """
+        Пересчёт перехода из состояния ДКА по символу.
+        :param src: номер состояния ДКА.
+        :param symbol: символ перехода.
+        :param orphans: множество, в которое добавляются состояния, потерявшие входящий переход.
+        """
+        self._recomputed += 1
+        moves: Set[str] = set()
+        for state in self._subsets[src]:
+            moves.update(self._nfa.get_transitions_from(state).get(symbol, ()))
+        dst = self._intern(self._closure(moves)) if moves else None
+
+        transitions = self._transitions[src]
+        old_dst = transitions.get(symbol)
+        if old_dst == dst:
+            return
+        names = self._names
+        if old_dst is not None:
+            self._incoming[old_dst].discard((src, symbol))
+            orphans.add(old_dst)
+            if self._dfa is not None:
+                self._dfa.remove_transition(names[src], names[old_dst], symbol)
+        if dst is None:
+            del transitions[symbol]
+        else:
+            transitions[symbol] = dst
+            self._incoming[dst].add((src, symbol))
+            if self._dfa is not None:
+                self._dfa.add_transition(names[src], names[dst], symbol)
+
+    def _set_final(self, dfa_state: int, final: bool):
+        """
+        Указание признака конечности состояния ДКА.
+        """
+        if self._final[dfa_state] == final:
+            return
+        self._final[dfa_state] = final
+        if self._dfa is not None:
+            if final:
+                self._dfa.add_final_state(self._names[dfa_state])
+            else:
+                self._dfa.remove_final_state(self._names[dfa_state])
+
+    def _expand_new(self, orphans: Set[int]):
+        """
+        Вычисление переходов из состояний ДКА, стоящих в очереди, в порядке их появления.
+        """
+        queue = self._queue
+        position = 0
+        while position < len(queue):
+            dfa_state = queue[position]
+            for symbol in self._alphabet:
+                self._set_transition(dfa_state, symbol, orphans)
+            position += 1
+        queue.clear()
+
+    def _collect_garbage(self, candidates: Set[int]):
+        """
+        Удаление состояний ДКА, ставших недостижимыми из начального.
+        Для каждого кандидата просматриваются его предки: если среди них нет начального
+        состояния, то недостижимы и кандидат, и все его предки. Состояния, в которые
+        вели переходы из удалённых, также проверяются.
+        :param candidates: состояния, которые могли стать недостижимыми.
+        """
+        budget = _GARBAGE_SEARCH_LIMIT
+        worklist = list(candidates)
+        while worklist:
+            candidate = worklist.pop()
+            if candidate not in self._subsets:
+                continue
+
+            ancestors = {candidate}
+            stack = [candidate]
+            reachable = False
+            while stack and not reachable:
+                dfa_state = stack.pop()
+                budget -= 1
+                if dfa_state == self._start or budget < 0:
+                    reachable = True
+                    break
+                for src, _ in self._incoming[dfa_state]:
+                    if src not in ancestors:
+                        ancestors.add(src)
+                        stack.append(src)
+
+            if budget < 0:
+                self._sweep()
+                return
+            if not reachable:
+                for dfa_state in ancestors:
+                    worklist.extend(self._remove(dfa_state))
+
+    def _sweep(self):
+        """
+        Удаление всех недостижимых состояний обходом ДКА из начального состояния.
+        """
+        reachable = {self._start}
+        stack = [self._start]
+        while stack:
+            for dst in self._transitions[stack.pop()].values():
+                if dst not in reachable:
+                    reachable.add(dst)
+                    stack.append(dst)
+        for dfa_state in [dfa_state for dfa_state in self._subsets if dfa_state not in reachable]:
+            self._remove(dfa_state)
+
+    def _remove(self, dfa_state: int) -> List[int]:
+        """
+        Удаление состояния ДКА.
+        :return: состояния, в которые вели переходы из удалённого.
+        """
+        if self._dfa is not None:
+            names = self._names
+            self._dfa.remove_state(names[dfa_state], predecessors=[names[src] for src, _ in self._incoming[dfa_state]
+                                                                   if src in names])
+        subset = self._subsets.pop(dfa_state)
+        del self._ids[subset]
+        del self._name_index[self._names.pop(dfa_state)]
+        del self._final[dfa_state]
+        for state in subset:
+            containing = self._containing[state]
+            containing.discard(dfa_state)
+            if not containing:
+                del self._containing[state]
+
+        targets = []
+        for symbol, dst in self._transitions.pop(dfa_state).items():
+            if dst in self._incoming:
+                self._incoming[dst].discard((dfa_state, symbol))
+                targets.append(dst)
+        for src, symbol in self._incoming.pop(dfa_state):
+            if src in self._transitions:
+                del self._transitions[src][symbol]
+        self._removed += 1
+        return targets
@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from nfa_converter.automaton import Automaton, epsilon_closures, shifted_members, shifted_union
+from nfa_converter.symbols import SymbolCache
+
+
+class LazyDFA:
+    """
+    Проверка допуска слов недетерминированным автоматом без его полной детерминизации.
+    Состояния ДКА (битовые множества состояний НКА со сдвигом, см. automaton.shifted_union)
+    строятся по мере чтения входа и
+    хранятся в ограниченном кэше с вытеснением давно не использовавшихся состояний.
+    Если во время проверки одного слова кэш вытесняется слишком часто, оставшаяся часть
+    слова обрабатывается прямым моделированием множества состояний НКА без кэширования.
+    """
+
+    def __init__(self, nfa: Automaton, cache_size: int = 10000, max_evictions: Optional[int] = None):
+        """
+        Подготовка автомата к проверке слов.
+        :param nfa: недетерминированный автомат.
+        :param cache_size: наибольшее число состояний ДКА в кэше.
+        :param max_evictions: число вытеснений во время проверки одного слова, после которого
+        проверка продолжается без кэша. По умолчанию равно размеру кэша.
+        """
+        if cache_size < 1:
+            raise ValueError("Размер кэша должен быть положительным.")
+
+        frozen = nfa.freeze()
+        closures = epsilon_closures(frozen)
+        width = len(frozen.symbols)
+
+        self._cache_size = cache_size
+        self._max_evictions = cache_size if max_evictions is None else max_evictions
+        # Номера символов алфавита вычисляются при первой встрече символа во входном слове,
+        # так как символ перехода может быть классом символов
+        self._frozen = frozen
+        self._alphabet = set(frozen.alphabet)
+        self._symbol_index: Dict[str, Optional[int]] = SymbolCache(self._find_symbol)
+
+        # _successors[state][symbol] - ε-замыкание состояний, в которые ведут переходы по символу
+        self._successors: List[Dict[int, Tuple[int, int]]] = []
+        for state in range(len(frozen.states)):
+            row = {}
+            for symbol in frozen.alphabet:
+                cell = state * width + symbol
+                begin, end = frozen.offsets[cell], frozen.offsets[cell + 1]
+                if begin != end:
+                    row[symbol] = shifted_union([closures[target] for target in frozen.targets[begin:end]])
+            self._successors.append(row)
+
+        self._final_mask = 0
+        for state, is_final in enumerate(frozen.final):
+            if is_final:
+                self._final_mask |= 1 << state
+        self._start = shifted_union([closures[state] for state in frozen.start_states])
+
+        self._cache: "OrderedDict[Tuple[int, int], Dict[int, Tuple[int, int]]]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._fallbacks = 0
+
+    def match(self, word: str) -> bool:
+        """
+        Проверка допуска слова автоматом.
+        :param word: проверяемое слово.
+        :return: True, если слово допускается автоматом.
+        """
+        state = self._start
+        evictions_before = self._evictions
+        for position, symbol in enumerate(word):
+            symbol_id = self._symbol_index[symbol]
+            if symbol_id is None:
+                return False
+            state = self._step(state, symbol_id)
+            if not state[1]:
+                return False
+            if self._evictions - evictions_before > self._max_evictions:
+                self._fallbacks += 1
+                return self._simulate(state, word, position + 1)
+        return self._is_final(state)
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Получение статистики работы кэша.
+        :return: словарь со значениями cached_states, hits, misses, evictions и fallbacks.
+        """
+        return {
+            "cached_states": len(self._cache),
+            "hits": self._hits,
+            "misses": self._misses,
+            "evictions": self._evictions,
+            "fallbacks": self._fallbacks,
+        }
+
+    def _find_symbol(self, char: str) -> Optional[int]:
+        """
+        Поиск символа алфавита, которому соответствует символ входного слова.
+        :param char: символ входного слова.
+        :return: номер символа или None, если символ не входит в алфавит.
+        """
+        symbol = self._frozen.find_symbol(char)
+        return symbol if symbol in self._alphabet else None
+
+    def _is_final(self, state: Tuple[int, int]) -> bool:
+        """
+        Проверка, содержит ли множество состояний НКА конечное состояние.
+        """
+        base, bits = state
+        return bits & self._final_mask >> base != 0
+
+    def _step(self, state: Tuple[int, int], symbol: int) -> Tuple[int, int]:
+        """
+        Переход из состояния ДКА по символу с использованием кэша.
+        :param state: битовое множество состояний НКА со сдвигом.
+        :param symbol: номер символа.
+        :return: битовое множество состояний НКА со сдвигом после перехода ((0, 0), если их нет).
+        """
+        transitions = self._cache.get(state)
+        if transitions is None:
+            transitions = {}
+            self._cache[state] = transitions
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+        else:
+            self._cache.move_to_end(state)
+
+        next_state = transitions.get(symbol)
+        if next_state is None:
+            self._misses += 1
+            next_state = self._move(state, symbol)
+            transitions[symbol] = next_state
+        else:
+            self._hits += 1
+        return next_state
+
+    def _move(self, state: Tuple[int, int], symbol: int) -> Tuple[int, int]:
+        """
+        Вычисление перехода из множества состояний НКА по символу.
+        :param state: битовое множество состояний НКА со сдвигом.
+        :param symbol: номер символа.
+        :return: битовое множество состояний НКА со сдвигом после перехода.
+        """
+        successors = self._successors
+        return shifted_union([successors[nfa_state][symbol] for nfa_state in shifted_members(state)
+                              if symbol in successors[nfa_state]])
+
+    def _simulate(self, state: Tuple[int, int], word: str, start: int) -> bool:
+        """
+        Моделирование НКА на оставшейся части слова без использования кэша.
+        :param state: текущее битовое множество состояний НКА со сдвигом.
+        :param word: проверяемое слово.
+        :param start: позиция, с которой продолжается чтение слова.
+        :return: True, если слово допускается автоматом.
+        """
+        for position in range(start, len(word)):
+            symbol_id = self._symbol_index[word[position]]
+            if symbol_id is None:
+                return False
+            state = self._move(state, symbol_id)
+            if not state[1]:
+                return False
+        return self._is_final(state)
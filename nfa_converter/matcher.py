@@ -0,0 +1,193 @@
+from array import array
+from typing import Callable, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+from nfa_converter.automaton import Automaton, AutomatonType, FrozenAutomaton, NotDeterministicError, INDEX_TYPECODE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Класс символов, не встречающихся в переходах автомата: любой переход по нему ведёт в тупик
+_UNKNOWN_CLASS = 0
+
+
+class _ClassTranslation(dict):
+    """
+    Таблица для str.translate, заменяющая символы на коды их классов.
+    Код символа, которого нет в таблице, вычисляется функцией classify
+    и запоминается, без неё такие символы заменяются кодом неизвестного класса.
+    """
+
+    def __init__(self, codes: Dict[int, str], classify: Optional[Callable[[str], int]] = None):
+        super().__init__(codes)
+        self._classify = classify
+
+    def __missing__(self, key: int) -> str:
+        if self._classify is None:
+            return chr(_UNKNOWN_CLASS)
+        code = chr(self._classify(chr(key)))
+        self[key] = code
+        return code
+
+
+class DFATables(NamedTuple):
+    """
+    Таблицы табличного автомата для построения на их основе других способов прохода (см. scan).
+    """
+    table: Sequence[int]  # таблица переходов, значения - смещения строк
+    width: int  # ширина строки таблицы
+    start: int  # смещение строки начального состояния
+    accepting: Sequence[int]  # признаки допускающих состояний по номерам строк
+    tags: Dict[int, FrozenSet[str]]  # метки допускающих состояний по номерам строк
+    translation: Dict[int, str]  # таблица для str.translate: код символа -> символ с кодом класса
+
+
+class CompiledDFA:
+    """
+    Табличное представление детерминированного автомата для быстрой проверки слов.
+    Строка таблицы соответствует состоянию, столбец - классу символа. Нулевое состояние -
+    тупиковое, нулевой класс - символы вне алфавита, последний класс используется для
+    выравнивания слов разной длины при пакетной проверке и не меняет состояние.
+    Значения в таблице хранятся уже умноженными на ширину строки, чтобы переход
+    выполнялся одним обращением к массиву.
+    """
+
+    def __init__(self, table: Sequence[int], width: int, start: int, accepting: Sequence[int],
+                 classes: Dict[str, int], classify: Optional[Callable[[str], int]] = None,
+                 tags: Optional[Dict[int, FrozenSet[str]]] = None):
+        """
+        Инициализация табличного автомата.
+        :param table: таблица переходов размера "число состояний * width".
+        :param width: число классов символов, включая служебные.
+        :param start: смещение строки начального состояния.
+        :param accepting: признаки допускающих состояний (1 - допускающее).
+        :param classes: соответствие символов номерам их классов.
+        :param classify: функция, вычисляющая номер класса для символа, которого нет в classes
+        (например, для символа из диапазона [a-z]).
+        :param tags: непустые множества меток допускающих состояний по номерам строк таблицы.
+        """
+        self._table = table
+        self._width = width
+        self._start = start
+        self._accepting = accepting
+        self._classes = classes
+        self._tags = tags or {}
+        self._translation = _ClassTranslation({ord(symbol): chr(code) for symbol, code in classes.items()
+                                               if len(symbol) == 1}, classify)
+        self._numpy_tables = None
+
+    def match(self, word: str) -> bool:
+        """
+        Проверка допуска слова автоматом.
+        :param word: проверяемое слово.
+        :return: True, если слово допускается автоматом.
+        """
+        table = self._table
+        state = self._start
+        for code in self.encode(word):
+            state = table[state + code]
+        return self._accepting[state // self._width] == 1
+
+    def get_tables(self) -> DFATables:
+        """
+        Получение таблиц автомата. Таблицы предназначены только для чтения.
+        :return: таблица переходов, признаки допуска, метки и таблица классов символов.
+        """
+        return DFATables(self._table, self._width, self._start, self._accepting, self._tags, self._translation)
+
+    def match_tags(self, word: str) -> FrozenSet[str]:
+        """
+        Получение меток состояния, в которое автомат переходит по слову.
+        :param word: проверяемое слово.
+        :return: метки допускающего состояния (см. Automaton.set_tags) или пустое множество,
+        если слово не допускается или состояние не помечено.
+        """
+        table = self._table
+        state = self._start
+        for code in self.encode(word):
+            state = table[state + code]
+        return self._tags.get(state // self._width, frozenset())
+
+    def match_many(self, words: Iterable[str]) -> Iterator[bool]:
+        """
+        Последовательная проверка допуска слов.
+        :param words: проверяемые слова.
+        :return: итератор результатов проверки в порядке следования слов.
+        """
+        for word in words:
+            yield self.match(word)
+
+    def match_batch(self, words: Sequence[str]) -> List[bool]:
+        """
+        Пакетная проверка допуска слов: все слова продвигаются по автомату одновременно,
+        по одному символу за шаг. При наличии NumPy шаг выполняется одной векторной
+        операцией, иначе слова проверяются по очереди.
+        :param words: проверяемые слова.
+        :return: список результатов проверки в порядке следования слов.
+        """
+        if numpy is None or len(words) == 0:
+            return list(self.match_many(words))
+
+        width = self._width
+        padding = width - 1
+        length = max(len(word) for word in words)
+        codes = numpy.full((len(words), length), padding, dtype=numpy.int32)
+        for row, word in enumerate(words):
+            codes[row, :len(word)] = numpy.fromiter(self.encode(word), dtype=numpy.int32, count=len(word))
+
+        if self._numpy_tables is None:
+            table = numpy.asarray(self._table, dtype=numpy.int64).reshape(-1, width) // width
+            accepting = numpy.frombuffer(bytes(self._accepting), dtype=numpy.uint8).astype(bool)
+            self._numpy_tables = (table, accepting)
+        table, accepting = self._numpy_tables
+        states = numpy.full(len(words), self._start // width, dtype=numpy.int64)
+        for position in range(length):
+            states = table[states, codes[:, position]]
+        return accepting[states].tolist()
+
+    def encode(self, word: str) -> Iterable[int]:
+        """
+        Замена символов слова кодами их классов.
+        :param word: слово.
+        :return: последовательность кодов классов.
+        """
+        translated = word.translate(self._translation)
+        if self._width <= 256:
+            return translated.encode("latin-1")
+        return map(ord, translated)
+
+
+def compile(dfa: Union[Automaton, FrozenAutomaton]) -> CompiledDFA:
+    """
+    Построение таблицы переходов детерминированного автомата.
+    :param dfa: детерминированный автомат или его компактное представление.
+    :return: табличный автомат.
+    """
+    frozen = dfa.freeze()
+    if frozen.get_type() != AutomatonType.DFA or len(frozen.start_states) > 1:
+        raise NotDeterministicError("Таблица переходов строится только для детерминированного автомата.")
+
+    symbols = frozen.symbols
+    offsets = frozen.offsets
+    targets = frozen.targets
+    symbol_count = len(symbols)
+    # Классы: неизвестный символ, символы автомата, выравнивание
+    width = symbol_count + 2
+    classes = {symbol: code + 1 for code, symbol in enumerate(symbols)}
+
+    table = array(INDEX_TYPECODE, [0] * (width * (len(frozen.states) + 1)))
+    accepting = bytearray(len(frozen.states) + 1)
+    for state in range(len(frozen.states)):
+        row = (state + 1) * width
+        for symbol in range(symbol_count):
+            cell = state * symbol_count + symbol
+            if offsets[cell] != offsets[cell + 1]:
+                table[row + symbol + 1] = (targets[offsets[cell]] + 1) * width
+        table[row + width - 1] = row
+        accepting[state + 1] = frozen.final[state]
+
+    start = (frozen.start_states[0] + 1) * width if len(frozen.start_states) > 0 else 0
+    # Номер символа -1 (символ не встречается в переходах) соответствует неизвестному классу
+    tags = {state + 1: state_tags for state, state_tags in frozen.tags.items()}
+    return CompiledDFA(table, width, start, bytes(accepting), classes,
+                       lambda char: frozen.find_symbol(char) + 1, tags)
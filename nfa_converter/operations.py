@@ -0,0 +1,462 @@
+import itertools
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from nfa_converter.automaton import Automaton, alphabetic_names, epsilon_closures, numeric_names, shifted_members, \
+    shifted_union
+from nfa_converter.symbols import is_class_label, parse_label, partition
+
+# Состояние операнда: битовое множество состояний НКА со сдвигом (см. automaton.shifted_union)
+_State = Tuple[int, int]
+# Пустое множество - «мёртвое» состояние операнда
+_EMPTY: _State = (0, 0)
+
+
+def intersect(first: Automaton, second: Automaton, determinize: bool = True,
+              naming: Callable[[int], str] = alphabetic_names) -> Automaton:
+    """
+    Построение автомата, допускающего слова, допускаемые обоими автоматами.
+    :param first: первый автомат.
+    :param second: второй автомат.
+    :param determinize: строить ли детерминированный автомат. Иначе состояния результата -
+    пары состояний исходных автоматов, и результат может быть недетерминированным.
+    :param naming: функция, сопоставляющая номеру состояния результата его идентификатор.
+    :return: автомат для пересечения языков.
+    """
+    return _product([first, second], [False, False], determinize, naming,
+                    accept=all, viable=all, alphabet=set.intersection)
+
+
+def union(first: Automaton, second: Automaton, determinize: bool = True,
+          naming: Callable[[int], str] = alphabetic_names) -> Automaton:
+    """
+    Построение автомата, допускающего слова, допускаемые хотя бы одним из автоматов.
+    :param first: первый автомат.
+    :param second: второй автомат.
+    :param determinize: строить ли детерминированный автомат (см. intersect).
+    :param naming: функция, сопоставляющая номеру состояния результата его идентификатор.
+    :return: автомат для объединения языков.
+    """
+    return _product([first, second], [False, False], determinize, naming,
+                    accept=any, viable=any, alphabet=set.union)
+
+
+def difference(first: Automaton, second: Automaton, determinize: bool = True,
+               naming: Callable[[int], str] = alphabetic_names) -> Automaton:
+    """
+    Построение автомата, допускающего слова, допускаемые первым автоматом и не допускаемые вторым.
+    Второй автомат всегда детерминизируется по мере обхода.
+    :param first: уменьшаемое.
+    :param second: вычитаемое.
+    :param determinize: детерминизировать ли первый автомат (см. intersect).
+    :param naming: функция, сопоставляющая номеру состояния результата его идентификатор.
+    :return: автомат для разности языков.
+    """
+    return _product([first, second], [False, True], determinize, naming,
+                    accept=lambda finals: finals[0] and not finals[1],
+                    viable=lambda lives: lives[0],
+                    alphabet=lambda symbols, _: symbols)
+
+
+def complement(automaton: Automaton, alphabet: Optional[Set[str]] = None,
+               naming: Callable[[int], str] = alphabetic_names) -> Automaton:
+    """
+    Построение детерминированного автомата, допускающего все слова над алфавитом,
+    которые не допускает исходный автомат.
+    :param automaton: исходный автомат.
+    :param alphabet: алфавит, относительно которого строится дополнение. По умолчанию -
+    алфавит исходного автомата.
+    :param naming: функция, сопоставляющая номеру состояния результата его идентификатор.
+    :return: автомат для дополнения языка.
+    """
+    return _product([automaton], [True], True, naming,
+                    accept=lambda finals: not finals[0],
+                    viable=lambda lives: True,
+                    alphabet=lambda symbols: symbols,
+                    extra_labels=alphabet)
+
+
+def combine(rules: Dict[str, Automaton], naming: Callable[[int], str] = numeric_names) -> Automaton:
+    """
+    Объединение автоматов-правил с пометкой их конечных состояний именами правил (см.
+    Automaton.set_tags). Новое начальное состояние связывается ε-переходами с начальными
+    состояниями всех правил. Состояние ДКА, построенного по результату nfa_to_dfa, помечено
+    именами всех правил, допускающих прочитанное слово, поэтому один проход по тексту
+    показывает, какие правила сработали (см. scan).
+    :param rules: автоматы по именам правил.
+    :param naming: функция, сопоставляющая номеру состояния результата его идентификатор.
+    Начальное состояние имеет номер 0, затем следуют состояния правил в порядке rules.
+    :return: недетерминированный автомат с ε-переходами.
+    """
+    names = [naming(0)]
+    edges = []
+    final_states = set()
+    tags = {}
+    alphabet = set()
+    for rule, automaton in rules.items():
+        index = {}
+        for state in sorted(automaton.get_states()):
+            index[state] = naming(len(names))
+            names.append(index[state])
+        for src, transitions in automaton.get_all_transitions().items():
+            for symbol, dst_states in transitions.items():
+                edges.extend((index[src], index[dst], symbol) for dst in dst_states)
+        edges.extend((names[0], index[state], "ε") for state in automaton.get_start_states())
+        for state in automaton.get_final_states():
+            final_states.add(index[state])
+            tags[index[state]] = automaton.get_tags().get(state, frozenset()) | {rule}
+        alphabet |= automaton.get_alphabet()
+
+    result = Automaton.from_edges("eNFA", edges, {names[0]}, final_states, states=names, alphabet=alphabet,
+                                  trusted=True)
+    result.set_tags(tags)
+    return result
+
+
+def is_empty(automaton: Automaton) -> bool:
+    """
+    Проверка пустоты языка автомата: достижимо ли из начальных состояний конечное.
+    :param automaton: автомат.
+    :return: True, если автомат не допускает ни одного слова.
+    """
+    _, members = _symbol_classes([automaton])
+    return _Operand(automaton, members, True).starts == [_EMPTY]
+
+
+def equivalent(first: Automaton, second: Automaton) -> bool:
+    """
+    Проверка равенства языков двух автоматов (см. counterexample).
+    :param first: первый автомат.
+    :param second: второй автомат.
+    :return: True, если автоматы допускают одни и те же слова.
+    """
+    return counterexample(first, second) is None
+
+
+def counterexample(first: Automaton, second: Automaton) -> Optional[str]:
+    """
+    Поиск кратчайшего слова, которое допускает ровно один из автоматов.
+    Равенство языков проверяется алгоритмом Хопкрофта - Карпа: пары состояний ДКА
+    объединяются в системе непересекающихся множеств, и пара, состояния которой уже
+    находятся в одном множестве, повторно не рассматривается. Недетерминированные
+    автоматы детерминизируются по мере обхода, поэтому строятся только состояния ДКА,
+    достижимые одновременно с состояниями другого автомата. Если языки различаются,
+    кратчайшее слово находится обходом в ширину пар состояний.
+    Для символа перехода-класса в слово записывается наименьший символ класса.
+    :param first: первый автомат.
+    :param second: второй автомат.
+    :return: различающее слово или None, если языки автоматов равны.
+    """
+    symbols, members = _symbol_classes([first, second])
+    operands = [_Operand(first, members, True), _Operand(second, members, True)]
+    symbol_ids = sorted(operands[0].alphabet | operands[1].alphabet)
+    start = (operands[0].starts[0], operands[1].starts[0])
+
+    if _hopcroft_karp(operands, symbol_ids, start):
+        return None
+    return "".join(_representative(symbols[symbol]) for symbol in _shortest_difference(operands, symbol_ids, start))
+
+
+class _Operand:
+    """
+    Автомат-операнд, переходы которого вычисляются по общему для всех операндов
+    разбиению символов. Состояние операнда - множество состояний НКА (см. _State), из которого
+    исключены состояния, не ведущие в конечные (пустое множество - «мёртвое» состояние).
+    При детерминизации по мере обхода множество содержит ε-замыкание всех состояний,
+    в которые ведут переходы, иначе каждое состояние НКА рассматривается отдельно.
+    """
+
+    def __init__(self, automaton: Automaton, members: Dict[str, List[int]], determinize: bool):
+        """
+        Подготовка таблиц переходов операнда.
+        :param automaton: исходный автомат.
+        :param members: номера общих классов символов для каждой метки перехода.
+        :param determinize: детерминизировать ли автомат по мере обхода.
+        """
+        frozen = automaton.freeze()
+        closures = epsilon_closures(frozen)
+        state_index = frozen.state_index
+        self.determinize = determinize
+        self.alphabet = {symbol_id for label in automaton.get_alphabet() if label != "ε"
+                         for symbol_id in members[label]}
+
+        # _successors[state][symbol] - ε-замыкание состояний, в которые ведут переходы по символу
+        self._successors: List[Dict[int, _State]] = []
+        for state in frozen.states:
+            row: Dict[int, _State] = {}
+            for label, dst_states in automaton.get_transitions_from(state).items():
+                if label == "ε" or not dst_states:
+                    continue
+                closure = shifted_union([closures[state_index[dst]] for dst in dst_states])
+                for symbol_id in members[label]:
+                    if symbol_id in self.alphabet:
+                        row[symbol_id] = shifted_union([row[symbol_id], closure]) if symbol_id in row else closure
+            self._successors.append(row)
+
+        # Признаки конечности и непустоты языка из состояния хранятся как битовые множества
+        # всех состояний НКА: по одному числу на автомат
+        self._final_mask = 0
+        for state, is_final in enumerate(frozen.final):
+            if is_final:
+                self._final_mask |= 1 << state
+        self._live_mask = self._coreachable(frozen.final)
+        self.starts = self._split(self._restrict(shifted_union([closures[state] for state in frozen.start_states])))
+
+    def is_final(self, state: _State) -> bool:
+        """
+        Проверка, является ли состояние операнда конечным.
+        """
+        base, bits = state
+        return bits & self._final_mask >> base != 0
+
+    def move(self, state: _State, symbol: int) -> List[_State]:
+        """
+        Переход из состояния операнда по символу.
+        :param state: множество состояний НКА.
+        :param symbol: номер общего класса символов.
+        :return: состояния после перехода; при детерминизации - ровно одно.
+        """
+        successors = self._successors
+        moves = [successors[nfa_state][symbol] for nfa_state in shifted_members(state) if symbol in successors[nfa_state]]
+        return self._split(self._restrict(shifted_union(moves)))
+
+    def _restrict(self, state: _State) -> _State:
+        """
+        Исключение из множества состояний, не ведущих в конечные.
+        """
+        base, bits = state
+        bits &= self._live_mask >> base
+        if not bits:
+            return _EMPTY
+        # Сдвиг снова равен наименьшему номеру состояния в множестве
+        shift = (bits & -bits).bit_length() - 1
+        return base + shift, bits >> shift
+
+    def _split(self, state: _State) -> List[_State]:
+        """
+        Разбиение множества состояний на состояния операнда.
+        """
+        if self.determinize or state == _EMPTY:
+            return [state]
+        return [(nfa_state, 1) for nfa_state in shifted_members(state)]
+
+    def _coreachable(self, final: Sequence[int]) -> int:
+        """
+        Поиск состояний, из которых достижимо конечное состояние.
+        :param final: признаки конечности состояний.
+        :return: битовое множество найденных состояний.
+        """
+        predecessors: List[Set[int]] = [set() for _ in final]
+        for src, row in enumerate(self._successors):
+            for closure in row.values():
+                for dst in shifted_members(closure):
+                    predecessors[dst].add(src)
+
+        # ε-переходы не учитываются: состояния операнда замкнуты по ε, поэтому состояние,
+        # из которого конечное достижимо только по ε-переходам, входит в них вместе с конечным
+        stack = [state for state, is_final in enumerate(final) if is_final]
+        live = set(stack)
+        while stack:
+            for src in predecessors[stack.pop()]:
+                if src not in live:
+                    live.add(src)
+                    stack.append(src)
+
+        mask = 0
+        for state in live:
+            mask |= 1 << state
+        return mask
+
+
+def _product(automata: List[Automaton], complemented: List[bool], determinize: bool,
+             naming: Callable[[int], str], accept: Callable[[Sequence[bool]], bool],
+             viable: Callable[[Sequence[bool]], bool], alphabet: Callable[..., Set[int]],
+             extra_labels: Optional[Iterable[str]] = None) -> Automaton:
+    """
+    Построение произведения автоматов обходом в ширину достижимых состояний произведения.
+    Состояния, из которых результат не может допустить ни одного слова, не создаются.
+    :param automata: операнды.
+    :param complemented: признаки операндов, язык которых входит в результат через
+    дополнение; такие операнды всегда детерминизируются.
+    :param determinize: детерминизировать ли остальные операнды.
+    :param naming: функция, сопоставляющая номеру состояния результата его идентификатор.
+    :param accept: признак конечности состояния произведения по признакам конечности
+    состояний операндов.
+    :param viable: признак того, что состояние произведения может вести в конечное, по
+    признакам непустоты состояний операндов. После обхода удаляются и остальные
+    состояния, не ведущие в конечные.
+    :param alphabet: функция, получающая алфавит результата по алфавитам операндов.
+    :param extra_labels: дополнительные символы алфавита результата.
+    :return: автомат-произведение.
+    """
+    symbols, members = _symbol_classes(automata, extra_labels)
+    operands = [_Operand(automaton, members, determinize or is_complemented)
+                for automaton, is_complemented in zip(automata, complemented)]
+    symbol_ids = sorted(alphabet(*(operand.alphabet for operand in operands)) |
+                        {symbol_id for label in extra_labels or () for symbol_id in members[label]})
+
+    def is_viable(state: Tuple[_State, ...]) -> bool:
+        return viable([component != _EMPTY for component in state])
+
+    index: Dict[Tuple[_State, ...], int] = {}
+    queue: List[Tuple[_State, ...]] = []
+    for state in itertools.product(*(operand.starts for operand in operands)):
+        if is_viable(state) and state not in index:
+            index[state] = len(queue)
+            queue.append(state)
+    start_count = len(queue)
+
+    transitions: List[List[Tuple[int, int]]] = []
+    for state in queue:
+        moves = []
+        for symbol in symbol_ids:
+            targets = [operand.move(component, symbol) for operand, component in zip(operands, state)]
+            for next_state in itertools.product(*targets):
+                if not is_viable(next_state):
+                    continue
+                next_id = index.get(next_state)
+                if next_id is None:
+                    next_id = index[next_state] = len(queue)
+                    queue.append(next_state)
+                moves.append((symbol, next_id))
+        transitions.append(moves)
+
+    final = [accept([operand.is_final(component) for operand, component in zip(operands, state)])
+             for state in queue]
+    live = _live_states(final, transitions)
+
+    names: Dict[int, str] = {}
+    for state in range(len(queue)):
+        if live[state] or state < start_count:
+            names[state] = naming(len(names))
+    edges = [(names[src], names[dst], symbols[symbol]) for src, moves in enumerate(transitions) if src in names
+             for symbol, dst in moves if live[dst]]
+
+    if not names:
+        # Язык результата пуст: автомат из одного неконечного состояния
+        names[0] = naming(0)
+    return Automaton.from_edges("DFA" if determinize else "NFA", edges,
+                                {names[state] for state in range(max(start_count, 1))},
+                                {name for state, name in names.items() if final and final[state]},
+                                states=names.values(), alphabet={symbols[symbol] for symbol in symbol_ids},
+                                trusted=True)
+
+
+def _hopcroft_karp(operands: List[_Operand], symbol_ids: List[int], start: Tuple[_State, _State]) -> bool:
+    """
+    Проверка равенства языков двух детерминизируемых операндов алгоритмом Хопкрофта - Карпа.
+    :param operands: два операнда.
+    :param symbol_ids: номера символов общего алфавита.
+    :param start: пара начальных состояний.
+    :return: True, если языки равны.
+    """
+    # Состояния операндов различаются номером операнда: (0, состояние) и (1, состояние)
+    parents: Dict[Tuple[int, _State], Tuple[int, _State]] = {}
+
+    def find(node: Tuple[int, _State]) -> Tuple[int, _State]:
+        parent = parents.setdefault(node, node)
+        while parent != node:
+            grandparent = parents[parent]
+            parents[node] = grandparent
+            node, parent = parent, grandparent
+        return node
+
+    first, second = operands
+    parents[(0, start[0])] = parents[(1, start[1])] = (1, start[1])
+    queue = deque([start])
+    while queue:
+        state, other = queue.popleft()
+        if first.is_final(state) != second.is_final(other):
+            return False
+        for symbol in symbol_ids:
+            (next_state,) = first.move(state, symbol)
+            (next_other,) = second.move(other, symbol)
+            root, other_root = find((0, next_state)), find((1, next_other))
+            if root != other_root:
+                parents[root] = other_root
+                queue.append((next_state, next_other))
+    return True
+
+
+def _shortest_difference(operands: List[_Operand], symbol_ids: List[int], start: Tuple[_State, _State]) \
+        -> List[int]:
+    """
+    Поиск кратчайшего слова, ведущего в пару состояний, ровно одно из которых конечное.
+    :param operands: два операнда.
+    :param symbol_ids: номера символов общего алфавита.
+    :param start: пара начальных состояний.
+    :return: номера символов слова.
+    """
+    first, second = operands
+    # previous[pair] - пара и символ, из которых пара достигнута впервые
+    previous: Dict[Tuple[_State, _State], Optional[Tuple[Tuple[_State, _State], int]]] = {start: None}
+    queue = deque([start])
+    while queue:
+        pair = queue.popleft()
+        state, other = pair
+        if first.is_final(state) != second.is_final(other):
+            word = []
+            while previous[pair] is not None:
+                pair, symbol = previous[pair]
+                word.append(symbol)
+            return word[::-1]
+        for symbol in symbol_ids:
+            (next_state,) = first.move(state, symbol)
+            (next_other,) = second.move(other, symbol)
+            next_pair = (next_state, next_other)
+            if next_pair not in previous:
+                previous[next_pair] = (pair, symbol)
+                queue.append(next_pair)
+    raise ValueError("Языки автоматов равны.")
+
+
+def _representative(label: str) -> str:
+    """
+    Символ входного слова, соответствующий символу перехода: наименьший символ класса
+    или сама метка, если она не является классом.
+    """
+    ranges = parse_label(label)
+    return label if ranges is None else chr(ranges[0][0])
+
+
+def _symbol_classes(automata: List[Automaton], extra_labels: Optional[Iterable[str]] = None) \
+        -> Tuple[List[str], Dict[str, List[int]]]:
+    """
+    Разбиение меток переходов и символов алфавитов всех автоматов на общие непересекающиеся
+    классы символов (см. symbols.partition). Если классов-меток нет, каждая метка - отдельный класс.
+    :param automata: автоматы.
+    :param extra_labels: дополнительные метки.
+    :return: метки классов и номера классов для каждой исходной метки.
+    """
+    labels = set(extra_labels or ())
+    for automaton in automata:
+        labels.update(automaton.get_alphabet())
+        for transitions in automaton.get_all_transitions().values():
+            labels.update(transitions)
+    labels.discard("ε")
+
+    if any(is_class_label(label) for label in labels):
+        return partition(labels)
+    symbols = sorted(labels)
+    return symbols, {label: [i] for i, label in enumerate(symbols)}
+
+
+def _live_states(final: List[bool], transitions: List[List[Tuple[int, int]]]) -> List[bool]:
+    """
+    Поиск состояний произведения, из которых достижимо конечное состояние.
+    :param final: признаки конечности состояний.
+    :param transitions: списки переходов "номер символа, номер состояния" из каждого состояния.
+    :return: признаки найденных состояний.
+    """
+    predecessors: List[List[int]] = [[] for _ in final]
+    for src, moves in enumerate(transitions):
+        for _, dst in moves:
+            predecessors[dst].append(src)
+
+    live = list(final)
+    stack = [state for state, is_final in enumerate(final) if is_final]
+    while stack:
+        for src in predecessors[stack.pop()]:
+            if not live[src]:
+                live[src] = True
+                stack.append(src)
+    return live
@@ -1,65 +1,78 @@
-import pydot
-from pydot import Graph
+import gzip
+import io
+import re
+from typing import IO, Dict, List, NamedTuple, Tuple
 from nfa_converter.automaton import Automaton
+from nfa_converter.symbols import format_class, is_class_label, parse_label, split_label, union_label
 
 
 def read(dot_str) -> Automaton:
     """
     Создание автомата из строки написанной в dot формате.
+    Поддерживается подмножество формата, достаточное для описания автомата:
+    состояния с атрибутом shape, переходы с атрибутом label и стрелки из
+    безымянной вершины "" в начальные состояния.
     """
     # dot формат поддерживает запись нескольких графов в одном файле
     # в данном случае разрешено задавать только один
-    read_automatons = pydot.graph_from_dot_data(dot_str)
-    if len(read_automatons) != 1:
-        raise InvalidAutomatonError("Строка содержит 0 или 2 и более графов.")
-    read_automaton: Graph = read_automatons[0]
-    if read_automaton.get_type() != "digraph":
-        raise InvalidAutomatonError("Автомат не может быть неориентированным.")
+    read_automaton = _DotParser(dot_str).parse()
 
-    automaton = Automaton(read_automaton.get_name())
+    automaton = Automaton(read_automaton.name)
 
     final_states = set()
-    for node in read_automaton.get_nodes():
-        node_name = _unquote(node.get_name())
+    for node in read_automaton.nodes:
+        node_name = node.name
 
         if node_name == "":
             continue
 
         # Необходимо указывать shape чтобы обозначить обычное это состояние или конечное
         automaton.add_state(node_name)
-        if "shape" not in node.get_attributes():
-            raise InvalidAutomatonError("Отсутствует атрибут shape у состояния.")
+        if "shape" not in node.attributes:
+            raise InvalidAutomatonError(_at("Отсутствует атрибут shape у состояния.", dot_str, node.offset))
 
-        shape_attr = _unquote(node.get_attributes()["shape"])
+        shape_attr = node.attributes["shape"]
         if shape_attr == "doublecircle":
             final_states.add(node_name)
         elif shape_attr != "circle":
-            raise InvalidAutomatonError("Недопустимый атрибут shape у состояния.")
+            raise InvalidAutomatonError(_at("Недопустимый атрибут shape у состояния.", dot_str, node.offset))
     automaton.set_final_states(final_states)
 
     # Алфавит - множество из всех неповторяющихся символов перехода
     # Символ ε в алфавит не входит
     alphabet = set()
+    transitions = []
     start_states = set()
     start_state_set = False
-    for edge in read_automaton.get_edges():
-        source = _unquote(edge.get_source())
-        destination = _unquote(edge.get_destination())
+    for edge in read_automaton.edges:
+        source = edge.source
+        destination = edge.destination
 
         if source == "":
             start_states.add(destination)
             start_state_set = True
             continue
 
-        if "label" not in edge.get_attributes():
-            raise InvalidMoveSymbolError("Не указан символ перехода.")
+        if "label" not in edge.attributes:
+            raise InvalidMoveSymbolError(_at("Не указан символ перехода.", dot_str, edge.offset))
 
-        transition_symbol: str = _unquote(edge.get_attributes()["label"])
-        if transition_symbol == "" or len(transition_symbol) > 1:
-            raise InvalidMoveSymbolError("Символ перехода задан некорректно.")
-        if transition_symbol != "ε":
-            alphabet.add(transition_symbol)
-        automaton.add_transition(source, destination, transition_symbol)
+        # Несколько параллельных переходов могут быть записаны одной стрелкой с меткой вида "a,b",
+        # кроме отдельных символов метка может содержать классы символов: "[a-z],_" или "\x00-\x7f"
+        label: str = edge.attributes["label"]
+        for transition_symbol in split_label(label):
+            if transition_symbol != "ε":
+                try:
+                    ranges = parse_label(transition_symbol)
+                except ValueError as e:
+                    raise InvalidMoveSymbolError(_at(str(e), dot_str, edge.offset))
+                if ranges is None:
+                    raise InvalidMoveSymbolError(_at("Символ перехода задан некорректно.", dot_str, edge.offset))
+                if len(transition_symbol) > 1:
+                    # Одинаковые множества символов, записанные по-разному, получают одну метку
+                    transition_symbol = format_class(ranges)
+                alphabet.add(transition_symbol)
+            transitions.append((source, destination, transition_symbol))
+    automaton.add_transitions_bulk(transitions)
     automaton.set_alphabet(alphabet)
     automaton.set_start_states(start_states)
 
@@ -75,36 +88,95 @@ def write(automaton: Automaton) -> str:
     """
     Возвращает строку в формате dot описывающую заданный автомат.
     """
-    dot_graph = pydot.Dot()
-    dot_graph.set_type("digraph")
-    dot_graph.set_name(automaton.get_name())
+    output = io.StringIO()
+    write_to(automaton, output)
+    return output.getvalue()
 
-    # Добавление источника из которого идёт стрелка в начальное состояние
-    dot_node = pydot.Node(_quote(""), **{"shape": "none"})
-    dot_graph.add_node(dot_node)
 
-    for state in automaton.get_states():
-        state_attrs = {}
-        if state in automaton.get_final_states():
-            # Конечные состояния помещаются в двойной круг
-            state_attrs["shape"] = "doublecircle"
-        else:
-            state_attrs["shape"] = "circle"
-        dot_node = pydot.Node(_quote(state), **state_attrs)
-        dot_graph.add_node(dot_node)
+def write_to(automaton: Automaton, fileobj: IO, merge_edges: bool = True, compress: bool = False):
+    """
+    Запись автомата в формате dot в поток по мере формирования текста.
+    :param automaton: записываемый автомат.
+    :param fileobj: текстовый или двоичный поток. В двоичный поток текст записывается в кодировке UTF-8.
+    :param merge_edges: объединять ли параллельные переходы в одну стрелку с меткой вида "a,b".
+    :param compress: сжимать ли результат gzip, допустимо только для двоичного потока.
+    """
+    if isinstance(fileobj, io.TextIOBase):
+        if compress:
+            raise ValueError("Сжатый результат можно записать только в двоичный поток.")
+        _write_lines(automaton, fileobj, merge_edges)
+        return
+
+    binary = gzip.GzipFile(fileobj=fileobj, mode="wb") if compress else fileobj
+    text = io.TextIOWrapper(binary, encoding="utf-8", newline="\n")
+    try:
+        _write_lines(automaton, text, merge_edges)
+        text.flush()
+    finally:
+        # Отсоединение обёртки, чтобы при её удалении не закрылся поток вызывающего кода
+        text.detach()
+        if compress:
+            binary.close()
+
+
+def _write_lines(automaton: Automaton, output: IO[str], merge_edges: bool):
+    """
+    Формирование текста в формате dot и его запись в поток порциями.
+    :param automaton: записываемый автомат.
+    :param output: текстовый поток.
+    :param merge_edges: объединять ли параллельные переходы в одну стрелку.
+    """
+    # Метки записываются в исходном виде: представление freeze разбивает пересекающиеся классы символов
+    states = sorted(automaton.get_states())
+    final_states = automaton.get_final_states()
+    quoted = {state: _quote(state) for state in states}
+
+    lines = [f"digraph {_graph_name(automaton.get_name())} {{\n", '"" [shape=none];\n']
+    for state in states:
+        # Конечные состояния помещаются в двойной круг
+        lines.append(f"{quoted[state]} [shape={'doublecircle' if state in final_states else 'circle'}];\n")
 
     # Стрелки в начальные состояния
-    for start_state in automaton.get_start_states():
-        dot_edge = pydot.Edge(_quote(""), _quote(start_state))
-        dot_graph.add_edge(dot_edge)
+    for start_state in sorted(automaton.get_start_states()):
+        lines.append(f'"" -> {quoted[start_state]};\n')
 
-    for src, transitions in automaton.get_all_transitions().items():
-        for symbol, dst_states in transitions.items():
-            for dst in dst_states:
-                dot_edge = pydot.Edge(_quote(src), _quote(dst), **{"label": _quote(symbol)})
-                dot_graph.add_edge(dot_edge)
+    for src in states:
+        # Символы переходов в каждое из состояний в порядке первого появления, ε-переходы - последними
+        transitions = automaton.get_transitions_from(src)
+        edges: Dict[str, List[str]] = {}
+        for symbol in sorted(transitions, key=lambda symbol: (symbol == "ε", symbol)):
+            for dst in sorted(transitions[symbol]):
+                edges.setdefault(dst, []).append(symbol)
 
-    return dot_graph.to_string()
+        for dst, edge_symbols in edges.items():
+            if merge_edges and len(edge_symbols) > 1 and any(is_class_label(symbol) for symbol in edge_symbols):
+                # Классы символов и отдельные символы объединяются в один класс
+                char_sets = [symbol for symbol in edge_symbols if parse_label(symbol) is not None]
+                others = [symbol for symbol in edge_symbols if parse_label(symbol) is None]
+                labels = [union_label(char_sets)] + others
+            elif merge_edges and len(edge_symbols) > 1:
+                # Запятая разделяет символы в объединённой метке, поэтому переход по ней записывается отдельно,
+                # а скобки и обратная косая черта, задающие классы символов, экранируются
+                merged = [_escape_symbol(symbol) for symbol in edge_symbols if symbol != ","]
+                separate = [","] if len(merged) != len(edge_symbols) else []
+                labels = [",".join(merged)] + separate if merged else separate
+            else:
+                labels = edge_symbols
+            for label in labels:
+                lines.append(f"{quoted[src]} -> {quoted[dst]} [label={_quote(label)}];\n")
+
+        if len(lines) >= _WRITE_BATCH:
+            output.write("".join(lines))
+            lines.clear()
+
+    lines.append("}\n")
+    output.write("".join(lines))
+
+
+# Число строк, накапливаемых перед записью в поток
+_WRITE_BATCH = 4096
+# Символы, экранируемые в объединённой метке из отдельных символов
+_LABEL_SPECIAL = {"\\", "[", "]"}
 
 
 class InvalidAutomatonError(Exception):
@@ -121,25 +193,293 @@ class InvalidMoveSymbolError(Exception):
     pass
 
 
-def _unquote(string: str) -> str:
+class DotSyntaxError(InvalidAutomatonError):
+    """
+    Синтаксическая ошибка в описании автомата в dot формате.
+    """
+
+    def __init__(self, message: str, line: int, column: int):
+        """
+        :param message: описание ошибки.
+        :param line: номер строки, начиная с единицы.
+        :param column: номер столбца, начиная с единицы.
+        """
+        super().__init__(f"{message} (строка {line}, столбец {column})")
+        self.line = line
+        self.column = column
+
+
+class _DotNode(NamedTuple):
+    name: str
+    attributes: Dict[str, str]
+    offset: int
+
+
+class _DotEdge(NamedTuple):
+    source: str
+    destination: str
+    attributes: Dict[str, str]
+    offset: int
+
+
+class _DotGraph(NamedTuple):
+    name: str
+    nodes: List[_DotNode]
+    edges: List[_DotEdge]
+
+
+# Лексемы dot формата: пробелы и комментарии пропускаются, строки в кавычках могут быть многострочными
+_DOT_TOKEN = re.compile(r"""
+    (?P<skip>[ \t\r\n\ufeff]+|//[^\n]*|/\*.*?\*/|(?:(?<=\n)|^)[ \t]*\#[^\n]*)
+  | (?P<quoted>"(?:[^"\\]|\\.)*")
+  | (?P<id>[A-Za-z_\u0080-\U0010ffff][A-Za-z_0-9\u0080-\U0010ffff]*|-?(?:\.[0-9]+|[0-9]+(?:\.[0-9]*)?))
+  | (?P<punct>->|--|[{}\[\]=;,:+])
+  | (?P<invalid>.)
+""", re.VERBOSE | re.DOTALL)
+
+_DOT_KEYWORDS = {"strict", "graph", "digraph", "node", "edge", "subgraph"}
+
+# Экранирование в строках в кавычках: \" и \\ задают сами символы, обратная косая черта перед
+# переводом строки означает перенос строки, остальные последовательности сохраняются как есть
+_DOT_ESCAPE = re.compile(r'\\(["\\]|\r?\n)')
+
+
+def _unescape(match: "re.Match") -> str:
+    """
+    Замена экранированной последовательности найденной _DOT_ESCAPE.
     """
-    Удаляет двойные кавычки если они строка заключена в них.
-    :param string: строка с кавычками или без.
-    :return: строку без кавычек по краям, иначе оригинал строки.
+    escaped = match.group(1)
+    return escaped if escaped in ('"', "\\") else ""
+
+
+class _DotParser:
     """
-    if string.startswith("\"") and string.endswith("\""):
-        return string[1:-1]
-    else:
-        return string
+    Однопроходный разборщик подмножества dot формата, описывающего автоматы.
+    Текст разбивается на лексемы одним регулярным выражением, после чего граф
+    разбирается рекурсивным спуском по списку лексем. Вид лексемы знаков препинания
+    совпадает с самим знаком, ключевые слова имеют вид "keyword".
+    """
+
+    def __init__(self, text: str):
+        """
+        :param text: строка в dot формате.
+        """
+        self._text = text
+        self._kinds: List[str] = []
+        self._values: List[str] = []
+        self._offsets: List[int] = []
+        self._position = 0
+        self._tokenize()
+
+    def parse(self) -> _DotGraph:
+        """
+        Разбор единственного графа.
+        :return: состояния и переходы в порядке их описания.
+        """
+        if self._kinds[0] == "end":
+            raise InvalidAutomatonError("Строка содержит 0 или 2 и более графов.")
+
+        if self._values[0] == "strict":
+            self._position += 1
+        kind = self._values[self._position] if self._kinds[self._position] == "keyword" else None
+        if kind == "graph":
+            raise InvalidAutomatonError("Автомат не может быть неориентированным.")
+        if kind != "digraph":
+            self._error("Ожидалось ключевое слово digraph")
+        self._position += 1
+
+        name = "G"
+        if self._kinds[self._position] in ("id", "quoted"):
+            name = self._take_id()
+        self._expect("{")
+
+        graph = _DotGraph(name, [], [])
+        node_defaults: Dict[str, str] = {}
+        edge_defaults: Dict[str, str] = {}
+        kinds = self._kinds
+        while kinds[self._position] != "}":
+            self._statement(graph, node_defaults, edge_defaults)
+            if kinds[self._position] == ";":
+                self._position += 1
+        self._position += 1
+
+        if kinds[self._position] != "end":
+            raise InvalidAutomatonError("Строка содержит 0 или 2 и более графов.")
+        return graph
+
+    def _statement(self, graph: _DotGraph, node_defaults: Dict[str, str], edge_defaults: Dict[str, str]):
+        """
+        Разбор одной инструкции внутри графа.
+        """
+        kinds = self._kinds
+        if kinds[self._position] == "keyword":
+            keyword = self._values[self._position]
+            if keyword not in ("graph", "node", "edge"):
+                self._error("Подграфы и вложенные графы не поддерживаются")
+            self._position += 1
+            attributes = self._attributes()
+            if keyword == "node":
+                node_defaults.update(attributes)
+            elif keyword == "edge":
+                edge_defaults.update(attributes)
+            return
+
+        offset = self._offsets[self._position]
+        first = self._take_id()
+        if kinds[self._position] == "=":
+            # Атрибут графа вида "имя = значение" на автомат не влияет
+            self._position += 1
+            self._take_id()
+            return
+
+        chain = [first]
+        while kinds[self._position] == "->":
+            self._position += 1
+            chain.append(self._take_id())
+        if kinds[self._position] == "--":
+            self._error("Ненаправленные рёбра не поддерживаются")
+        attributes = self._attributes() if kinds[self._position] == "[" else {}
+
+        if len(chain) == 1:
+            graph.nodes.append(_DotNode(first, {**node_defaults, **attributes} if node_defaults else attributes,
+                                        offset))
+            return
+        if edge_defaults:
+            attributes = {**edge_defaults, **attributes}
+        for source, destination in zip(chain, chain[1:]):
+            graph.edges.append(_DotEdge(source, destination, attributes, offset))
+
+    def _attributes(self) -> Dict[str, str]:
+        """
+        Разбор последовательности списков атрибутов вида [имя=значение, ...].
+        """
+        kinds = self._kinds
+        attributes: Dict[str, str] = {}
+        while kinds[self._position] == "[":
+            self._position += 1
+            while kinds[self._position] != "]":
+                key = self._take_id()
+                if kinds[self._position] == "=":
+                    self._position += 1
+                    attributes[key] = self._take_id()
+                else:
+                    attributes[key] = "true"
+                if kinds[self._position] in (",", ";"):
+                    self._position += 1
+            self._position += 1
+        return attributes
+
+    def _tokenize(self):
+        """
+        Разбиение текста на лексемы. В конец добавляется лексема "end".
+        """
+        kinds = self._kinds
+        values = self._values
+        offsets = self._offsets
+        for token in _DOT_TOKEN.finditer(self._text):
+            kind = token.lastgroup
+            if kind == "skip":
+                continue
+            value = token.group()
+            if kind == "punct":
+                kind = value
+            elif kind == "id" and value.lower() in _DOT_KEYWORDS:
+                kind = "keyword"
+                value = value.lower()
+            elif kind == "invalid":
+                self._position = len(kinds)
+                kinds.append(kind)
+                offsets.append(token.start())
+                self._error(f"Недопустимый символ \"{value}\"")
+            kinds.append(kind)
+            values.append(value)
+            offsets.append(token.start())
+        kinds.append("end")
+        values.append("")
+        offsets.append(len(self._text))
+
+    def _expect(self, punct: str):
+        if self._kinds[self._position] != punct:
+            self._error(f"Ожидалось \"{punct}\"")
+        self._position += 1
+
+    def _take_id(self) -> str:
+        """
+        Чтение идентификатора: слова, числа или строки в кавычках (с поддержкой "a" + "b").
+        """
+        kinds = self._kinds
+        position = self._position
+        kind = kinds[position]
+        if kind == "id":
+            self._position += 1
+            return self._values[position]
+        if kind != "quoted":
+            self._error("Ожидался идентификатор")
+
+        parts = []
+        while True:
+            value = self._values[position][1:-1]
+            if "\\" in value:
+                value = _DOT_ESCAPE.sub(_unescape, value)
+            parts.append(value)
+            position += 1
+            if kinds[position] == "+" and kinds[position + 1] == "quoted":
+                position += 1
+                continue
+            self._position = position
+            return parts[0] if len(parts) == 1 else "".join(parts)
+
+    def _error(self, message: str):
+        if self._kinds[self._position] == "end":
+            message += ", но текст закончился"
+        line, column = _line_column(self._text, self._offsets[self._position])
+        raise DotSyntaxError(message, line, column)
+
+
+def _line_column(text: str, offset: int) -> Tuple[int, int]:
+    """
+    Получение номеров строки и столбца по смещению в тексте.
+    :param text: текст.
+    :param offset: смещение от начала текста.
+    :return: номера строки и столбца, начиная с единицы.
+    """
+    line = text.count("\n", 0, offset) + 1
+    column = offset - (text.rfind("\n", 0, offset) + 1) + 1
+    return line, column
+
+
+def _at(message: str, text: str, offset: int) -> str:
+    """
+    Дополнение сообщения об ошибке позицией в тексте.
+    """
+    line, column = _line_column(text, offset)
+    return f"{message} (строка {line}, столбец {column})"
+
+
+def _escape_symbol(symbol: str) -> str:
+    """
+    Экранирование символа, имеющего особое значение в метке перехода (см. symbols.split_label).
+    :param symbol: символ перехода.
+    :return: символ, который при чтении объединённой метки не будет принят за начало класса.
+    """
+    return "\\" + symbol if symbol in _LABEL_SPECIAL else symbol
 
 
 def _quote(string: str) -> str:
     """
-    Добавляет двойные кавычки если строка не заключена в них.
-    :param string: строка с кавычками или без.
-    :return: строку в кавычках если она не была заключена в них, иначе оригинал.
+    Заключает строку в двойные кавычки, экранируя кавычки и обратные косые черты внутри неё.
+    :param string: исходная строка.
+    :return: строку в кавычках в dot формате.
+    """
+    return '"' + string.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _graph_name(name: str) -> str:
+    """
+    Запись названия графа: простые идентификаторы записываются как есть, остальные в кавычках.
+    :param name: название графа.
+    :return: название в dot формате.
     """
-    if not string.startswith("\"") and not string.endswith("\""):
-        return f"\"{string}\""
-    else:
-        return string
+    if re.fullmatch(r"[A-Za-z_][A-Za-z_0-9]*", name) and name.lower() not in _DOT_KEYWORDS:
+        return name
+    return _quote(name)
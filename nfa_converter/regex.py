@@ -0,0 +1,287 @@
+from typing import Callable, Dict, List, Optional, Set, Tuple
+from nfa_converter.automaton import Automaton, numeric_names
+from nfa_converter.symbols import MAX_CODE_POINT, format_class, parse_atom, parse_class
+
+# Способы построения автомата по регулярному выражению
+CONSTRUCTIONS = {"glushkov", "thompson"}
+
+# Метка перехода по любому символу (.)
+ANY_SYMBOL = format_class([(0, MAX_CODE_POINT)])
+
+# Узлы дерева разбора: ("symbol", метка), ("empty",), ("concat", [узлы]), ("alt", [узлы]),
+# ("star", узел), ("plus", узел), ("optional", узел)
+_Node = Tuple
+
+
+class RegexSyntaxError(ValueError):
+    """
+    Синтаксическая ошибка в регулярном выражении.
+    """
+
+    def __init__(self, message: str, pattern: str, position: int):
+        """
+        :param message: описание ошибки.
+        :param pattern: регулярное выражение.
+        :param position: позиция ошибки, начиная с нуля.
+        """
+        super().__init__(f"{message} (позиция {position} выражения \"{pattern}\")")
+        self.pattern = pattern
+        self.position = position
+
+
+def regex_to_nfa(pattern: str, construction: str = "glushkov",
+                 naming: Callable[[int], str] = numeric_names) -> Automaton:
+    """
+    Построение автомата по регулярному выражению.
+    Поддерживаются символы, экранирующие последовательности (\\*, \\x41, \\n), любой символ ".",
+    классы символов в квадратных скобках ([a-z], [^\\n]), конкатенация, альтернатива "|",
+    итерации "*", "+", необязательность "?" и скобки. Пустое выражение и пустые альтернативы
+    допускают пустое слово. Переходы помечаются одиночными символами или классами символов
+    (см. symbols), поэтому результат можно сразу передавать nfa_to_dfa и compile.
+    Автомат создаётся сразу из множеств состояний и переходов, без проверок add_transition
+    (см. Automaton.from_edges).
+    :param pattern: регулярное выражение.
+    :param construction: способ построения: "glushkov" - автомат позиций Глушкова без
+    ε-переходов, в котором одно состояние на каждый символ выражения и одно начальное,
+    "thompson" - автомат Томпсона с ε-переходами и числом переходов, линейным от длины выражения.
+    :param naming: функция, сопоставляющая номеру состояния его идентификатор. Начальное
+    состояние имеет номер 0.
+    :return: недетерминированный автомат.
+    :raise RegexSyntaxError: если выражение записано некорректно.
+    """
+    if construction not in CONSTRUCTIONS:
+        raise ValueError(f"Неизвестный способ построения автомата: \"{construction}\".")
+    tree = _Parser(pattern).parse()
+    if construction == "glushkov":
+        return _glushkov(tree, naming)
+    return _thompson(tree, naming)
+
+
+class _Parser:
+    """
+    Разбор регулярного выражения рекурсивным спуском.
+    """
+
+    def __init__(self, pattern: str):
+        self._pattern = pattern
+        self._position = 0
+
+    def parse(self) -> _Node:
+        """
+        Построение дерева разбора всего выражения.
+        """
+        tree = self._alternation()
+        if self._position != len(self._pattern):
+            raise self._error("Лишняя закрывающая скобка")
+        return tree
+
+    def _error(self, message: str) -> RegexSyntaxError:
+        return RegexSyntaxError(message, self._pattern, self._position)
+
+    def _peek(self) -> Optional[str]:
+        """
+        Текущий символ выражения или None в конце выражения.
+        """
+        return self._pattern[self._position] if self._position < len(self._pattern) else None
+
+    def _alternation(self) -> _Node:
+        """
+        Разбор альтернативы: concatenation ("|" concatenation)*.
+        """
+        branches = [self._concatenation()]
+        while self._peek() == "|":
+            self._position += 1
+            branches.append(self._concatenation())
+        return branches[0] if len(branches) == 1 else ("alt", branches)
+
+    def _concatenation(self) -> _Node:
+        """
+        Разбор конкатенации, возможно пустой.
+        """
+        parts = []
+        while self._peek() not in (None, "|", ")"):
+            parts.append(self._repetition())
+        if not parts:
+            return ("empty",)
+        return parts[0] if len(parts) == 1 else ("concat", parts)
+
+    def _repetition(self) -> _Node:
+        """
+        Разбор итерации: atom ("*" | "+" | "?")*.
+        """
+        node = self._atom()
+        while self._peek() in ("*", "+", "?"):
+            node = ({"*": "star", "+": "plus", "?": "optional"}[self._peek()], node)
+            self._position += 1
+        return node
+
+    def _atom(self) -> _Node:
+        """
+        Разбор символа, класса символов или выражения в скобках.
+        """
+        pattern = self._pattern
+        char = self._peek()
+        if char == "(":
+            self._position += 1
+            node = self._alternation()
+            if self._peek() != ")":
+                raise self._error("Ожидалась \")\"")
+            self._position += 1
+            return node
+        if char in ("*", "+", "?"):
+            raise self._error("Нечего повторять")
+        if char == "[":
+            end = self._class_end()
+            try:
+                ranges = parse_class(pattern[self._position + 1:end])
+            except ValueError as e:
+                raise self._error(str(e)) from None
+            self._position = end + 1
+            return ("symbol", format_class(ranges))
+        if char == ".":
+            self._position += 1
+            return ("symbol", ANY_SYMBOL)
+
+        try:
+            code, self._position = parse_atom(pattern, self._position)
+        except ValueError as e:
+            raise self._error(str(e)) from None
+        return ("symbol", format_class([(code, code)]))
+
+    def _class_end(self) -> int:
+        """
+        Поиск закрывающей скобки класса символов, начинающегося в текущей позиции.
+        """
+        pattern = self._pattern
+        position = self._position + 1
+        while position < len(pattern) and pattern[position] != "]":
+            position += 2 if pattern[position] == "\\" else 1
+        if position >= len(pattern) or position == self._position + 1:
+            raise self._error("Незакрытый или пустой класс символов")
+        return position
+
+
+def _glushkov(tree: _Node, naming: Callable[[int], str]) -> Automaton:
+    """
+    Построение автомата позиций Глушкова.
+    Состояние 0 начальное, состояние i > 0 соответствует i-му символу выражения, переходы в
+    него помечены этим символом. Из состояния p есть переход в позицию q, если q может
+    следовать за p (q входит в follow(p)), из начального - если q может стоять первой.
+    """
+    labels: List[Optional[str]] = [None]
+    follow: List[Set[int]] = [set()]
+
+    def visit(node: _Node) -> Tuple[bool, Set[int], Set[int]]:
+        """
+        Вычисление признака допуска пустого слова и множеств первых и последних позиций
+        с заполнением follow.
+        """
+        kind = node[0]
+        if kind == "symbol":
+            labels.append(node[1])
+            follow.append(set())
+            position = len(labels) - 1
+            return False, {position}, {position}
+        if kind == "empty":
+            return True, set(), set()
+        if kind == "concat":
+            nullable, first, last = True, set(), set()
+            for child in node[1]:
+                child_nullable, child_first, child_last = visit(child)
+                for position in last:
+                    follow[position] |= child_first
+                if nullable:
+                    first |= child_first
+                last = child_last | last if child_nullable else child_last
+                nullable = nullable and child_nullable
+            return nullable, first, last
+        if kind == "alt":
+            nullable, first, last = False, set(), set()
+            for child in node[1]:
+                child_nullable, child_first, child_last = visit(child)
+                nullable = nullable or child_nullable
+                first |= child_first
+                last |= child_last
+            return nullable, first, last
+
+        nullable, first, last = visit(node[1])
+        if kind in ("star", "plus"):
+            for position in last:
+                follow[position] |= first
+        return nullable or kind != "plus", first, last
+
+    nullable, first, last = visit(tree)
+    follow[0] = first
+
+    names = [naming(position) for position in range(len(labels))]
+    transitions: Dict[str, Dict[str, Set[str]]] = {}
+    for src, targets in enumerate(follow):
+        moves: Dict[str, Set[str]] = {}
+        for dst in targets:
+            moves.setdefault(labels[dst], set()).add(names[dst])
+        if moves:
+            transitions[names[src]] = moves
+
+    final_states = {names[position] for position in last}
+    if nullable:
+        final_states.add(names[0])
+    return Automaton._from_parts("NFA", set(names), {names[0]}, final_states, set(labels[1:]), transitions)
+
+
+def _thompson(tree: _Node, naming: Callable[[int], str]) -> Automaton:
+    """
+    Построение автомата Томпсона. Каждому узлу дерева разбора соответствует фрагмент
+    с одним входным и одним выходным состоянием.
+    """
+    edges: List[Tuple[int, int, str]] = []
+    counter = [0]
+
+    def new_state() -> int:
+        counter[0] += 1
+        return counter[0] - 1
+
+    def visit(node: _Node) -> Tuple[int, int]:
+        """
+        Построение фрагмента для узла.
+        :return: входное и выходное состояния фрагмента.
+        """
+        kind = node[0]
+        if kind == "symbol":
+            start, end = new_state(), new_state()
+            edges.append((start, end, node[1]))
+            return start, end
+        if kind == "empty":
+            state = new_state()
+            return state, state
+        if kind == "concat":
+            start, end = visit(node[1][0])
+            for child in node[1][1:]:
+                child_start, child_end = visit(child)
+                edges.append((end, child_start, "ε"))
+                end = child_end
+            return start, end
+        if kind == "alt":
+            start = new_state()
+            fragments = [visit(child) for child in node[1]]
+            end = new_state()
+            for child_start, child_end in fragments:
+                edges.append((start, child_start, "ε"))
+                edges.append((child_end, end, "ε"))
+            return start, end
+
+        start = new_state()
+        child_start, child_end = visit(node[1])
+        end = new_state()
+        edges.append((start, child_start, "ε"))
+        edges.append((child_end, end, "ε"))
+        if kind in ("star", "plus"):
+            edges.append((child_end, child_start, "ε"))
+        if kind in ("star", "optional"):
+            edges.append((start, end, "ε"))
+        return start, end
+
+    start, end = visit(tree)
+    names = [naming(state) for state in range(counter[0])]
+    return Automaton.from_edges("eNFA", ((names[src], names[dst], label) for src, dst, label in edges),
+                                start_states={names[start]}, final_states={names[end]}, states=names,
+                                trusted=True)
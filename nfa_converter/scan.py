@@ -0,0 +1,176 @@
+import mmap
+import os
+from typing import AsyncIterator, FrozenSet, Iterator, List, Tuple, Union
+from nfa_converter.automaton import Automaton, FrozenAutomaton
+from nfa_converter.matcher import CompiledDFA, compile
+
+# Размер порции входных данных по умолчанию
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Результат поиска: смещение конца совпадения или пара "смещение, метки допускающего состояния"
+Match = Union[int, Tuple[int, FrozenSet[str]]]
+
+
+class Scanner:
+    """
+    Пошаговый проход детерминированного автомата по потоку, поступающему порциями.
+    Состояние автомата и смещение сохраняются между порциями, поэтому совпадения,
+    пересекающие границу порций, находятся так же, как в непрерывных данных.
+    Совпадение - префикс потока (возможно, пустой), допускаемый автоматом, его конец -
+    число прочитанных символов (для двоичных данных - байтов). Чтобы искать совпадения,
+    начинающиеся в любой позиции, автомат строится по выражению вида ".*(...)".
+    Двоичные порции не декодируются: каждый байт считается символом с тем же кодом.
+    """
+
+    def __init__(self, dfa: Union[Automaton, FrozenAutomaton, CompiledDFA], tagged: bool = False):
+        """
+        :param dfa: детерминированный автомат, его компактное или табличное представление.
+        :param tagged: сообщать ли вместе со смещением метки допускающего состояния (см. Automaton.set_tags).
+        """
+        self._compiled = dfa if isinstance(dfa, CompiledDFA) else compile(dfa)
+        self._tagged = tagged
+        tables = self._compiled.get_tables()
+        width = tables.width
+        self._table = tables.table
+        # Признаки допуска по смещениям строк таблицы: переход и проверка - по одному обращению к массиву
+        self._accepting = bytearray(len(tables.table))
+        for state, accepting in enumerate(tables.accepting):
+            self._accepting[state * width] = accepting
+        self._tags = {state * width: tags for state, tags in tables.tags.items()}
+        self._byte_table = None
+        if width <= 256:
+            self._byte_table = bytes(ord(tables.translation[code]) for code in range(256))
+        self._state = tables.start
+        self._offset = 0
+        self._started = False
+
+    @property
+    def offset(self) -> int:
+        """
+        Число обработанных символов или байтов.
+        """
+        return self._offset
+
+    @property
+    def finished(self) -> bool:
+        """
+        Признак попадания в тупиковое состояние: дальнейших совпадений не будет.
+        """
+        return self._state == 0
+
+    def feed(self, chunk: Union[str, bytes, bytearray, memoryview]) -> List[Match]:
+        """
+        Обработка очередной порции данных.
+        :param chunk: строка или последовательность байтов. При первом вызове сообщается
+        пустое совпадение в начале потока, если автомат допускает пустое слово.
+        :return: совпадения, заканчивающиеся в этой порции, в порядке возрастания смещений.
+        """
+        matches = []
+        if not self._started:
+            self._started = True
+            self._report(matches, self._state, 0)
+
+        start = self._offset
+        self._offset += len(chunk)
+        state = self._state
+        if state == 0 or len(chunk) == 0:
+            return matches
+
+        table = self._table
+        accepting = self._accepting
+        for position, code in enumerate(self._encode(chunk), start + 1):
+            state = table[state + code]
+            if accepting[state]:
+                self._report(matches, state, position)
+            elif state == 0:
+                break
+        self._state = state
+        return matches
+
+    def _report(self, matches: List[Match], state: int, position: int):
+        """
+        Добавление совпадения, если состояние допускающее.
+        """
+        if self._accepting[state]:
+            matches.append((position, self._tags.get(state, frozenset())) if self._tagged else position)
+
+    def _encode(self, chunk: Union[str, bytes, bytearray, memoryview]):
+        """
+        Замена символов порции кодами их классов.
+        """
+        if isinstance(chunk, str):
+            return self._compiled.encode(chunk)
+        if isinstance(chunk, memoryview):
+            chunk = chunk.tobytes()
+        if self._byte_table is not None:
+            return chunk.translate(self._byte_table)
+        return self._compiled.encode(chunk.decode("latin-1"))
+
+
+def scan(dfa: Union[Automaton, FrozenAutomaton, CompiledDFA], stream, chunk_size: int = DEFAULT_CHUNK_SIZE,
+         tagged: bool = False) -> Iterator[Match]:
+    """
+    Поиск совпадений в потоке, читаемом порциями (см. Scanner). Чтение прекращается,
+    как только автомат попадает в тупиковое состояние.
+    :param dfa: детерминированный автомат, его компактное или табличное представление.
+    :param stream: текстовый или двоичный поток с методом read(size).
+    :param chunk_size: размер порции в символах или байтах.
+    :param tagged: сообщать ли вместе со смещением метки допускающего состояния.
+    :return: итератор смещений концов совпадений или пар "смещение, метки".
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер порции должен быть положительным.")
+    scanner = Scanner(dfa, tagged)
+    while True:
+        chunk = stream.read(chunk_size)
+        yield from scanner.feed(chunk)
+        if not chunk or scanner.finished:
+            return
+
+
+def scan_file(dfa: Union[Automaton, FrozenAutomaton, CompiledDFA], path: str,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, tagged: bool = False) -> Iterator[Match]:
+    """
+    Поиск совпадений в файле, отображённом в память. Файл обрабатывается как двоичные
+    данные, смещения - в байтах.
+    :param dfa: детерминированный автомат, его компактное или табличное представление.
+    :param path: путь к файлу.
+    :param chunk_size: размер порции в байтах.
+    :param tagged: сообщать ли вместе со смещением метки допускающего состояния.
+    :return: итератор смещений концов совпадений или пар "смещение, метки".
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер порции должен быть положительным.")
+    scanner = Scanner(dfa, tagged)
+    with open(path, "rb") as source:
+        # Пустой файл отобразить в память нельзя
+        if os.fstat(source.fileno()).st_size == 0:
+            yield from scanner.feed(b"")
+            return
+        with mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ) as memory:
+            for start in range(0, len(memory), chunk_size):
+                yield from scanner.feed(memory[start:start + chunk_size])
+                if scanner.finished:
+                    return
+
+
+async def scan_async(dfa: Union[Automaton, FrozenAutomaton, CompiledDFA], reader,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE, tagged: bool = False) -> AsyncIterator[Match]:
+    """
+    Поиск совпадений в асинхронном потоке, например asyncio.StreamReader сокета.
+    Порции обрабатываются по мере поступления, не дожидаясь заполнения chunk_size.
+    :param dfa: детерминированный автомат, его компактное или табличное представление.
+    :param reader: объект с сопрограммой read(size), возвращающей пустую порцию в конце потока.
+    :param chunk_size: наибольший размер порции.
+    :param tagged: сообщать ли вместе со смещением метки допускающего состояния.
+    :return: асинхронный итератор смещений концов совпадений или пар "смещение, метки".
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер порции должен быть положительным.")
+    scanner = Scanner(dfa, tagged)
+    while True:
+        chunk = await reader.read(chunk_size)
+        for match in scanner.feed(chunk):
+            yield match
+        if not chunk or scanner.finished:
+            return
@@ -0,0 +1,336 @@
+from bisect import bisect_right
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+# Наибольший код символа Unicode, используется для дополнения класса вида [^...]
+MAX_CODE_POINT = 0x10FFFF
+
+# Символы, которые экранируются при записи класса
+_SPECIAL = {"\\", "[", "]", "-", "^"}
+# Однобуквенные экранирующие последовательности
+_SIMPLE_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "f": "\f", "v": "\v", "0": "\0"}
+# Длины шестнадцатеричных кодов после \x, \u и \U
+_HEX_ESCAPES = {"x": 2, "u": 4, "U": 8}
+
+# Класс символов - отсортированный список непересекающихся диапазонов кодов символов (включительно)
+Ranges = List[Tuple[int, int]]
+
+
+def parse_label(label: str) -> Optional[Ranges]:
+    """
+    Разбор метки перехода как множества символов.
+    Метка задаёт множество символов, если она состоит из одного символа, одной экранирующей
+    последовательности (\\x41, \\u00e9, \\n), диапазона вида a-z или \\x00-\\x7f или класса
+    в квадратных скобках: [a-z0-9_], [^\\n]. Символ ε множеством символов не считается.
+    :param label: метка перехода.
+    :return: диапазоны кодов символов или None, если метка - обычный многобуквенный символ.
+    :raise ValueError: если класс в квадратных скобках записан некорректно.
+    """
+    if label == "ε" or label == "":
+        return None
+    if len(label) == 1:
+        return [(ord(label), ord(label))]
+
+    if len(label) > 2 and label[0] == "[" and label[-1] == "]":
+        return parse_class(label[1:-1])
+
+    # Одна экранирующая последовательность или диапазон без скобок
+    try:
+        first, position = parse_atom(label, 0)
+        if position == len(label):
+            return [(first, first)]
+        if label[position] == "-" and position + 1 < len(label):
+            last, position = parse_atom(label, position + 1)
+            if position == len(label) and first <= last:
+                return [(first, last)]
+    except ValueError:
+        pass
+    return None
+
+
+def parse_class(body: str) -> Ranges:
+    """
+    Разбор содержимого квадратных скобок: одиночных символов, экранирующих последовательностей
+    и диапазонов вида a-z; класс, начинающийся с ^, дополняется до MAX_CODE_POINT.
+    :param body: текст между скобками.
+    :return: диапазоны кодов символов.
+    :raise ValueError: если класс записан некорректно.
+    """
+    negate = body.startswith("^") and len(body) > 1
+    position = 1 if negate else 0
+    ranges: Ranges = []
+    while position < len(body):
+        first, position = parse_atom(body, position)
+        last = first
+        if position + 1 < len(body) and body[position] == "-":
+            last, position = parse_atom(body, position + 1)
+            if last < first:
+                raise ValueError(f"Неверный диапазон символов в классе \"[{body}]\".")
+        ranges.append((first, last))
+
+    ranges = normalize(ranges)
+    if negate:
+        complement = []
+        start = 0
+        for first, last in ranges:
+            if first > start:
+                complement.append((start, first - 1))
+            start = last + 1
+        if start <= MAX_CODE_POINT:
+            complement.append((start, MAX_CODE_POINT))
+        ranges = complement
+    if not ranges:
+        raise ValueError(f"Пустой класс символов \"[{body}]\".")
+    return ranges
+
+
+def parse_atom(text: str, position: int) -> Tuple[int, int]:
+    """
+    Разбор одного символа или экранирующей последовательности (\\n, \\x41, \\u00e9, \\U0001f600);
+    экранированный символ без специального значения обозначает сам себя.
+    :param text: разбираемый текст.
+    :param position: позиция начала символа.
+    :return: код символа и позиция следующего за ним.
+    :raise ValueError: если экранирующая последовательность некорректна.
+    """
+    char = text[position]
+    if char != "\\":
+        return ord(char), position + 1
+    if position + 1 >= len(text):
+        raise ValueError("Незавершённая экранирующая последовательность.")
+
+    kind = text[position + 1]
+    if kind in _HEX_ESCAPES:
+        digits = text[position + 2:position + 2 + _HEX_ESCAPES[kind]]
+        if len(digits) != _HEX_ESCAPES[kind] or any(digit not in "0123456789abcdefABCDEF" for digit in digits):
+            raise ValueError(f"Некорректный код символа \"\\{kind}{digits}\".")
+        code = int(digits, 16)
+        if code > MAX_CODE_POINT:
+            raise ValueError(f"Код символа \"\\{kind}{digits}\" вне диапазона Unicode.")
+        return code, position + 2 + len(digits)
+    return ord(_SIMPLE_ESCAPES.get(kind, kind)), position + 2
+
+
+def is_class_label(label: str) -> bool:
+    """
+    Проверка, является ли метка классом символов, а не отдельным символом.
+    :param label: метка перехода.
+    :return: True для меток, задающих множество символов и состоящих более чем из одного знака.
+    """
+    return len(label) > 1 and _try_parse(label) is not None
+
+
+def format_class(ranges: Ranges) -> str:
+    """
+    Получение канонической метки для множества символов.
+    Множество из одного символа записывается самим символом, остальные - классом в квадратных скобках.
+    :param ranges: диапазоны кодов символов.
+    :return: метка перехода.
+    """
+    ranges = normalize(ranges)
+    if len(ranges) == 1 and ranges[0][0] == ranges[0][1]:
+        char = chr(ranges[0][0])
+        if char != "ε" and char.isprintable() and not char.isspace() or char == " ":
+            return char
+
+    parts = []
+    for first, last in ranges:
+        parts.append(_escape(first))
+        if last > first + 1:
+            parts.append("-")
+        if last > first:
+            parts.append(_escape(last))
+    return "[" + "".join(parts) + "]"
+
+
+def normalize(ranges: Iterable[Tuple[int, int]]) -> Ranges:
+    """
+    Упорядочивание диапазонов и объединение пересекающихся и соседних.
+    :param ranges: диапазоны кодов символов.
+    :return: отсортированные непересекающиеся диапазоны.
+    """
+    merged: Ranges = []
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            if last > merged[-1][1]:
+                merged[-1] = (merged[-1][0], last)
+        else:
+            merged.append((first, last))
+    return merged
+
+
+def union_label(labels: Iterable[str]) -> str:
+    """
+    Получение метки, задающей объединение множеств символов нескольких меток.
+    :param labels: метки, задающие множества символов.
+    :return: каноническая метка объединения.
+    """
+    ranges: Ranges = []
+    for label in labels:
+        ranges.extend(parse_label(label))
+    return format_class(ranges)
+
+
+def split_label(label: str) -> List[str]:
+    """
+    Разделение метки стрелки на метки отдельных переходов.
+    Метки разделяются запятыми вне квадратных скобок, одиночная запятая - обычный символ.
+    :param label: метка стрелки.
+    :return: метки переходов в порядке записи.
+    """
+    if len(label) <= 1:
+        return [label]
+
+    items = []
+    start = 0
+    in_class = False
+    position = 0
+    while position < len(label):
+        char = label[position]
+        if char == "\\":
+            position += 1
+        elif char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "," and not in_class:
+            items.append(label[start:position])
+            start = position + 1
+        position += 1
+    items.append(label[start:])
+    return items
+
+
+def partition(labels: Iterable[str]) -> Tuple[List[str], Dict[str, List[int]]]:
+    """
+    Разбиение множеств символов меток на наименьшее число непересекающихся классов.
+    Два символа попадают в один класс, если каждая метка содержит либо оба, либо ни одного
+    из них, поэтому каждая метка - объединение нескольких классов. Метки, не задающие
+    множеств символов, образуют отдельные классы.
+    :param labels: метки переходов без ε.
+    :return: метки классов в порядке сортировки и номера классов, составляющих каждую метку.
+    """
+    labels = sorted(set(labels))
+    opaque = []
+    # Границы диапазонов: на каждой из них меняется множество содержащих символ меток
+    events: Dict[int, List[Tuple[int, bool]]] = {}
+    for label_id, label in enumerate(labels):
+        ranges = _try_parse(label)
+        if ranges is None:
+            opaque.append(label)
+            continue
+        for first, last in normalize(ranges):
+            events.setdefault(first, []).append((label_id, True))
+            events.setdefault(last + 1, []).append((label_id, False))
+
+    points = sorted(events)
+    active = set()
+    signature_class: Dict[FrozenSet[int], int] = {}
+    class_ranges: List[Ranges] = []
+    class_labels: List[List[int]] = []
+    for i, point in enumerate(points[:-1]):
+        for label_id, starts in events[point]:
+            if starts:
+                active.add(label_id)
+            else:
+                active.discard(label_id)
+        if not active:
+            continue
+        signature = frozenset(active)
+        class_id = signature_class.get(signature)
+        if class_id is None:
+            class_id = len(class_ranges)
+            signature_class[signature] = class_id
+            class_ranges.append([])
+            class_labels.append(sorted(signature))
+        class_ranges[class_id].append((point, points[i + 1] - 1))
+
+    names = [format_class(ranges) for ranges in class_ranges] + opaque
+    order = sorted(range(len(names)), key=names.__getitem__)
+    position = {class_id: i for i, class_id in enumerate(order)}
+
+    members: Dict[str, List[int]] = {label: [] for label in labels}
+    for class_id, label_ids in enumerate(class_labels):
+        for label_id in label_ids:
+            members[labels[label_id]].append(position[class_id])
+    for i, label in enumerate(opaque):
+        members[label].append(position[len(class_ranges) + i])
+    for classes in members.values():
+        classes.sort()
+    return [names[class_id] for class_id in order], members
+
+
+class ClassIndex:
+    """
+    Поиск метки, множество символов которой содержит заданный символ.
+    Предполагается, что множества символов меток не пересекаются.
+    """
+
+    def __init__(self, labels: List[str]):
+        """
+        Построение индекса.
+        :param labels: метки в порядке их номеров.
+        """
+        bounds = []
+        for label_id, label in enumerate(labels):
+            for first, last in _try_parse(label) or ():
+                bounds.append((first, last, label_id))
+        bounds.sort()
+        self._firsts = [first for first, _, _ in bounds]
+        self._lasts = [last for _, last, _ in bounds]
+        self._ids = [label_id for _, _, label_id in bounds]
+
+    def find(self, char: str) -> int:
+        """
+        Поиск метки, содержащей символ.
+        :param char: символ.
+        :return: номер метки или -1, если символ не входит ни в одну метку.
+        """
+        code = ord(char)
+        i = bisect_right(self._firsts, code) - 1
+        if i >= 0 and code <= self._lasts[i]:
+            return self._ids[i]
+        return -1
+
+
+class SymbolCache(dict):
+    """
+    Словарь "символ - номер", значения которого вычисляются при первом обращении.
+    """
+
+    def __init__(self, find: Callable[[str], Optional[int]]):
+        """
+        :param find: функция, вычисляющая номер по символу.
+        """
+        super().__init__()
+        self._find = find
+
+    def __missing__(self, char: str) -> Optional[int]:
+        value = self._find(char)
+        self[char] = value
+        return value
+
+
+def _try_parse(label: str) -> Optional[Ranges]:
+    """
+    Разбор метки, при котором некорректно записанные классы считаются обычными символами.
+    """
+    try:
+        return parse_label(label)
+    except ValueError:
+        return None
+
+
+def _escape(code: int) -> str:
+    """
+    Запись символа внутри класса.
+    """
+    char = chr(code)
+    if char in _SPECIAL or char == ",":
+        return "\\" + char
+    if char.isprintable() and not char.isspace() or char == " ":
+        return char
+    if code <= 0xFF:
+        return f"\\x{code:02x}"
+    if code <= 0xFFFF:
+        return f"\\u{code:04x}"
+    return f"\\U{code:08x}"
@@ -0,0 +1,56 @@
+import itertools
+from typing import Iterator
+from nfa_converter.automaton import Automaton
+
+
+def abb_enfa() -> Automaton:
+    """
+    ε-НКА из 11 состояний для языка (a|b)*abb, построенный по Томпсону.
+    """
+    edges = [("0", "1", "ε"), ("0", "7", "ε"), ("1", "2", "ε"), ("1", "4", "ε"), ("2", "3", "a"), ("4", "5", "b"),
+             ("3", "6", "ε"), ("5", "6", "ε"), ("6", "1", "ε"), ("6", "7", "ε"), ("7", "8", "a"), ("8", "9", "b"),
+             ("9", "10", "b")]
+    return Automaton.from_edges("eNFA", edges, start_states={"0"}, final_states={"10"})
+
+
+def mokrushin_enfa() -> Automaton:
+    """
+    ε-НКА из 7 состояний с двумя начальными состояниями (docs/mokrushin_nfa_q0q3.dot).
+    """
+    edges = [("q0", "q1", "ε"), ("q0", "q2", "ε"), ("q0", "q5", "ε"), ("q1", "q6", "b"), ("q2", "q2", "a"),
+             ("q2", "q2", "b"), ("q2", "q5", "b"), ("q2", "q6", "b"), ("q3", "q2", "ε"), ("q3", "q4", "ε"),
+             ("q4", "q6", "b"), ("q5", "q5", "b"), ("q6", "q6", "a"), ("q6", "q6", "b")]
+    return Automaton.from_edges("eNFA", edges, start_states={"q0", "q3"}, final_states={"q5", "q6"})
+
+
+def accepts(automaton: Automaton, word: str) -> bool:
+    """
+    Проверка допуска слова автоматом прямым моделированием множества состояний.
+    """
+    def closure(states):
+        stack = list(states)
+        reachable = set(states)
+        while stack:
+            state = stack.pop()
+            for dst in automaton.get_transitions_from(state).get("ε", ()):
+                if dst not in reachable:
+                    reachable.add(dst)
+                    stack.append(dst)
+        return reachable
+
+    current = closure(automaton.get_start_states())
+    for symbol in word:
+        moves = set()
+        for state in current:
+            moves.update(automaton.get_transitions_from(state).get(symbol, ()))
+        current = closure(moves)
+    return len(current & automaton.get_final_states()) > 0
+
+
+def words(alphabet: str, max_length: int) -> Iterator[str]:
+    """
+    Перебор всех слов над алфавитом длины не больше max_length в порядке возрастания длины.
+    """
+    for length in range(max_length + 1):
+        for letters in itertools.product(alphabet, repeat=length):
+            yield "".join(letters)
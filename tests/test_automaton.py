@@ -59,3 +59,148 @@ class AutomatonTest(unittest.TestCase):
         self.assertSetEqual(dfa.get_final_states(), {"3", "4"})
         self.assertDictEqual(dfa.get_transitions_from("1"), {"a": {"2", "3"}, "ε": {"4"}})
         self.assertEqual(dfa.get_type(), AutomatonType.eNFA)
+
+    def test_freeze(self):
+        nfa = Automaton("NFA")
+        nfa.add_state("1")
+        nfa.add_state("2")
+        nfa.add_state("3")
+        nfa.set_start_states({"1"})
+        nfa.set_final_states({"3"})
+        nfa.set_alphabet({"a", "b"})
+        nfa.add_transition("1", "2", "a")
+        nfa.add_transition("1", "3", "a")
+        nfa.add_transition("2", "3", "b")
+        nfa.add_transition("3", "1", "ε")
+
+        frozen = nfa.freeze()
+        self.assertListEqual(frozen.states, ["1", "2", "3"])
+        self.assertListEqual(frozen.symbols, ["a", "b"])
+        self.assertListEqual(list(frozen.successors(0, 0)), [1, 2])
+        self.assertListEqual(list(frozen.successors(1, 1)), [2])
+        self.assertListEqual(list(frozen.successors(2, 0)), [])
+        self.assertListEqual(list(frozen.epsilon_successors(2)), [0])
+        self.assertListEqual(list(frozen.start_states), [0])
+        self.assertListEqual(list(frozen.final), [0, 0, 1])
+        self.assertEqual(frozen.transition_count(), 4)
+        self.assertEqual(frozen.get_type(), AutomatonType.eNFA)
+        self.assertIs(nfa.freeze(), frozen)
+
+        restored = frozen.to_automaton()
+        self.assertSetEqual(restored.get_states(), nfa.get_states())
+        self.assertSetEqual(restored.get_start_states(), nfa.get_start_states())
+        self.assertSetEqual(restored.get_final_states(), nfa.get_final_states())
+        self.assertSetEqual(restored.get_alphabet(), nfa.get_alphabet())
+        self.assertDictEqual(restored.get_all_transitions(), nfa.get_all_transitions())
+
+        nfa.add_transition("2", "2", "a")
+        self.assertIsNot(nfa.freeze(), frozen)
+        self.assertListEqual(list(nfa.freeze().successors(1, 0)), [1])
+
+    def test_epsilon_closures(self):
+        edges = [(str(i), str(i + 1), "ε") for i in range(20)] + [("20", "0", "ε"), ("21", "40", "ε")]
+        nfa = Automaton.from_edges("eNFA", edges, start_states={"0"}, final_states={"20"},
+                                   states=[str(i) for i in range(41)])
+        frozen = nfa.freeze()
+        closures = epsilon_closures(frozen)
+        cycle = [frozen.state_index[str(i)] for i in range(21)]
+        self.assertListEqual(shifted_members(closures[cycle[5]]), sorted(cycle))
+        self.assertListEqual(shifted_members(closures[frozen.state_index["40"]]), [frozen.state_index["40"]])
+
+        union = shifted_union([closures[frozen.state_index["21"]], closures[frozen.state_index["3"]]])
+        self.assertListEqual(shifted_members(union), sorted(cycle + [frozen.state_index[state] for state in ("21", "40")]))
+        self.assertEqual(union, shifted_union([closures[frozen.state_index["3"]], closures[frozen.state_index["21"]]]))
+        self.assertEqual(shifted_union([]), (0, 0))
+        self.assertListEqual(shifted_members((0, 0)), [])
+
+    def test_setters_copy_arguments(self):
+        dfa = Automaton("DFA")
+        for state in ("1", "2", "3"):
+            dfa.add_state(state)
+        dfa.set_start_states({"1"})
+        alphabet = {"a"}
+        final_states = {"2"}
+        dfa.set_alphabet(alphabet)
+        dfa.set_final_states(final_states)
+        dfa.add_transition("1", "2", "a")
+        self.assertEqual(dfa.get_type(), AutomatonType.DFA)
+        frozen = dfa.freeze()
+
+        # Изменения переданных множеств не влияют на автомат и его представление
+        alphabet.add("b")
+        final_states.add("3")
+        self.assertIs(dfa.freeze(), frozen)
+        self.assertSetEqual(dfa.get_alphabet(), {"a"})
+        self.assertSetEqual(dfa.get_final_states(), {"2"})
+
+        dfa.add_transition("1", "3", "a")
+        self.assertEqual(dfa.get_type(), AutomatonType.NFA)
+        dfa.remove_transition("1", "3", "a")
+        dfa.add_transition("1", "3", "[a-c]")
+        self.assertEqual(dfa.get_type(), AutomatonType.NFA)
+
+    def test_single_state_setters(self):
+        edges = [("1", "2", "a"), ("2", "3", "a"), ("3", "2", "b"), ("1", "3", "b")]
+        dfa = Automaton.from_edges("DFA", edges, start_states={"1"}, final_states={"2"})
+        frozen = dfa.freeze()
+        dfa.add_final_state("3")
+        self.assertIsNot(dfa.freeze(), frozen)
+        dfa.remove_final_state("2")
+        self.assertSetEqual(dfa.get_final_states(), {"3"})
+        dfa.set_start_states({"2"})
+        dfa.remove_start_state("1")
+        self.assertSetEqual(dfa.get_start_states(), {"2"})
+        with self.assertRaises(StateNotFoundError):
+            dfa.remove_start_state("1")
+        with self.assertRaises(StateNotFoundError):
+            dfa.add_final_state("4")
+
+        # Входящие переходы ищутся только среди указанных предшественников
+        dfa.remove_state("3", predecessors=["1", "2"])
+        self.assertDictEqual(dfa.get_all_transitions(), {"1": {"a": {"2"}}, "2": {}})
+        self.assertSetEqual(dfa.get_final_states(), set())
+
+    def test_bulk_construction(self):
+        edges = [("1", "2", "a"), ("1", "3", "b"), ("2", "3", "a"), ("2", "3", "b"), ("1", "2", "a"), ("3", "1", "ε")]
+        nfa = Automaton.from_edges("eNFA", edges, start_states={"1"}, final_states={"3"})
+        self.assertSetEqual(nfa.get_states(), {"1", "2", "3"})
+        self.assertSetEqual(nfa.get_alphabet(), {"a", "b"})
+        self.assertDictEqual(nfa.get_all_transitions(),
+                             {"1": {"a": {"2"}, "b": {"3"}}, "2": {"a": {"3"}, "b": {"3"}}, "3": {"ε": {"1"}}})
+        self.assertEqual(nfa.get_type(), AutomatonType.eNFA)
+
+        nfa.add_states(["4", "5"])
+        nfa.add_transitions_bulk([("4", "5", "a"), ("1", "4", "a"), ("3", "5", "ε")])
+        self.assertDictEqual(nfa.get_transitions_from("1"), {"a": {"2", "4"}, "b": {"3"}})
+        self.assertDictEqual(nfa.get_transitions_from("3"), {"ε": {"1", "5"}})
+        self.assertEqual(nfa.get_type(), AutomatonType.eNFA)
+
+        # При ошибке проверки автомат не изменяется
+        with self.assertRaises(StateNotFoundError):
+            nfa.add_transitions_bulk([("1", "5", "b"), ("5", "6", "a")])
+        self.assertDictEqual(nfa.get_transitions_from("1"), {"a": {"2", "4"}, "b": {"3"}})
+        with self.assertRaises(StateAlreadyExists):
+            nfa.add_states(["6", "1"])
+        self.assertNotIn("6", nfa.get_states())
+        with self.assertRaises(StateNotFoundError):
+            Automaton.from_edges("NFA", edges, start_states={"1"}, final_states={"4"}, states={"1", "2", "3"})
+
+        trusted = Automaton.from_edges("NFA", edges, start_states={"1"}, final_states={"3"},
+                                       states={"1", "2", "3"}, alphabet={"a", "b", "c"}, trusted=True)
+        self.assertSetEqual(trusted.get_alphabet(), {"a", "b", "c"})
+        self.assertDictEqual(trusted.freeze().to_automaton().get_all_transitions(), trusted.get_all_transitions())
+
+    def test_invalid_class_labels(self):
+        # Некорректный класс в квадратных скобках отвергается сразу, а не записывается в dot формат,
+        # который затем нельзя прочитать
+        nfa = Automaton.from_edges("NFA", [("1", "2", "x"), ("1", "2", "b-a")], start_states={"1"}, final_states={"2"})
+        with self.assertRaises(ValueError):
+            nfa.add_transition("1", "2", "[b-a]")
+        with self.assertRaises(ValueError):
+            nfa.add_transitions_bulk([("1", "2", "[a-c]"), ("2", "1", "[z-a]")])
+        with self.assertRaises(ValueError):
+            nfa.set_alphabet({"x", "[b-a]"})
+        with self.assertRaises(ValueError):
+            Automaton.from_edges("NFA", [("1", "2", "[b-a]")], start_states={"1"}, final_states={"2"})
+        self.assertDictEqual(nfa.get_all_transitions(), {"1": {"x": {"2"}, "b-a": {"2"}}})
+        self.assertSetEqual(nfa.get_alphabet(), {"x", "b-a"})
@@ -0,0 +1,111 @@
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from nfa_converter.batch import ConversionOptions, convert_many, output_path
+from nfa_converter.cache import CACHE_DIR_VARIABLE
+from nfa_converter.cli import main
+from nfa_converter.readwrite import read
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.sources = []
+        for file_name in ("nfa_first.dot", "sample_valid_first.dot", "sample_invalid.dot"):
+            source = os.path.join(self.directory, file_name)
+            shutil.copy(os.path.join("dot_files", file_name), source)
+            self.sources.append(source)
+        self.sources.append(os.path.join(self.directory, "missing.dot"))
+        # Кэш по умолчанию - во временном каталоге
+        self.cache_dir = os.environ.get(CACHE_DIR_VARIABLE)
+        os.environ[CACHE_DIR_VARIABLE] = os.path.join(self.directory, "cache")
+
+    def tearDown(self):
+        if self.cache_dir is None:
+            del os.environ[CACHE_DIR_VARIABLE]
+        else:
+            os.environ[CACHE_DIR_VARIABLE] = self.cache_dir
+        shutil.rmtree(self.directory)
+
+    def check_results(self, results, output_dir):
+        results = {os.path.basename(result.source): result for result in results}
+        self.assertSetEqual(set(results), {"nfa_first.dot", "sample_valid_first.dot", "sample_invalid.dot",
+                                           "missing.dot"})
+
+        first = results["nfa_first.dot"]
+        self.assertIsNone(first.error)
+        self.assertEqual(first.destination, os.path.join(output_dir, "nfa_first.dfa.dot"))
+        self.assertEqual(first.states, 4)
+        with open(first.destination, "r", encoding="utf-8") as dot_file:
+            self.assertEqual(len(read(dot_file.read()).get_states()), 4)
+
+        self.assertTrue(results["sample_invalid.dot"].error.startswith("StateNotFoundError"))
+        self.assertIsNone(results["sample_invalid.dot"].destination)
+        self.assertTrue(results["missing.dot"].error.startswith("FileNotFoundError"))
+
+    def test_convert_in_process(self):
+        results = list(convert_many(self.sources, workers=1, options=ConversionOptions(minimize=True)))
+        self.check_results(results, self.directory)
+
+    def test_default_cache(self):
+        # Кэш используется по умолчанию, без каталога используется каталог по умолчанию
+        for expected in (False, True):
+            (result,) = convert_many(self.sources[:1], workers=1)
+            self.assertIs(result.cached, expected)
+        self.assertTrue(os.listdir(os.environ[CACHE_DIR_VARIABLE]))
+        (result,) = convert_many(self.sources[:1], workers=1, options=ConversionOptions(use_cache=False))
+        self.assertFalse(result.cached)
+
+    def test_convert_in_pool(self):
+        output_dir = os.path.join(self.directory, "out")
+        options = ConversionOptions(output_dir=output_dir, engine="bitset", minimize=True)
+        results = list(convert_many(self.sources, workers=2, chunksize=2, options=options))
+        self.check_results(results, output_dir)
+
+    def test_unexpected_error(self):
+        # Ошибка построения ДКА, а не чтения файла, тоже относится только к этому файлу
+        options = ConversionOptions(engine="unknown")
+        for workers in (1, 2):
+            results = list(convert_many(self.sources[:2], workers=workers, options=options))
+            self.assertEqual(len(results), 2)
+            for result in results:
+                self.assertIsNone(result.destination)
+                self.assertTrue(result.error.startswith("ValueError"))
+
+    def test_invalid_arguments(self):
+        # Параметры проверяются при вызове, до получения первого результата
+        output_dir = os.path.join(self.directory, "eager")
+        with self.assertRaises(ValueError):
+            convert_many(self.sources, chunksize=0)
+        convert_many(self.sources, workers=1, options=ConversionOptions(output_dir=output_dir))
+        self.assertTrue(os.path.isdir(output_dir))
+
+    def test_output_path(self):
+        self.assertEqual(output_path(os.path.join("a", "b.dot")), os.path.join("a", "b.dfa.dot"))
+        self.assertEqual(output_path(os.path.join("a", "b.dot"), "c"), os.path.join("c", "b.dfa.dot"))
+
+    def test_cli(self):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main(["-j", "1", *self.sources[:2]])
+        self.assertEqual(code, 0)
+        self.assertIn("nfa_first.dfa.dot (5 состояний)", stdout.getvalue())
+        self.assertEqual(stderr.getvalue(), "")
+
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main(["-j", "1", *self.sources[:2]])
+        self.assertIn("nfa_first.dfa.dot (5 состояний, из кэша)", stdout.getvalue())
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main(["-j", "1", "--no-cache", *self.sources[:2]])
+        self.assertNotIn("из кэша", stdout.getvalue())
+
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(stderr):
+            code = main(["-j", "1", "--minimize", *self.sources])
+        self.assertEqual(code, 1)
+        self.assertIn("missing.dot: FileNotFoundError", stderr.getvalue())
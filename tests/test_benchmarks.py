@@ -0,0 +1,34 @@
+import unittest
+from benchmarks.generators import epsilon_chain, exponential_nfa, random_enfa, random_patterns, thompson_nfa
+from benchmarks.run import Case, compare, run
+from nfa_converter.automaton import *
+from nfa_converter.lazy import LazyDFA
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_generators(self):
+        self.assertEqual(len(nfa_to_dfa(exponential_nfa(5)).get_states()), 64)
+        self.assertEqual(random_enfa(30, seed=7).get_all_transitions(),
+                         random_enfa(30, seed=7).get_all_transitions())
+        self.assertEqual(len(nfa_to_dfa(epsilon_chain(50, cycle=True)).get_states()), 1)
+
+        nfa = thompson_nfa(["ab*", "(a|c)d"])
+        lazy = LazyDFA(nfa)
+        for word, expected in (("a", True), ("abbb", True), ("cd", True), ("ad", True), ("b", False)):
+            self.assertEqual(lazy.match(word), expected, word)
+        self.assertEqual(len(random_patterns(5, seed=1)), 5)
+        with self.assertRaises(ValueError):
+            thompson_nfa(["(ab"])
+
+    def test_run_and_compare(self):
+        results = run([Case("tiny", lambda: exponential_nfa(3), ["abab", "bbbb"])], repeat=1)
+        tiny = results["cases"]["tiny"]
+        self.assertEqual(tiny["dfa_states"], 16)
+        self.assertIn("nfa_to_dfa[bitset]", tiny["timings"])
+        self.assertGreater(tiny["peak_memory"]["nfa_to_dfa"], 0)
+
+        slower = {"cases": {"tiny": {"timings": {name: value * 2 for name, value in tiny["timings"].items()},
+                                     "peak_memory": tiny["peak_memory"]}}}
+        lines, regressions = compare(results, slower)
+        self.assertEqual(regressions, len(tiny["timings"]))
+        self.assertEqual(compare(results, results)[1], 0)
@@ -0,0 +1,124 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+from benchmarks.generators import exponential_nfa
+from nfa_converter.automaton import *
+from nfa_converter.binary import BinaryFormatError, load, save
+from nfa_converter.matcher import compile
+from nfa_converter.readwrite import read
+
+
+class BinaryTest(unittest.TestCase):
+    def assertSameAutomaton(self, first: FrozenAutomaton, second: FrozenAutomaton):
+        self.assertEqual(first.name, second.name)
+        self.assertListEqual(first.states, second.states)
+        self.assertListEqual(first.symbols, second.symbols)
+        for attribute in ("alphabet", "start_states", "final", "offsets", "targets", "eps_offsets", "eps_targets"):
+            self.assertListEqual(list(getattr(first, attribute)), list(getattr(second, attribute)), attribute)
+
+    def test_round_trip(self):
+        with open("dot_files/nfa_first.dot", "r") as dot_file:
+            automaton = read(dot_file.read())
+
+        output = io.BytesIO()
+        save(automaton, output)
+        self.assertEqual(len(output.getvalue()) % 8, 0)
+        loaded = load(io.BytesIO(output.getvalue()))
+        self.assertSameAutomaton(automaton.freeze(), loaded)
+        self.assertEqual(loaded.get_type(), AutomatonType.eNFA)
+
+        restored = loaded.to_automaton()
+        self.assertDictEqual(restored.get_all_transitions(), automaton.get_all_transitions())
+        self.assertSetEqual(restored.get_alphabet(), automaton.get_alphabet())
+
+    def test_mmap(self):
+        dfa = nfa_to_dfa(exponential_nfa(4))
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dfa.bin")
+            save(dfa, path)
+            loaded = load(path, use_mmap=True)
+            self.assertSameAutomaton(dfa.freeze(), loaded)
+            self.assertIsInstance(loaded.targets, memoryview)
+
+            compiled = compile(loaded)
+            self.assertTrue(compiled.match("bbabbbb"))
+            self.assertFalse(compiled.match("bbbbbbabb"))
+
+            # Повторная запись загруженного через mmap автомата
+            copy_path = os.path.join(directory, "copy.bin")
+            save(loaded, copy_path)
+            self.assertSameAutomaton(loaded, load(copy_path))
+            del compiled, loaded
+
+    def test_mmap_validation(self):
+        dfa = nfa_to_dfa(exponential_nfa(3)).freeze()
+        damaged = FrozenAutomaton(dfa.name, dfa.states, dfa.symbols, dfa.alphabet, dfa.start_states, dfa.final,
+                                  dfa.offsets, [len(dfa.states)] * len(dfa.targets), dfa.eps_offsets, dfa.eps_targets)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "damaged.bin")
+            save(damaged, path)
+            # При отображении в память номера по умолчанию не проверяются, а словари не строятся
+            loaded = load(path, use_mmap=True)
+            self.assertIsNone(loaded._state_index)
+            self.assertEqual(loaded.state_index[dfa.states[1]], 1)
+            with self.assertRaises(BinaryFormatError):
+                load(path, use_mmap=True, validate=True)
+            with self.assertRaises(BinaryFormatError):
+                load(path)
+            self.assertEqual(len(load(path, validate=False).targets), len(dfa.targets))
+            del loaded
+
+            # Крайние смещения проверяются всегда
+            offsets = list(dfa.offsets)
+            offsets[-1] -= 1
+            save(FrozenAutomaton(dfa.name, dfa.states, dfa.symbols, dfa.alphabet, dfa.start_states, dfa.final,
+                                 offsets, dfa.targets, dfa.eps_offsets, dfa.eps_targets), path)
+            with self.assertRaises(BinaryFormatError):
+                load(path, use_mmap=True)
+
+    def test_empty_names(self):
+        automaton = Automaton("")
+        automaton.add_state("")
+        automaton.set_start_states({""})
+        output = io.BytesIO()
+        save(automaton, output)
+        loaded = load(io.BytesIO(output.getvalue()))
+        self.assertListEqual(loaded.states, [""])
+        self.assertListEqual(loaded.symbols, [])
+
+    def test_invalid(self):
+        with self.assertRaises(BinaryFormatError):
+            load(io.BytesIO(b"digraph G {}" * 20))
+
+        output = io.BytesIO()
+        save(exponential_nfa(2), output)
+        with self.assertRaises(BinaryFormatError):
+            load(io.BytesIO(output.getvalue()[:-16]))
+
+        # Пустой и обрезанный файлы при отображении в память
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "empty.bin")
+            for data in (b"", output.getvalue()[:4]):
+                with open(path, "wb") as binary_file:
+                    binary_file.write(data)
+                with self.assertRaises(BinaryFormatError):
+                    load(path, use_mmap=True)
+
+    def test_corrupted(self):
+        nfa = exponential_nfa(3)
+        nfa.set_tags({state: {"rule"} for state in nfa.get_final_states()})
+        output = io.BytesIO()
+        save(nfa, output)
+        generator = random.Random(0)
+        # Повреждённый файл либо загружается в корректный автомат, либо отвергается с BinaryFormatError
+        for _ in range(300):
+            data = bytearray(output.getvalue())
+            for position in generator.sample(range(len(data)), 3):
+                data[position] = generator.randrange(256)
+            try:
+                loaded = load(io.BytesIO(bytes(data)))
+            except BinaryFormatError:
+                continue
+            loaded.to_automaton()
@@ -0,0 +1,163 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from benchmarks.generators import random_enfa, random_patterns, thompson_nfa
+from nfa_converter.automaton import *
+from nfa_converter.binary import save
+from nfa_converter.cache import ConversionCache, canonical_hash
+from nfa_converter.readwrite import write
+from nfa_converter.regex import regex_to_nfa
+
+
+def renamed(nfa: Automaton, seed: int) -> Automaton:
+    """
+    Копия автомата со случайно переименованными состояниями и переходами, добавленными в случайном порядке.
+    """
+    generator = random.Random(seed)
+    states = sorted(nfa.get_states())
+    names = dict(zip(states, generator.sample([f"s{i}" for i in range(len(states))], len(states))))
+    edges = [(names[src], names[dst], symbol) for src, transitions in nfa.get_all_transitions().items()
+             for symbol, dst_states in transitions.items() for dst in dst_states]
+    generator.shuffle(edges)
+    return Automaton.from_edges(nfa.get_type().name, edges, {names[state] for state in nfa.get_start_states()},
+                                {names[state] for state in nfa.get_final_states()}, states=names.values(),
+                                alphabet=nfa.get_alphabet())
+
+
+class CacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_canonical_hash(self):
+        for seed in range(6):
+            nfa = random_enfa(10, density=1.2, epsilon_density=0.3, final_ratio=0.3, seed=seed)
+            key = canonical_hash(nfa, minimize=False)
+            self.assertEqual(canonical_hash(renamed(nfa, seed), minimize=False), key)
+            self.assertNotEqual(canonical_hash(nfa, minimize=True), key)
+            self.assertNotEqual(canonical_hash(random_enfa(10, density=1.2, epsilon_density=0.3,
+                                                           final_ratio=0.3, seed=seed + 100), minimize=False), key)
+            changed = nfa.copy()
+            changed.set_final_states(nfa.get_final_states() ^ {"0"})
+            self.assertNotEqual(canonical_hash(changed, minimize=False), key)
+            tagged = nfa.copy()
+            tagged.set_tags({state: {"rule"} for state in nfa.get_final_states()})
+            self.assertNotEqual(canonical_hash(tagged, minimize=False), key)
+
+    def test_canonical_hash_symmetric(self):
+        # Ветви x и y различаются только в глубине,
+        # одинаковые ветви и состояния-близнецы неразличимы без выбора одного из них
+        edges = [("S", "x0", "a"), ("S", "y0", "a")]
+        edges += [(f"x{i}", f"x{i + 1}", "a") for i in range(5)] + [(f"y{i}", f"y{i + 1}", "a") for i in range(6)]
+        edges += [("S", f"c{branch}_0", "b") for branch in range(4)]
+        edges += [(f"c{branch}_{i}", f"c{branch}_{i + 1}", "a") for branch in range(4) for i in range(3)]
+        edges += [("S", f"t{i}", "c") for i in range(5)] + [(f"t{i}", "S", "a") for i in range(5)]
+        nfa = Automaton.from_edges("NFA", edges, start_states={"S"}, final_states={"x5", "c0_3", "c1_3"})
+        key = canonical_hash(nfa)
+        for seed in range(10):
+            self.assertEqual(canonical_hash(renamed(nfa, seed)), key)
+        swapped = {"x": "y", "y": "x"}
+        self.assertEqual(canonical_hash(Automaton.from_edges(
+            "NFA", [(swapped.get(src[0], src[0]) + src[1:], swapped.get(dst[0], dst[0]) + dst[1:], symbol)
+                    for src, dst, symbol in edges], start_states={"S"}, final_states={"y5", "c0_3", "c1_3"})), key)
+
+        changed = nfa.copy()
+        changed.set_final_states({"x5", "c0_3", "c1_2"})
+        self.assertNotEqual(canonical_hash(changed), key)
+
+    def test_canonical_hash_large(self):
+        nfa = thompson_nfa(random_patterns(200))
+        self.assertGreater(len(nfa.get_states()), 4000)
+        self.assertEqual(canonical_hash(renamed(nfa, 0)), canonical_hash(nfa))
+
+    def test_convert_text(self):
+        cache = ConversionCache(self.directory)
+        nfa = random_enfa(10, seed=5)
+        text = write(nfa)
+        dfa, cached = cache.convert_text(text, minimize=True)
+        self.assertFalse(cached)
+        self.assertEqual(len(dfa.get_states()), len(nfa_to_dfa(nfa, minimize=True).get_states()))
+
+        # Неизменившийся текст находится по быстрому ключу без разбора
+        with mock.patch("nfa_converter.cache.canonical_hash") as hash_mock:
+            hit, cached = cache.convert_text(text, minimize=True)
+        self.assertTrue(cached)
+        hash_mock.assert_not_called()
+        self.assertDictEqual(hit.get_all_transitions(), dfa.get_all_transitions())
+
+        # Переименованный автомат находится по каноническому ключу, параметры входят в оба ключа
+        self.assertTrue(cache.convert_text(write(renamed(nfa, 1)), minimize=True)[1])
+        self.assertFalse(cache.convert_text(text)[1])
+        self.assertTrue(cache.convert(nfa)[1])
+
+        # Ссылка на вытесненный ДКА - промах
+        os.remove(os.path.join(self.directory, canonical_hash(nfa, minimize=False, trim=False) + ".nfab"))
+        self.assertFalse(cache.convert_text(text)[1])
+        self.assertTrue(cache.convert_text(text)[1])
+
+    def test_hit(self):
+        cache = ConversionCache(self.directory)
+        for nfa in (random_enfa(12, seed=1), regex_to_nfa("[a-z_][a-z_0-9]*|\\[")):
+            dfa, cached = cache.convert(nfa, minimize=True)
+            self.assertFalse(cached)
+            hit, cached = cache.convert(renamed(nfa, 0), engine="bitset", minimize=True)
+            self.assertTrue(cached)
+            self.assertEqual(hit.get_type(), AutomatonType.DFA)
+            self.assertSetEqual(hit.get_alphabet(), dfa.get_alphabet())
+            self.assertSetEqual(hit.get_start_states(), dfa.get_start_states())
+            self.assertSetEqual(hit.get_final_states(), dfa.get_final_states())
+            self.assertDictEqual(hit.get_all_transitions(), dfa.get_all_transitions())
+            self.assertFalse(cache.convert(nfa)[1])
+        self.assertDictEqual(cache.get_stats(), {"hits": 2, "misses": 4, "evictions": 0})
+
+    def test_eviction(self):
+        cache = ConversionCache(self.directory, max_size=0)
+        nfa = random_enfa(8, seed=2)
+        self.assertFalse(cache.convert(nfa)[1])
+        self.assertFalse(cache.convert(nfa)[1])
+        self.assertEqual(cache.get_stats()["evictions"], 2)
+
+        # Вытесняется давно не использовавшийся файл
+        nfas = [random_enfa(8, seed=seed) for seed in range(3)]
+        cache = ConversionCache(self.directory)
+        paths = []
+        for i, nfa in enumerate(nfas):
+            cache.convert(nfa)
+            paths.append(os.path.join(self.directory, canonical_hash(nfa, minimize=False, trim=False) + ".nfab"))
+            os.utime(paths[-1], (i, i))
+        self.assertTrue(cache.convert(nfas[0])[1])
+        cache = ConversionCache(self.directory, max_size=sum(map(os.path.getsize, paths)) - 1)
+        cache._evict()
+        self.assertListEqual([os.path.exists(path) for path in paths], [True, False, True])
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_corrupted_file(self):
+        cache = ConversionCache(self.directory)
+        nfa = random_enfa(8, seed=4)
+        cache.convert(nfa)
+        key = canonical_hash(nfa, minimize=False, trim=False)
+        with open(os.path.join(self.directory, key + ".nfab"), "wb") as cache_file:
+            cache_file.write(b"garbage")
+        self.assertIsNone(cache.get(key))
+        self.assertFalse(os.path.exists(os.path.join(self.directory, key + ".nfab")))
+        dfa, cached = cache.convert(nfa)
+        self.assertFalse(cached)
+        self.assertEqual(len(dfa.get_states()), len(nfa_to_dfa(nfa).get_states()))
+        self.assertTrue(cache.convert(nfa)[1])
+
+        # Файл с правильной структурой, но ссылками на несуществующие состояния
+        frozen = dfa.freeze()
+        damaged = FrozenAutomaton(frozen.name, frozen.states, frozen.symbols, frozen.alphabet, frozen.start_states,
+                                  frozen.final, frozen.offsets, [len(frozen.states)] * len(frozen.targets),
+                                  frozen.eps_offsets, frozen.eps_targets)
+        save(damaged, os.path.join(self.directory, key + ".nfab"))
+        stats = cache.get_stats()
+        dfa, cached = cache.convert(nfa)
+        self.assertFalse(cached)
+        self.assertEqual(cache.get_stats()["misses"], stats["misses"] + 1)
+        self.assertTrue(cache.convert(nfa)[1])
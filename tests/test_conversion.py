@@ -1,6 +1,10 @@
 import unittest
+from unittest import mock
+from benchmarks.generators import exponential_nfa
 from nfa_converter.automaton import *
+from nfa_converter.automaton import _subset_construction_frontier
 from nfa_converter.readwrite import *
+from tests.helpers import abb_enfa, mokrushin_enfa
 
 
 class ConversionTest(unittest.TestCase):
@@ -31,3 +35,223 @@ class ConversionTest(unittest.TestCase):
         print(write(enfa))
         dfa = nfa_to_dfa(enfa)
         print(write(dfa))
+
+    def test_epsilon_cycle(self):
+        enfa = Automaton("eNFA")
+        for state in ("0", "1", "2", "3"):
+            enfa.add_state(state)
+        enfa.set_start_states({"0"})
+        enfa.set_final_states({"3"})
+        enfa.set_alphabet({"a"})
+
+        enfa.add_transition("0", "1", "ε")
+        enfa.add_transition("1", "2", "ε")
+        enfa.add_transition("2", "0", "ε")
+        enfa.add_transition("2", "3", "a")
+
+        dfa = nfa_to_dfa(enfa)
+        self.assertEqual(len(dfa.get_states()), 2)
+        self.assertDictEqual(dfa.get_transitions_from("A"), {"a": {"B"}})
+        self.assertSetEqual(dfa.get_final_states(), {"B"})
+
+    def test_long_epsilon_chain(self):
+        enfa = Automaton("eNFA")
+        count = 5000
+        for i in range(count):
+            enfa.add_state(str(i))
+        enfa.set_start_states({"0"})
+        enfa.set_final_states({str(count - 1)})
+        enfa.set_alphabet({"a"})
+
+        for i in range(count - 1):
+            enfa.add_transition(str(i), str(i + 1), "ε")
+        enfa.add_transition(str(count - 1), "0", "ε")
+        enfa.add_transition(str(count - 1), "0", "a")
+
+        dfa = nfa_to_dfa(enfa)
+        self.assertSetEqual(dfa.get_states(), {"A"})
+        self.assertSetEqual(dfa.get_final_states(), {"A"})
+        self.assertDictEqual(dfa.get_transitions_from("A"), {"a": {"A"}})
+
+    def test_engines_match(self):
+        # (a|b)*a(a|b)^n - ДКА для такого языка содержит 2^(n+1) состояний
+        n = 8
+        nfa = exponential_nfa(n)
+
+        sets_dfa = nfa_to_dfa(nfa, engine="sets")
+        bitset_dfa = nfa_to_dfa(nfa, engine="bitset")
+        self.assertEqual(len(bitset_dfa.get_states()), 2 ** (n + 1))
+        self.assertSetEqual(sets_dfa.get_states(), bitset_dfa.get_states())
+        self.assertSetEqual(sets_dfa.get_final_states(), bitset_dfa.get_final_states())
+        self.assertDictEqual(sets_dfa.get_all_transitions(), bitset_dfa.get_all_transitions())
+
+        # Запомненные объединения групп очищаются при достижении ограничения
+        with mock.patch("nfa_converter.automaton._MAX_BLOCK_ENTRIES", 4):
+            bounded_dfa = nfa_to_dfa(nfa, engine="bitset")
+        self.assertDictEqual(bounded_dfa.get_all_transitions(), bitset_dfa.get_all_transitions())
+
+    def test_engines_match_multiple_start_states(self):
+        enfa = mokrushin_enfa()
+        sets_dfa = nfa_to_dfa(enfa, engine="sets")
+        bitset_dfa = nfa_to_dfa(enfa, engine="bitset")
+        self.assertDictEqual(sets_dfa.get_all_transitions(), bitset_dfa.get_all_transitions())
+        self.assertSetEqual(sets_dfa.get_final_states(), bitset_dfa.get_final_states())
+
+    def test_parallel_frontier(self):
+        n = 10
+        nfa = exponential_nfa(n)
+
+        # Нумерация состояний не зависит от числа процессов
+        serial_dfa = nfa_to_dfa(nfa, engine="bitset", keep_subsets=True)
+        for workers in (2, 3):
+            parallel_dfa = nfa_to_dfa(nfa, engine="bitset", workers=workers, keep_subsets=True)
+            self.assertEqual(len(parallel_dfa.get_states()), 2 ** (n + 1))
+            self.assertSetEqual(serial_dfa.get_final_states(), parallel_dfa.get_final_states())
+            self.assertDictEqual(serial_dfa.get_all_transitions(), parallel_dfa.get_all_transitions())
+            self.assertEqual(parallel_dfa.get_subset_map().get_subset("ABC"),
+                             serial_dfa.get_subset_map().get_subset("ABC"))
+
+        with self.assertRaises(ValueError):
+            nfa_to_dfa(nfa, engine="sets", workers=2)
+        with self.assertRaises(ValueError):
+            nfa_to_dfa(nfa, engine="bitset", workers=0)
+
+    def test_default_workers(self):
+        # По умолчанию несколько процессов используются только способом "bitset"
+        enfa = abb_enfa()
+        expected = nfa_to_dfa(enfa)
+        with mock.patch("os.cpu_count", return_value=8), \
+                mock.patch("nfa_converter.automaton._subset_construction_frontier",
+                           wraps=_subset_construction_frontier) as frontier:
+            sets_dfa = nfa_to_dfa(enfa, workers=None)
+            frontier.assert_not_called()
+            bitset_dfa = nfa_to_dfa(enfa, engine="bitset", workers=None)
+            self.assertEqual(frontier.call_args[0][2], 8)
+        self.assertDictEqual(sets_dfa.get_all_transitions(), expected.get_all_transitions())
+        self.assertDictEqual(bitset_dfa.get_all_transitions(), expected.get_all_transitions())
+
+    def test_statistics(self):
+        nfa = exponential_nfa(6)
+        for engine, workers in (("sets", 1), ("bitset", 1), ("bitset", 2)):
+            stats = ConversionStats()
+            reports = []
+            dfa = nfa_to_dfa(nfa, engine=engine, workers=workers, stats=stats,
+                             progress=lambda current: reports.append(current.processed_states),
+                             progress_interval=16)
+            self.assertEqual(stats.engine, engine)
+            self.assertEqual(stats.dfa_states, len(dfa.get_states()))
+            self.assertEqual(stats.processed_states, 2 ** 7)
+            self.assertEqual(stats.queue_depth, 0)
+            self.assertGreater(stats.max_queue_depth, 0)
+            # Каждый из двух переходов каждого состояния, кроме ведущих в новые состояния, - попадание
+            self.assertEqual(stats.subset_hits, 2 * 2 ** 7 - (2 ** 7 - 1))
+            self.assertEqual(stats.peak_subset_size, 8)
+            self.assertGreater(stats.elapsed, 0)
+            self.assertTrue(reports)
+            self.assertListEqual(reports, sorted(reports))
+            self.assertIn("moves_time", stats.as_dict())
+
+    def test_budget(self):
+        nfa = exponential_nfa(10)
+        with self.assertRaises(ConversionAborted) as context:
+            nfa_to_dfa(nfa, max_states=100)
+        stats = context.exception.stats
+        self.assertGreater(stats.dfa_states, 100)
+        self.assertLess(stats.processed_states, 100)
+        self.assertGreater(stats.queue_depth, 0)
+
+        with self.assertRaises(ConversionAborted):
+            nfa_to_dfa(nfa, engine="bitset", time_limit=0)
+        self.assertEqual(len(nfa_to_dfa(nfa, max_states=2 ** 11).get_states()), 2 ** 11)
+        with self.assertRaises(ValueError):
+            nfa_to_dfa(nfa, progress_interval=0)
+
+    def test_trim(self):
+        nfa = Automaton("eNFA")
+        for state in ("start", "a", "final", "dead", "unreachable", "orphan"):
+            nfa.add_state(state)
+        nfa.set_start_states({"start"})
+        nfa.set_final_states({"final", "orphan"})
+        nfa.set_alphabet({"a", "b"})
+        nfa.add_transition("start", "a", "ε")
+        nfa.add_transition("start", "dead", "b")
+        nfa.add_transition("a", "final", "a")
+        nfa.add_transition("a", "dead", "a")
+        nfa.add_transition("dead", "dead", "b")
+        nfa.add_transition("unreachable", "final", "a")
+
+        copy = nfa.copy()
+        self.assertDictEqual(copy.trim(), {"unreachable": 2, "dead": 1})
+        self.assertSetEqual(copy.get_states(), {"start", "a", "final"})
+        self.assertSetEqual(copy.get_final_states(), {"final"})
+        self.assertDictEqual(copy.get_all_transitions(), {"start": {"ε": {"a"}}, "a": {"a": {"final"}}})
+        self.assertDictEqual(copy.trim(), {"unreachable": 0, "dead": 0})
+        self.assertEqual(len(nfa.get_states()), 6)
+
+        stats = ConversionStats()
+        dfa = nfa_to_dfa(nfa, trim=True, stats=stats, keep_subsets=True)
+        self.assertEqual((stats.unreachable_states, stats.dead_states), (2, 1))
+        self.assertEqual(len(dfa.get_states()), 2)
+        self.assertEqual(len(nfa_to_dfa(nfa).get_states()), 3)
+        self.assertSetEqual(dfa.get_subset_map().get_subset("A"), {"start", "a"})
+
+        # Начальное состояние сохраняется, даже если язык пуст
+        nfa.set_final_states(set())
+        self.assertDictEqual(nfa.trim(), {"unreachable": 2, "dead": 3})
+        self.assertSetEqual(nfa.get_states(), {"start"})
+        self.assertDictEqual(nfa.get_all_transitions(), {"start": {}})
+        self.assertEqual(len(nfa_to_dfa(nfa).get_states()), 1)
+
+    def test_unknown_engine(self):
+        nfa = Automaton("NFA")
+        nfa.add_state("0")
+        nfa.set_start_states({"0"})
+        with self.assertRaises(ValueError):
+            nfa_to_dfa(nfa, engine="unknown")
+
+    def test_state_naming(self):
+        self.assertListEqual([alphabetic_names(i) for i in (0, 1, 25, 26, 27, 51, 52, 701, 702)],
+                             ["A", "B", "Z", "AA", "AB", "AZ", "BA", "ZZ", "AAA"])
+        self.assertEqual(numeric_names(12), "12")
+
+        nfa = Automaton("NFA")
+        count = 100
+        for i in range(count):
+            nfa.add_state(str(i))
+        nfa.set_start_states({"0"})
+        nfa.set_final_states({str(count - 1)})
+        nfa.set_alphabet({"a"})
+        for i in range(count - 1):
+            nfa.add_transition(str(i), str(i + 1), "a")
+
+        dfa = nfa_to_dfa(nfa)
+        self.assertEqual(len(dfa.get_states()), count)
+        self.assertSetEqual(dfa.get_final_states(), {"CV"})
+        self.assertIsNone(dfa.get_subset_map())
+
+        dfa = nfa_to_dfa(nfa, naming=numeric_names, keep_subsets=True)
+        self.assertSetEqual(dfa.get_states(), {str(i) for i in range(count)})
+        self.assertSetEqual(dfa.get_subset_map().get_subset("42"), {"42"})
+
+    def test_subset_map(self):
+        enfa = abb_enfa()
+        dfa = nfa_to_dfa(enfa, keep_subsets=True)
+        subset_map = dfa.get_subset_map()
+        self.assertSetEqual(subset_map.get_subset("A"), {"0", "1", "2", "4", "7"})
+        self.assertSetEqual(subset_map.get_subset("B"), {"1", "2", "3", "4", "6", "7", "8"})
+        (final_state,) = dfa.get_final_states()
+        self.assertIn("10", subset_map.get_subset(final_state))
+        with self.assertRaises(StateNotFoundError):
+            subset_map.get_subset("Z")
+
+        # Состояние минимального ДКА соответствует объединению нескольких множеств
+        with self.assertRaises(ValueError):
+            nfa_to_dfa(enfa, keep_subsets=True, minimize=True)
+
+    def test_class_labels_from_api(self):
+        # Метки, записанные как классы символов, задают множества символов и при добавлении через API
+        nfa = Automaton.from_edges("NFA", [("p", "q", "a-c"), ("p", "r", "b"), ("p", "q", "ab"), ("p", "q", "\\n")],
+                                   start_states={"p"}, final_states={"q", "r"})
+        dfa = nfa_to_dfa(nfa)
+        self.assertSetEqual(dfa.get_alphabet(), {"[ac]", "b", "ab", "[\\x0a]"})
+        self.assertEqual(len(dfa.get_states()), 3)
@@ -0,0 +1,140 @@
+import functools
+import random
+import unittest
+from unittest import mock
+from benchmarks.generators import exponential_nfa
+from nfa_converter.automaton import *
+from nfa_converter.incremental import IncrementalConverter
+
+
+def subset_structure(dfa: Automaton, subset_of) -> tuple:
+    """
+    Описание ДКА через множества состояний НКА, не зависящее от идентификаторов состояний ДКА.
+    """
+    subset_of = functools.lru_cache(maxsize=None)(subset_of)
+    transitions = set()
+    for src, moves in dfa.get_all_transitions().items():
+        for symbol, dst_states in moves.items():
+            for dst in dst_states:
+                transitions.add((subset_of(src), symbol, subset_of(dst)))
+    return ({subset_of(state) for state in dfa.get_states()},
+            {subset_of(state) for state in dfa.get_start_states()},
+            {subset_of(state) for state in dfa.get_final_states()},
+            transitions)
+
+
+class IncrementalConverterTest(unittest.TestCase):
+    def assertSameDFA(self, nfa: Automaton, converter: IncrementalConverter):
+        expected = nfa_to_dfa(nfa, keep_subsets=True)
+        expected_structure = subset_structure(expected, expected.get_subset_map().get_subset)
+        self.assertEqual(subset_structure(converter.get_dfa(), converter.get_subset), expected_structure)
+
+    def test_initial(self):
+        nfa = exponential_nfa(4)
+        converter = IncrementalConverter(nfa)
+        dfa = nfa_to_dfa(nfa)
+        self.assertDictEqual(converter.get_dfa().get_all_transitions(), dfa.get_all_transitions())
+        self.assertSetEqual(converter.get_dfa().get_final_states(), dfa.get_final_states())
+        self.assertSetEqual(nfa.get_changed_states(), set())
+
+    def test_change_log(self):
+        nfa = Automaton("NFA")
+        nfa.add_state("0")
+        nfa.add_state("1")
+        nfa.add_transition("0", "1", "a")
+        self.assertSetEqual(nfa.get_changed_states(), {"0", "1"})
+        nfa.clear_changes()
+
+        nfa.set_final_states({"1"})
+        nfa.remove_transition("0", "1", "a")
+        self.assertSetEqual(nfa.get_changed_states(), {"0", "1"})
+        self.assertDictEqual(nfa.get_transitions_from("0"), {})
+        with self.assertRaises(StateNotFoundError):
+            nfa.remove_transition("0", "1", "a")
+
+        nfa.add_transition("0", "1", "b")
+        nfa.clear_changes()
+        nfa.remove_state("1")
+        self.assertSetEqual(nfa.get_changed_states(), {"0", "1"})
+        self.assertSetEqual(nfa.get_final_states(), set())
+        self.assertDictEqual(nfa.get_transitions_from("0"), {})
+
+    def test_small_update(self):
+        # Объединение правил-слов: начальное состояние ведёт ε-переходами в начало каждого правила
+        generator = random.Random(2)
+        nfa = Automaton("NFA")
+        nfa.add_state("start")
+        nfa.set_start_states({"start"})
+        nfa.set_alphabet(set("abcd"))
+
+        def add_rule(rule: int, word: str):
+            states = [f"{rule}_{i}" for i in range(len(word) + 1)]
+            for state in states:
+                nfa.add_state(state)
+            for i, symbol in enumerate(word):
+                nfa.add_transition(states[i], states[i + 1], symbol)
+            nfa.set_final_states(nfa.get_final_states() | {states[-1]})
+            nfa.add_transition("start", states[0], "ε")
+
+        for rule in range(300):
+            add_rule(rule, "".join(generator.choice("abcd") for _ in range(8)))
+        converter = IncrementalConverter(nfa)
+        states = converter.get_stats()["states"]
+
+        add_rule(300, "abcdabcd")
+        stats = converter.update()
+        self.assertLess(stats["recomputed"], states // 20)
+        self.assertEqual(stats["rebuilds"], 1)
+        self.assertSameDFA(nfa, converter)
+
+        nfa.remove_state("300_4")
+        stats = converter.update()
+        self.assertLess(stats["recomputed"], states // 20)
+        self.assertSameDFA(nfa, converter)
+
+        self.assertEqual(converter.update()["recomputed"], 0)
+
+    def test_start_change(self):
+        nfa = Automaton.from_edges("NFA", [("0", "1", "a"), ("1", "2", "b")], start_states={"0"},
+                                   final_states={"2"})
+        converter = IncrementalConverter(nfa)
+        dfa = converter.get_dfa()
+        nfa.add_transition("0", "2", "ε")
+        converter.update()
+        self.assertIs(converter.get_dfa(), dfa)
+        self.assertEqual(len(dfa.get_start_states()), 1)
+        # Новое начальное состояние содержит конечное состояние НКА
+        self.assertLessEqual(dfa.get_start_states(), dfa.get_final_states())
+        self.assertSameDFA(nfa, converter)
+
+    def test_random_edits(self):
+        generator = random.Random(14)
+        nfa = exponential_nfa(3)
+        nfa.set_alphabet({"a", "b"})
+        converter = IncrementalConverter(nfa)
+        # Обновления изменяют уже полученный ДКА, а не строят его заново
+        dfa = converter.get_dfa()
+        for step in range(60):
+            states = sorted(nfa.get_states())
+            action = generator.randrange(6)
+            if action == 0:
+                nfa.add_state(f"s{step}")
+            elif action == 1 and len(states) > 2:
+                state = generator.choice(states)
+                if state not in nfa.get_start_states():
+                    nfa.remove_state(state)
+            elif action == 2:
+                transitions = [(src, dst, symbol) for src, moves in nfa.get_all_transitions().items()
+                               for symbol, dst_states in moves.items() for dst in dst_states]
+                if transitions:
+                    nfa.remove_transition(*generator.choice(sorted(transitions)))
+            elif action == 3:
+                nfa.set_final_states({state for state in states if generator.random() < 0.3})
+            else:
+                symbol = generator.choice(["a", "b", "ε"])
+                nfa.add_transition(generator.choice(states), generator.choice(states), symbol)
+            with mock.patch.object(Automaton, "from_edges", side_effect=AssertionError):
+                converter.update()
+                self.assertIs(converter.get_dfa(), dfa)
+            self.assertSetEqual(dfa.get_alphabet(), {"a", "b"})
+            self.assertSameDFA(nfa, converter)
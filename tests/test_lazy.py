@@ -0,0 +1,55 @@
+import itertools
+import random
+import unittest
+from benchmarks.generators import exponential_nfa
+from nfa_converter.automaton import *
+from nfa_converter.lazy import LazyDFA
+from tests.helpers import accepts
+
+
+class LazyDFATest(unittest.TestCase):
+    def test_match(self):
+        nfa = exponential_nfa(3)
+        lazy = LazyDFA(nfa)
+        for length in range(9):
+            for letters in itertools.product("ab", repeat=length):
+                word = "".join(letters)
+                self.assertEqual(lazy.match(word), accepts(nfa, word), word)
+        self.assertFalse(lazy.match("abc"))
+
+        stats = lazy.get_stats()
+        self.assertEqual(stats["cached_states"], 16)
+        self.assertEqual(stats["evictions"], 0)
+        self.assertGreater(stats["hits"], 0)
+
+    def test_epsilon_transitions(self):
+        enfa = Automaton("eNFA")
+        for state in ("0", "1", "2"):
+            enfa.add_state(state)
+        enfa.set_start_states({"0"})
+        enfa.set_final_states({"2"})
+        enfa.set_alphabet({"a", "b"})
+        enfa.add_transition("0", "1", "ε")
+        enfa.add_transition("1", "0", "ε")
+        enfa.add_transition("1", "2", "a")
+        enfa.add_transition("2", "0", "b")
+
+        lazy = LazyDFA(enfa)
+        self.assertTrue(lazy.match("a"))
+        self.assertTrue(lazy.match("aba"))
+        self.assertFalse(lazy.match(""))
+        self.assertFalse(lazy.match("ab"))
+
+    def test_bounded_cache(self):
+        nfa = exponential_nfa(10)
+        lazy = LazyDFA(nfa, cache_size=8, max_evictions=50)
+        words = ["".join(letters) for letters in itertools.product("ab", repeat=12)][::7]
+        for word in words:
+            self.assertEqual(lazy.match(word), word[-11] == "a", word)
+        self.assertLessEqual(lazy.get_stats()["cached_states"], 8)
+        self.assertGreater(lazy.get_stats()["evictions"], 0)
+
+        generator = random.Random(1)
+        long_word = "".join(generator.choice("ab") for _ in range(1000)) + "a" * 11
+        self.assertTrue(lazy.match(long_word))
+        self.assertGreater(lazy.get_stats()["fallbacks"], 0)
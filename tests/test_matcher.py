@@ -0,0 +1,54 @@
+import importlib.util
+import itertools
+import unittest
+from unittest import mock
+from benchmarks.generators import exponential_nfa
+from nfa_converter import matcher
+from nfa_converter.automaton import *
+from nfa_converter.matcher import compile
+
+
+class MatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.nfa = exponential_nfa(3)
+        self.dfa = nfa_to_dfa(self.nfa)
+        self.words = ["".join(letters) for length in range(8) for letters in itertools.product("ab", repeat=length)]
+        self.words += ["abca", "aaaaя", "аbbb"]
+
+    def expected(self, word: str) -> bool:
+        return len(word) >= 4 and set(word) <= {"a", "b"} and word[-4] == "a"
+
+    def test_match(self):
+        compiled = compile(self.dfa)
+        for word in self.words:
+            self.assertEqual(compiled.match(word), self.expected(word), word)
+        self.assertListEqual(list(compiled.match_many(self.words)), [self.expected(word) for word in self.words])
+
+    def test_match_batch(self):
+        compiled = compile(self.dfa.freeze())
+        expected = [self.expected(word) for word in self.words]
+        self.assertListEqual(compiled.match_batch(self.words), expected)
+        self.assertListEqual(compiled.match_batch([]), [])
+        with mock.patch.object(matcher, "numpy", None):
+            self.assertListEqual(compiled.match_batch(self.words), expected)
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy"), "numpy не установлен (см. requirements-test.txt)")
+    def test_match_batch_vectorized(self):
+        for dfa in (self.dfa, self.dfa.freeze()):
+            compiled = compile(dfa)
+            # Векторная ветвь не должна переходить к последовательной проверке
+            with mock.patch.object(compiled, "match_many", side_effect=AssertionError):
+                for words in (self.words, self.words[::-1], [""], ["abbb"]):
+                    self.assertListEqual(compiled.match_batch(words), list(compile(dfa).match_many(words)))
+
+    def test_no_start_state(self):
+        dfa = Automaton("DFA")
+        dfa.add_state("1")
+        dfa.set_final_states({"1"})
+        compiled = compile(dfa)
+        self.assertFalse(compiled.match(""))
+        self.assertFalse(compiled.match("a"))
+
+    def test_nondeterministic_input(self):
+        with self.assertRaises(NotDeterministicError):
+            compile(self.nfa)
@@ -0,0 +1,85 @@
+import unittest
+from nfa_converter.automaton import *
+from tests.helpers import abb_enfa, accepts, mokrushin_enfa, words
+
+
+class MinimizationTest(unittest.TestCase):
+    def assertSameLanguage(self, first: Automaton, second: Automaton, alphabet: str, max_length: int = 8):
+        for word in words(alphabet, max_length):
+            self.assertEqual(accepts(first, word), accepts(second, word), word)
+
+    def test_conversion_automaton(self):
+        enfa = abb_enfa()
+        dfa = nfa_to_dfa(enfa)
+        minimal = nfa_to_dfa(enfa, minimize=True)
+        # (a|b)*abb: подмножества дают 5 состояний, минимальный автомат - 4
+        self.assertEqual(len(dfa.get_states()), 5)
+        self.assertEqual(len(minimal.get_states()), 4)
+        self.assertEqual(minimal.get_type(), AutomatonType.DFA)
+        self.assertSameLanguage(enfa, minimal, "ab")
+
+        # В статистике - число состояний до и после минимизации
+        stats = ConversionStats()
+        nfa_to_dfa(enfa, minimize=True, stats=stats)
+        self.assertEqual(stats.dfa_states, 5)
+        self.assertEqual(stats.minimized_states, 4)
+        stats = ConversionStats()
+        nfa_to_dfa(enfa, stats=stats)
+        self.assertEqual(stats.minimized_states, 0)
+
+    def test_mokrushin_automaton(self):
+        enfa = mokrushin_enfa()
+        dfa = nfa_to_dfa(enfa)
+        minimal = minimize(dfa)
+        self.assertLessEqual(len(minimal.get_states()), len(dfa.get_states()))
+        self.assertSetEqual(minimal.get_start_states(), {"A"})
+        self.assertSameLanguage(dfa, minimal, "ab")
+        self.assertSameLanguage(enfa, minimal, "ab")
+        self.assertEqual(len(minimize(minimal).get_states()), len(minimal.get_states()))
+
+        stats = ConversionStats()
+        self.assertEqual(len(nfa_to_dfa(enfa, minimize=True, stats=stats).get_states()), len(minimal.get_states()))
+        self.assertEqual(stats.dfa_states, len(dfa.get_states()))
+        self.assertEqual(stats.minimized_states, len(minimal.get_states()))
+
+    def test_dead_and_unreachable_states(self):
+        dfa = Automaton("DFA")
+        for state in ("1", "2", "3", "dead", "lost"):
+            dfa.add_state(state)
+        dfa.set_start_states({"1"})
+        dfa.set_final_states({"2", "3"})
+        dfa.set_alphabet({"a", "b"})
+        dfa.add_transition("1", "2", "a")
+        dfa.add_transition("1", "3", "b")
+        dfa.add_transition("2", "dead", "a")
+        dfa.add_transition("3", "dead", "a")
+        dfa.add_transition("dead", "dead", "b")
+        dfa.add_transition("lost", "1", "a")
+
+        minimal = minimize(dfa)
+        self.assertSetEqual(minimal.get_states(), {"1", "2"})
+        self.assertDictEqual(minimal.get_all_transitions(), {"1": {"a": {"2"}, "b": {"2"}}})
+        self.assertSetEqual(minimal.get_final_states(), {"2"})
+
+    def test_empty_language(self):
+        dfa = Automaton("DFA")
+        dfa.add_state("1")
+        dfa.add_state("2")
+        dfa.set_start_states({"1"})
+        dfa.set_final_states({"2"})
+        dfa.add_transition("1", "1", "a")
+
+        minimal = minimize(dfa)
+        self.assertSetEqual(minimal.get_states(), {"1"})
+        self.assertSetEqual(minimal.get_final_states(), set())
+        self.assertDictEqual(minimal.get_all_transitions(), {})
+
+    def test_nondeterministic_input(self):
+        nfa = Automaton("NFA")
+        nfa.add_state("1")
+        nfa.add_state("2")
+        nfa.set_start_states({"1"})
+        nfa.add_transition("1", "1", "a")
+        nfa.add_transition("1", "2", "a")
+        with self.assertRaises(NotDeterministicError):
+            minimize(nfa)
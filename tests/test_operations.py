@@ -0,0 +1,140 @@
+import unittest
+from benchmarks.generators import exponential_nfa, random_enfa
+from nfa_converter.automaton import *
+from nfa_converter.matcher import compile
+from nfa_converter.operations import complement, counterexample, difference, equivalent, intersect, is_empty, \
+    union
+from nfa_converter.readwrite import read
+from tests.helpers import accepts, words
+
+
+class OperationsTest(unittest.TestCase):
+    def test_random_operands(self):
+        for seed in range(6):
+            first = random_enfa(6, density=0.8, epsilon_density=0.3, final_ratio=0.3, seed=seed)
+            second = random_enfa(5, density=0.8, epsilon_density=0.3, final_ratio=0.3, seed=seed + 100)
+            for determinize in (True, False):
+                results = {
+                    "intersect": intersect(first, second, determinize),
+                    "union": union(first, second, determinize),
+                    "difference": difference(first, second, determinize),
+                }
+                if determinize:
+                    for result in results.values():
+                        self.assertEqual(result.get_type(), AutomatonType.DFA)
+                for word in words("ab", 7):
+                    in_first, in_second = accepts(first, word), accepts(second, word)
+                    self.assertEqual(accepts(results["intersect"], word), in_first and in_second, word)
+                    self.assertEqual(accepts(results["union"], word), in_first or in_second, word)
+                    self.assertEqual(accepts(results["difference"], word), in_first and not in_second, word)
+
+            inverse = complement(first)
+            self.assertEqual(inverse.get_type(), AutomatonType.DFA)
+            for word in words("ab", 7):
+                self.assertNotEqual(accepts(inverse, word), accepts(first, word), word)
+
+    def test_pruning(self):
+        # Пересечение (a|b)*a(a|b)^8 и a* - язык a^9a*: строятся только 10 состояний
+        # произведения, а не 2^9 состояний ДКА первого автомата
+        nfa = exponential_nfa(8)
+        only_a = Automaton("DFA")
+        only_a.add_state("0")
+        only_a.set_start_states({"0"})
+        only_a.set_final_states({"0"})
+        only_a.set_alphabet({"a", "b"})
+        only_a.add_transition("0", "0", "a")
+
+        product = intersect(nfa, only_a)
+        self.assertEqual(len(product.get_states()), 10)
+        self.assertTrue(accepts(product, "a" * 9))
+        self.assertFalse(accepts(product, "a" * 8))
+
+        # Пустое пересечение - одно неконечное состояние
+        empty = difference(only_a, only_a)
+        self.assertEqual(len(empty.get_states()), 1)
+        self.assertSetEqual(empty.get_final_states(), set())
+        self.assertDictEqual(empty.get_all_transitions(), {})
+
+    def test_complement_alphabet(self):
+        dfa = complement(exponential_nfa(1), alphabet={"a", "b", "c"})
+        self.assertSetEqual(dfa.get_alphabet(), {"a", "b", "c"})
+        self.assertTrue(accepts(dfa, ""))
+        self.assertTrue(accepts(dfa, "ac"))
+        self.assertFalse(accepts(dfa, "bab"))
+
+    def test_symbol_classes(self):
+        identifiers = read("""
+            digraph G {
+                "" [shape=none];
+                start [shape=circle];
+                name [shape=doublecircle];
+                "" -> start;
+                start -> name [label="[a-z_]"];
+                name -> name [label="[a-z_0-9]"];
+            }
+        """)
+        keyword = read("""
+            digraph G {
+                "" [shape=none];
+                0 [shape=circle];
+                1 [shape=circle];
+                2 [shape=doublecircle];
+                "" -> 0;
+                0 -> 1 [label="i"];
+                1 -> 2 [label="f"];
+            }
+        """)
+        names = compile(difference(identifiers, keyword))
+        for word, expected in (("if", False), ("i", True), ("iff", True), ("x_1", True), ("1x", False)):
+            self.assertEqual(names.match(word), expected, word)
+        self.assertTrue(compile(intersect(identifiers, keyword)).match("if"))
+        self.assertFalse(compile(intersect(identifiers, keyword)).match("i"))
+
+
+class EquivalenceTest(unittest.TestCase):
+    def test_equivalent(self):
+        for seed in range(6):
+            nfa = random_enfa(8, density=0.8, epsilon_density=0.3, final_ratio=0.3, seed=seed)
+            self.assertTrue(equivalent(nfa, nfa_to_dfa(nfa)))
+            self.assertTrue(equivalent(nfa_to_dfa(nfa, minimize=True), nfa))
+            self.assertIsNone(counterexample(nfa, nfa_to_dfa(nfa, engine="bitset")))
+
+    def test_shortest_counterexample(self):
+        for seed in range(10):
+            first = random_enfa(6, density=0.8, epsilon_density=0.3, final_ratio=0.3, seed=seed)
+            second = random_enfa(6, density=0.8, epsilon_density=0.3, final_ratio=0.3, seed=seed + 50)
+            expected = next((word for word in words("ab", 8) if accepts(first, word) != accepts(second, word)),
+                            None)
+            word = counterexample(first, second)
+            if expected is None:
+                self.assertIsNone(word)
+            else:
+                self.assertEqual(len(word), len(expected))
+                self.assertNotEqual(accepts(first, word), accepts(second, word))
+
+        # Кратчайшие слова, различающие a(a|b)^5 и (a|b)*a(a|b)^5, имеют длину 7,
+        # символы перебираются в порядке сортировки
+        prefix = exponential_nfa(5)
+        prefix.remove_transition("0", "0", "a")
+        prefix.remove_transition("0", "0", "b")
+        self.assertEqual(counterexample(exponential_nfa(5), prefix), "aaaaaaa")
+        self.assertFalse(equivalent(exponential_nfa(5), exponential_nfa(4)))
+
+    def test_counterexample_classes(self):
+        letters = Automaton("NFA")
+        letters.add_state("0")
+        letters.add_state("1")
+        letters.set_start_states({"0"})
+        letters.set_final_states({"1"})
+        letters.set_alphabet({"[a-z]"})
+        letters.add_transition("0", "1", "[a-z]")
+        empty = intersect(letters, difference(letters, letters))
+        self.assertEqual(counterexample(letters, empty), "a")
+
+    def test_is_empty(self):
+        nfa = exponential_nfa(3)
+        self.assertFalse(is_empty(nfa))
+        self.assertTrue(is_empty(difference(nfa, nfa_to_dfa(nfa))))
+        nfa.set_final_states(set())
+        self.assertTrue(is_empty(nfa))
+        self.assertIsNone(counterexample(nfa, Automaton("DFA")))
@@ -1,4 +1,10 @@
+import gzip
+import importlib.util
+import io
+import itertools
+import string
 import unittest
+from nfa_converter.automaton import Automaton
 from nfa_converter.readwrite import *
 
 
@@ -25,3 +31,111 @@ class ReadWriteTest(unittest.TestCase):
             print(e)
         else:
             self.fail()
+
+    @unittest.skipUnless(importlib.util.find_spec("pydot"), "pydot не установлен (см. requirements-test.txt)")
+    def test_matches_pydot(self):
+        import pydot
+
+        for file_name in ("sample_valid_first.dot", "sample_valid_second.dot", "nfa_first.dot"):
+            with open(f"dot_files/{file_name}", "r") as dot_file:
+                dot_str = dot_file.read()
+            automaton = read(dot_str)
+
+            (graph,) = pydot.graph_from_dot_data(dot_str)
+            nodes = {node.get_name().strip('"'): node.get_attributes()["shape"].strip('"')
+                     for node in graph.get_nodes()}
+            edges = {(edge.get_source().strip('"'), edge.get_destination().strip('"'),
+                      edge.get_attributes().get("label", "").strip('"')) for edge in graph.get_edges()}
+
+            self.assertEqual(automaton.get_name(), graph.get_name())
+            self.assertSetEqual(automaton.get_states(), set(nodes) - {""})
+            self.assertSetEqual(automaton.get_final_states(),
+                                {node for node, shape in nodes.items() if shape == "doublecircle"})
+            self.assertSetEqual(automaton.get_start_states(), {dst for src, dst, _ in edges if src == ""})
+            transitions = {(src, dst, symbol) for src, moves in automaton.get_all_transitions().items()
+                           for symbol, dst_states in moves.items() for dst in dst_states}
+            self.assertSetEqual(transitions, {edge for edge in edges if edge[0] != ""})
+
+    def test_read_syntax(self):
+        automaton = read("""
+            /* комментарий */
+            digraph "my automaton" {
+                node [shape=circle];
+                "" [shape=none]
+                start; finish [shape=doublecircle]  // комментарий
+                "" -> start
+                start -> "fin" + "ish" -> start [label=a]
+                finish -> finish [label="\\""]
+            }
+        """)
+        self.assertEqual(automaton.get_name(), "my automaton")
+        self.assertSetEqual(automaton.get_states(), {"start", "finish"})
+        self.assertSetEqual(automaton.get_final_states(), {"finish"})
+        self.assertDictEqual(automaton.get_all_transitions(),
+                             {"start": {"a": {"finish"}}, "finish": {"a": {"start"}, '"': {"finish"}}})
+
+    def test_syntax_error_position(self):
+        with self.assertRaises(DotSyntaxError) as context:
+            read('digraph G {\n  "a" [shape=circle];\n  "a" -> @\n}')
+        self.assertEqual((context.exception.line, context.exception.column), (3, 10))
+
+        with self.assertRaises(InvalidMoveSymbolError) as context:
+            read('digraph G {\n  "a" [shape=circle];\n  "a" -> "a" [label="ab"]\n}')
+        self.assertIn("строка 3, столбец 3", str(context.exception))
+
+        with self.assertRaises(InvalidAutomatonError):
+            read("graph G { }")
+
+    def test_write_round_trip(self):
+        with open("dot_files/nfa_first.dot", "r") as dot_file:
+            automaton = read(dot_file.read())
+        automaton.add_state('quote " and \\ slash')
+        automaton.add_transition("0", 'quote " and \\ slash', ",")
+        automaton.add_transition("0", 'quote " and \\ slash', "a")
+        automaton.add_transition("0", 'quote " and \\ slash', "b")
+        automaton.set_alphabet(automaton.get_alphabet() | {","})
+
+        for merge_edges in (True, False):
+            output = io.StringIO()
+            write_to(automaton, output, merge_edges=merge_edges)
+            restored = read(output.getvalue())
+            self.assertSetEqual(restored.get_states(), automaton.get_states())
+            self.assertSetEqual(restored.get_start_states(), automaton.get_start_states())
+            self.assertSetEqual(restored.get_final_states(), automaton.get_final_states())
+            self.assertSetEqual(restored.get_alphabet(), automaton.get_alphabet())
+            self.assertDictEqual(restored.get_all_transitions(), automaton.get_all_transitions())
+
+        self.assertIn('"0" -> "quote \\" and \\\\ slash" [label="a,b"];', write(automaton))
+        self.assertIn('"0" -> "quote \\" and \\\\ slash" [label=","];', write(automaton))
+
+    def test_write_round_trip_punctuation(self):
+        # Параллельные переходы по каждой паре знаков, включая задающие классы символов
+        for first, second in itertools.combinations("a" + string.punctuation, 2):
+            automaton = Automaton("G")
+            automaton.add_states(("p", "q"))
+            automaton.set_start_states({"p"})
+            automaton.set_final_states({"q"})
+            automaton.set_alphabet({first, second})
+            automaton.add_transitions_bulk([("p", "q", first), ("p", "q", second)])
+
+            restored = read(write(automaton))
+            self.assertSetEqual(restored.get_alphabet(), {first, second})
+            self.assertDictEqual(restored.get_all_transitions(), automaton.get_all_transitions())
+
+    def test_write_binary_and_gzip(self):
+        with open("dot_files/sample_valid_second.dot", "r") as dot_file:
+            automaton = read(dot_file.read())
+        expected = write(automaton)
+
+        output = io.BytesIO()
+        write_to(automaton, output)
+        self.assertEqual(output.getvalue().decode("utf-8"), expected)
+        self.assertFalse(output.closed)
+
+        output = io.BytesIO()
+        write_to(automaton, output, compress=True)
+        self.assertEqual(gzip.decompress(output.getvalue()).decode("utf-8"), expected)
+        self.assertFalse(output.closed)
+
+        with self.assertRaises(ValueError):
+            write_to(automaton, io.StringIO(), compress=True)
@@ -0,0 +1,50 @@
+import itertools
+import re
+import unittest
+from nfa_converter.automaton import *
+from nfa_converter.lazy import LazyDFA
+from nfa_converter.matcher import compile
+from nfa_converter.regex import RegexSyntaxError, regex_to_nfa
+
+
+class RegexTest(unittest.TestCase):
+    PATTERNS = ["a(b|c)*d", "(ab|a)*", "x?y+", "", "a||b", "(a*)*b", "[a-c]+.\\.", "\\x41[^a]", "((a|b)c?)+"]
+
+    def test_constructions_match_re(self):
+        for pattern in self.PATTERNS:
+            glushkov = regex_to_nfa(pattern)
+            thompson = regex_to_nfa(pattern, "thompson")
+            self.assertNotEqual(glushkov.get_type(), AutomatonType.eNFA)
+            lazy = LazyDFA(glushkov)
+            compiled = compile(nfa_to_dfa(thompson))
+            for length in range(5):
+                for letters in itertools.product("abcdxyA.", repeat=length):
+                    word = "".join(letters)
+                    expected = re.fullmatch(pattern, word) is not None
+                    self.assertEqual(lazy.match(word), expected, (pattern, word))
+                    self.assertEqual(compiled.match(word), expected, (pattern, word))
+
+    def test_glushkov_structure(self):
+        nfa = regex_to_nfa("a(b|c)*d")
+        self.assertSetEqual(nfa.get_states(), {"0", "1", "2", "3", "4"})
+        self.assertSetEqual(nfa.get_start_states(), {"0"})
+        self.assertSetEqual(nfa.get_final_states(), {"4"})
+        self.assertSetEqual(nfa.get_alphabet(), {"a", "b", "c", "d"})
+        self.assertDictEqual(nfa.get_transitions_from("2"), {"b": {"2"}, "c": {"3"}, "d": {"4"}})
+        self.assertSetEqual(regex_to_nfa("a*").get_final_states(), {"0", "1"})
+
+    def test_symbol_labels(self):
+        nfa = regex_to_nfa("[a-z_][a-z_0-9]*|\\[|ε")
+        self.assertSetEqual(nfa.get_alphabet(), {"[_a-z]", "[0-9_a-z]", "[", "[ε]"})
+        compiled = compile(nfa_to_dfa(nfa))
+        for word, expected in (("x1", True), ("[", True), ("ε", True), ("1x", False), ("", False)):
+            self.assertEqual(compiled.match(word), expected, word)
+
+    def test_syntax_errors(self):
+        for pattern, position in (("(ab", 3), ("ab)", 2), ("*a", 0), ("a|+", 2), ("[ab", 0), ("[]", 0),
+                                  ("[b-a]", 0), ("\\x4", 0)):
+            with self.assertRaises(RegexSyntaxError, msg=pattern) as context:
+                regex_to_nfa(pattern)
+            self.assertEqual(context.exception.position, position, pattern)
+        with self.assertRaises(ValueError):
+            regex_to_nfa("a", "unknown")
@@ -0,0 +1,115 @@
+import asyncio
+import io
+import os
+import re
+import shutil
+import tempfile
+import unittest
+from nfa_converter.automaton import *
+from nfa_converter.binary import load, save
+from nfa_converter.matcher import compile
+from nfa_converter.operations import combine
+from nfa_converter.regex import regex_to_nfa
+from nfa_converter.scan import Scanner, scan, scan_async, scan_file
+
+
+class _ChunkReader:
+    """
+    Асинхронный поток, отдающий данные порциями не больше заданного размера.
+    """
+
+    def __init__(self, data: bytes, size: int):
+        self._data = data
+        self._size = size
+
+    async def read(self, size: int) -> bytes:
+        chunk = self._data[:min(size, self._size)]
+        self._data = self._data[len(chunk):]
+        return chunk
+
+
+def expected_ends(pattern: str, text: str):
+    return [end for end in range(len(text) + 1) if re.fullmatch(pattern, text[:end], re.DOTALL)]
+
+
+class ScanTest(unittest.TestCase):
+    TEXT = "boot ok\nerror: disk\nwarning: fan\nwarn\nerror: error\n"
+
+    def test_chunk_boundaries(self):
+        for pattern in (".*error", ".*(warn|warning)", "boot.*", "b?", "x"):
+            dfa = nfa_to_dfa(regex_to_nfa(pattern), minimize=True)
+            expected = expected_ends(pattern, self.TEXT)
+            for chunk_size in (1, 2, 7, 1000):
+                self.assertListEqual(list(scan(dfa, io.StringIO(self.TEXT), chunk_size)), expected, pattern)
+                data = io.BytesIO(self.TEXT.encode("ascii"))
+                self.assertListEqual(list(scan(compile(dfa), data, chunk_size)), expected, pattern)
+
+    def test_dead_state(self):
+        dfa = nfa_to_dfa(regex_to_nfa("ab"))
+        scanner = Scanner(dfa)
+        self.assertListEqual(scanner.feed("a"), [])
+        self.assertListEqual(scanner.feed("bc"), [2])
+        self.assertTrue(scanner.finished)
+        self.assertListEqual(scanner.feed("ab"), [])
+        self.assertEqual(scanner.offset, 5)
+
+        # После тупика поток больше не читается
+        stream = io.StringIO("xab" * 10)
+        self.assertListEqual(list(scan(dfa, stream, chunk_size=4)), [])
+        self.assertEqual(stream.tell(), 4)
+
+    def test_tags(self):
+        patterns = {"error": ".*error", "warn": ".*warn(ing)?", "word": ".*(error|warn)"}
+        nfa = combine({rule: regex_to_nfa(pattern) for rule, pattern in patterns.items()})
+        self.assertEqual(nfa.get_type(), AutomatonType.eNFA)
+        for engine in ENGINES:
+            for minimize in (False, True):
+                dfa = nfa_to_dfa(nfa, engine=engine, minimize=minimize)
+                matches = list(scan(dfa, io.StringIO(self.TEXT), chunk_size=5, tagged=True))
+                for rule, pattern in patterns.items():
+                    self.assertListEqual([end for end, tags in matches if rule in tags],
+                                         expected_ends(pattern, self.TEXT))
+                self.assertSetEqual(matches[0][1], {"error", "word"})
+                self.assertSetEqual(compile(dfa).match_tags("a warning"), {"warn"})
+                self.assertSetEqual(compile(dfa).match_tags("a warn"), {"warn", "word"})
+
+    def test_tagged_minimization(self):
+        # Без меток состояния после "x" и после "y" неразличимы
+        nfa = combine({"x": regex_to_nfa("x"), "y": regex_to_nfa("y")})
+        untagged = nfa.copy()
+        untagged.set_tags({})
+        self.assertEqual(len(nfa_to_dfa(untagged, minimize=True).get_states()), 2)
+        dfa = nfa_to_dfa(nfa, minimize=True)
+        self.assertSetEqual(set(dfa.get_tags().values()), {frozenset({"x"}), frozenset({"y"})})
+
+    def test_binary_tags(self):
+        dfa = nfa_to_dfa(combine({"x": regex_to_nfa("x"), "xy": regex_to_nfa("xy?")}))
+        data = io.BytesIO()
+        save(dfa, data)
+        data.seek(0)
+        frozen = load(data)
+        self.assertDictEqual(frozen.tags, dfa.freeze().tags)
+        self.assertDictEqual(frozen.to_automaton().get_tags(), dfa.get_tags())
+        self.assertSetEqual(compile(frozen).match_tags("x"), {"x", "xy"})
+
+    def test_scan_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "log.txt")
+            with open(path, "wb") as log_file:
+                log_file.write(self.TEXT.encode("ascii"))
+            dfa = nfa_to_dfa(regex_to_nfa(".*error"))
+            self.assertListEqual(list(scan_file(dfa, path, chunk_size=3)), expected_ends(".*error", self.TEXT))
+
+            open(path, "wb").close()
+            self.assertListEqual(list(scan_file(nfa_to_dfa(regex_to_nfa("a*")), path)), [0])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_scan_async(self):
+        async def collect(reader):
+            return [match async for match in scan_async(dfa, reader, chunk_size=4, tagged=True)]
+
+        dfa = nfa_to_dfa(combine({"error": regex_to_nfa(".*error")}))
+        matches = asyncio.run(collect(_ChunkReader(self.TEXT.encode("ascii"), 3)))
+        self.assertListEqual(matches, [(end, {"error"}) for end in expected_ends(".*error", self.TEXT)])
@@ -0,0 +1,127 @@
+import unittest
+from nfa_converter.automaton import *
+from nfa_converter.lazy import LazyDFA
+from nfa_converter.matcher import compile
+from nfa_converter.readwrite import *
+from nfa_converter.symbols import format_class, parse_atom, parse_class, parse_label, partition, split_label
+
+
+class SymbolsTest(unittest.TestCase):
+    def test_parse_label(self):
+        self.assertListEqual(parse_label("a"), [(97, 97)])
+        self.assertListEqual(parse_label("a-z"), [(97, 122)])
+        self.assertListEqual(parse_label("\\x00-\\x7f"), [(0, 127)])
+        self.assertListEqual(parse_label("[a-z0-9_]"), [(48, 57), (95, 95), (97, 122)])
+        self.assertListEqual(parse_label("[^\\x01-\\U0010ffff]"), [(0, 0)])
+        self.assertListEqual(parse_label("[-a\\]]"), [(45, 45), (93, 93), (97, 97)])
+        self.assertIsNone(parse_label("ab"))
+        self.assertIsNone(parse_label("ε"))
+        with self.assertRaises(ValueError):
+            parse_label("[z-a]")
+        with self.assertRaises(ValueError):
+            parse_label("[\\xZZ]")
+
+    def test_parse_class(self):
+        self.assertListEqual(parse_class("a-c\\x41"), [(65, 65), (97, 99)])
+        self.assertListEqual(parse_class("^\\x00-\\U0010fffe"), [(0x10FFFF, 0x10FFFF)])
+        self.assertTupleEqual(parse_atom("a\\u00e9b", 1), (0xE9, 7))
+        self.assertTupleEqual(parse_atom("\\.", 0), (46, 2))
+        with self.assertRaises(ValueError):
+            parse_class("b-a")
+        with self.assertRaises(ValueError):
+            parse_atom("\\", 0)
+
+    def test_format_class(self):
+        self.assertEqual(format_class([(97, 97)]), "a")
+        self.assertEqual(format_class([(97, 99), (100, 122), (48, 49)]), "[01a-z]")
+        self.assertEqual(format_class([(10, 10)]), "[\\x0a]")
+        self.assertEqual(format_class([(44, 45), (0x3b5, 0x3b5)]), "[\\,\\-ε]")
+        for ranges in ([(0, 127)], [(44, 45), (93, 94)], [(0x3b5, 0x3b5)], [(0x1F600, 0x1F64F)]):
+            self.assertListEqual(parse_label(format_class(ranges)), ranges)
+
+    def test_split_label(self):
+        self.assertListEqual(split_label(","), [","])
+        self.assertListEqual(split_label("a,b"), ["a", "b"])
+        self.assertListEqual(split_label("[,a-z],\\,,ε"), ["[,a-z]", "\\,", "ε"])
+
+    def test_partition(self):
+        classes, members = partition(["[a-z]", "[x-z0-9]", "a", "ab"])
+        self.assertListEqual(classes, ["[0-9]", "[b-w]", "[x-z]", "a", "ab"])
+        self.assertDictEqual(members, {"[a-z]": [1, 2, 3], "[x-z0-9]": [0, 2], "a": [3], "ab": [4]})
+
+
+class SymbolClassConversionTest(unittest.TestCase):
+    IDENTIFIER = """
+        digraph G {
+            "" [shape=none];
+            start [shape=circle];
+            keyword [shape=circle];
+            name [shape=doublecircle];
+            "" -> start;
+            start -> name [label="[a-zA-Z_]"];
+            start -> keyword [label="i"];
+            keyword -> name [label="f"];
+            name -> name [label="[a-zA-Z_],0-9"];
+        }
+    """
+
+    def test_read_classes(self):
+        nfa = read(self.IDENTIFIER)
+        self.assertSetEqual(nfa.get_alphabet(), {"[A-Z_a-z]", "[0-9]", "i", "f"})
+
+        frozen = nfa.freeze()
+        self.assertListEqual(frozen.symbols, ["[0-9]", "[A-Z_a-eghj-z]", "f", "i"])
+        self.assertEqual(frozen.find_symbol("q"), 1)
+        self.assertEqual(frozen.find_symbol("i"), 3)
+        self.assertEqual(frozen.find_symbol("-"), -1)
+
+        with self.assertRaises(InvalidMoveSymbolError):
+            read(self.IDENTIFIER.replace("0-9", "[9-0]"))
+
+    def test_convert_classes(self):
+        dfa = nfa_to_dfa(read(self.IDENTIFIER), minimize=True)
+        self.assertEqual(dfa.get_type(), AutomatonType.DFA)
+        self.assertEqual(len(dfa.get_states()), 2)
+
+        compiled = compile(dfa)
+        lazy = LazyDFA(read(self.IDENTIFIER))
+        for word, expected in (("if", True), ("x1", True), ("_", True), ("1x", False), ("a-b", False),
+                               ("", False), ("é", False)):
+            self.assertEqual(compiled.match(word), expected, word)
+            self.assertEqual(lazy.match(word), expected, word)
+
+        # Параллельные переходы записываются одним классом
+        text = write(dfa)
+        self.assertIn('[label="[0-9A-Z_a-z]"]', text)
+        restored = read(text)
+        self.assertTrue(compile(restored).match("abc_123"))
+
+    def test_write_keeps_labels(self):
+        # Пересекающиеся классы не разбиваются при записи непреобразованного автомата
+        nfa = Automaton("NFA")
+        nfa.add_states(("0", "1", "2"))
+        nfa.set_start_states({"0"})
+        nfa.set_final_states({"1", "2"})
+        nfa.set_alphabet({"[a-z]", "[0-9a-f]"})
+        nfa.add_transitions_bulk([("0", "1", "[a-z]"), ("0", "2", "[0-9a-f]")])
+        text = write(nfa)
+        self.assertIn('"0" -> "1" [label="[a-z]"];', text)
+        self.assertIn('"0" -> "2" [label="[0-9a-f]"];', text)
+        self.assertDictEqual(read(text).get_all_transitions(), nfa.get_all_transitions())
+        self.assertEqual(nfa.get_type(), AutomatonType.NFA)
+
+    def test_unicode_range(self):
+        nfa = Automaton("NFA")
+        nfa.add_state("0")
+        nfa.add_state("1")
+        nfa.set_start_states({"0"})
+        nfa.set_final_states({"1"})
+        nfa.set_alphabet({"\\x00-\\x7f", "[\\u0400-\\u04ff]"})
+        nfa.add_transition("0", "1", "\\x00-\\x7f")
+        nfa.add_transition("1", "1", "[\\u0400-\\u04ff]")
+
+        dfa = nfa_to_dfa(nfa)
+        compiled = compile(dfa)
+        self.assertTrue(compiled.match("zжук"))
+        self.assertFalse(compiled.match("жук"))
+        self.assertEqual(len(dfa.get_alphabet()), 2)